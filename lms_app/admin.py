@@ -1,13 +1,103 @@
 from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin
 
-from .models import User, Course, Lesson, Quiz, Question, Answer, Enrollment, LessonProgress, QuizAttempt
-
-admin.site.register(User)
-admin.site.register(Course)
-admin.site.register(Lesson)
-admin.site.register(Quiz)
-admin.site.register(Question)
-admin.site.register(Answer)
-admin.site.register(Enrollment)
-admin.site.register(LessonProgress)
-admin.site.register(QuizAttempt)
+from .forms import LessonContentForm
+from .models import User, Course, Lesson, Quiz, Question, Answer, Enrollment, LessonProgress, QuizAttempt, ReportJob
+from .paginators import EstimatedCountPaginator
+
+
+@admin.register(User)
+class LmsUserAdmin(UserAdmin):
+    list_display = ('username', 'email', 'role', 'is_staff', 'date_joined')
+    list_filter = ('role', 'is_staff', 'is_superuser', 'is_active')
+    fieldsets = UserAdmin.fieldsets + (('LMS', {'fields': ('role',)}),)
+    add_fieldsets = UserAdmin.add_fieldsets + (('LMS', {'fields': ('role',)}),)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(Course)
+class CourseAdmin(admin.ModelAdmin):
+    list_display = ('title', 'instructor', 'created_at', 'updated_at')
+    list_select_related = ('instructor',)
+    search_fields = ('title',)
+    autocomplete_fields = ('instructor',)
+
+
+@admin.register(Lesson)
+class LessonAdmin(admin.ModelAdmin):
+    form = LessonContentForm
+    fields = ('course', 'title', 'content', 'order')
+    list_display = ('title', 'course', 'order', 'updated_at')
+    list_select_related = ('course__instructor',)
+    search_fields = ('title',)
+    autocomplete_fields = ('course',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(Quiz)
+class QuizAdmin(admin.ModelAdmin):
+    list_display = ('title', 'lesson', 'question_count')
+    list_select_related = ('lesson__course',)
+    search_fields = ('title',)
+    raw_id_fields = ('lesson',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(Question)
+class QuestionAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'quiz')
+    list_select_related = ('quiz__lesson',)
+    raw_id_fields = ('quiz',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(Answer)
+class AnswerAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'question', 'is_correct')
+    list_select_related = ('question',)
+    raw_id_fields = ('question',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(Enrollment)
+class EnrollmentAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'date_enrolled')
+    list_select_related = ('student', 'course')
+    list_filter = ('date_enrolled',)
+    autocomplete_fields = ('student', 'course')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(LessonProgress)
+class LessonProgressAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'completed', 'date_completed')
+    list_select_related = ('enrollment__student', 'lesson')
+    list_filter = ('completed',)
+    raw_id_fields = ('enrollment', 'lesson')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(QuizAttempt)
+class QuizAttemptAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'score', 'total_questions', 'date_attempted')
+    list_select_related = ('student', 'quiz')
+    list_filter = ('date_attempted',)
+    raw_id_fields = ('student', 'quiz')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'requested_by', 'created_at', 'finished_at')
+    list_select_related = ('requested_by',)
+    list_filter = ('status', 'task_name')
+    raw_id_fields = ('requested_by',)
+    readonly_fields = ('result', 'error', 'started_at', 'finished_at')
@@ -0,0 +1,799 @@
+"""JSON API for the mobile app and other non-browser clients.
+
+Every resource is served by two generic views: a collection endpoint
+(``GET`` list, ``POST`` create) and an item endpoint (``GET``, ``PATCH``,
+``DELETE``). Collections support:
+
+* ``?fields=title,updated_at`` – sparse fieldsets, applied with ``.only()``;
+* ``?include=lessons`` – related objects, loaded with ``select_related`` or
+  one ``prefetch_related`` query per relation;
+* ``?ids=1,2,3`` – batched lookups of up to ``API_MAX_BATCH`` objects;
+* ``?cursor=…&limit=…`` – cursor pagination on the primary key.
+
+Authentication uses the regular session cookie, so writes need the CSRF
+token in the ``X-CSRFToken`` header. Writes go through the same services
+and permission rules as the HTML views.
+"""
+import base64
+import binascii
+import json
+from math import ceil
+
+from django.db import IntegrityError
+from django.db.models import F, Prefetch
+from django.forms import ModelForm, model_to_dict, modelform_factory
+from django.http import Http404, HttpResponse, JsonResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.generic import View
+
+from .cache import deferred_invalidation
+from .constants import INSTRUCTOR_ROLE, STUDENT_ROLE
+from .forms import LessonContentForm
+from .models import Answer, Course, Enrollment, Lesson, LessonProgress, Question, Quiz, QuizAttempt, User
+from .services import EnrollmentService, ExamService, LessonService, QuizService
+from .throttling import (
+    SUBMISSION_PENDING,
+    claim_submission,
+    complete_submission,
+    get_submission,
+    quiz_submission_bucket,
+    release_submission,
+)
+
+API_DEFAULT_LIMIT = 20
+API_MAX_LIMIT = 100
+API_MAX_BATCH = 100
+API_MAX_ROSTER = 10000
+API_MAX_IDEMPOTENCY_KEY = 128
+
+
+class ApiError(Exception):
+    """Raised anywhere in an API view to return a JSON error response."""
+
+    def __init__(self, message, status=400, errors=None, headers=None):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.errors = errors
+        self.headers = headers
+
+    def as_response(self):
+        payload = {'error': self.message}
+        if self.errors:
+            payload['errors'] = self.errors
+        return JsonResponse(payload, status=self.status, headers=self.headers)
+
+
+def parse_list_param(request, name):
+    value = request.GET.get(name, '')
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def parse_id_list(values, name, limit=API_MAX_BATCH):
+    try:
+        ids = list(dict.fromkeys(int(value) for value in values))
+    except (TypeError, ValueError):
+        raise ApiError(f"'{name}' must be a list of integer ids.")
+    if len(ids) > limit:
+        raise ApiError(f"'{name}' accepts at most {limit} ids.")
+    return ids
+
+
+def parse_id(value, name):
+    if isinstance(value, bool):
+        value = None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ApiError(f"'{name}' must be an integer id.")
+
+
+def encode_cursor(pk):
+    return base64.urlsafe_b64encode(str(pk).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ApiError("Invalid cursor.")
+
+
+def is_course_owner(user, instructor_id):
+    return user.is_superuser or instructor_id == user.pk
+
+
+class Include:
+    """A relation that can be embedded with ``?include=``.
+
+    Single-valued relations (forward foreign keys and reverse one-to-one)
+    are joined with ``select_related``; multi-valued ones are loaded with a
+    single ``Prefetch`` each.
+    """
+
+    def __init__(self, resource, many=False):
+        # Resource class, or its name for resources defined further down.
+        self._resource = resource
+        self.many = many
+
+    @property
+    def resource(self):
+        if isinstance(self._resource, str):
+            return globals()[self._resource]
+        return self._resource
+
+
+class Resource:
+    """Describes how a model is exposed through the API.
+
+    Subclasses list the public ``fields`` (foreign keys are exposed as ids
+    under the relation name), optional ``default_fields``, ``includes`` and
+    query-parameter ``filters``, scope ``get_queryset()`` to what the user
+    may see, and implement ``create``/``update``/``delete`` when writable.
+    """
+
+    model = None
+    fields = ()
+    default_fields = None
+    includes = {}
+    filters = {}
+    form_fields = ()
+    update_fields = None
+    model_form = ModelForm
+
+    def __init__(self, request):
+        self.request = request
+        self.user = request.user
+
+    # Reading
+
+    def get_queryset(self):
+        return self.model._default_manager.all()
+
+    def attname(self, name):
+        field = self.model._meta.get_field(name)
+        return getattr(field, 'attname', name)
+
+    def resolve_fields(self, requested):
+        if not requested:
+            return ['id', *[name for name in (self.default_fields or self.fields) if name != 'id']]
+        unknown = sorted(set(requested) - set(self.fields))
+        if unknown:
+            raise ApiError(
+                f"Unknown field(s): {', '.join(unknown)}.",
+                errors={'fields': list(self.fields)},
+            )
+        return ['id', *[name for name in requested if name != 'id']]
+
+    def resolve_includes(self, requested):
+        unknown = sorted(set(requested) - set(self.includes))
+        if unknown:
+            raise ApiError(
+                f"Unknown include(s): {', '.join(unknown)}.",
+                errors={'include': list(self.includes)},
+            )
+        return list(dict.fromkeys(requested))
+
+    def include_queryset(self, name, include):
+        """Queryset used to prefetch a multi-valued include."""
+        related = include.resource(self.request)
+        remote_field = self.model._meta.get_field(name).field.name
+        return related.model._default_manager.only(
+            related.attname(remote_field), *[related.attname(f) for f in related.resolve_fields(None)]
+        )
+
+    def apply(self, queryset, fields, includes):
+        """Restrict columns to ``fields`` and load ``includes`` in bulk."""
+        columns = [self.attname(name) for name in fields]
+        for name in includes:
+            include = self.includes[name]
+            related = include.resource(self.request)
+            if include.many:
+                queryset = queryset.prefetch_related(
+                    Prefetch(name, queryset=self.include_queryset(name, include))
+                )
+                continue
+            queryset = queryset.select_related(name)
+            field = self.model._meta.get_field(name)
+            if field.concrete:
+                columns.append(field.attname)
+            columns += [f'{name}__{related.attname(f)}' for f in related.resolve_fields(None)]
+        return queryset.only(*columns)
+
+    def serialize(self, obj, fields, includes=()):
+        data = {name: getattr(obj, self.attname(name)) for name in fields}
+        for name in includes:
+            data[name] = self.serialize_include(obj, name, self.includes[name])
+        return data
+
+    def serialize_include(self, obj, name, include):
+        related = include.resource(self.request)
+        related_fields = related.resolve_fields(None)
+        if include.many:
+            return [related.serialize(item, related_fields) for item in getattr(obj, name).all()]
+        try:
+            value = getattr(obj, name)
+        except self.model._meta.get_field(name).related_model.DoesNotExist:
+            return None
+        return related.serialize(value, related_fields) if value is not None else None
+
+    def filter_queryset(self, queryset):
+        for param, lookup in self.filters.items():
+            if param in self.request.GET:
+                ids = parse_id_list(parse_list_param(self.request, param), param)
+                queryset = queryset.filter(**{f'{lookup}__in': ids})
+        return queryset
+
+    # Writing
+
+    def create(self, payload):
+        raise ApiError("This resource cannot be created through the API.", status=405)
+
+    def update(self, obj, payload):
+        raise ApiError("This resource cannot be changed through the API.", status=405)
+
+    def delete(self, obj):
+        raise ApiError("This resource cannot be deleted through the API.", status=405)
+
+    def save_form(self, payload, fields, instance=None):
+        """Validate ``payload`` with a ModelForm over ``fields`` and save it.
+
+        For updates, omitted fields keep their current values.
+        """
+        unknown = sorted(set(payload) - set(fields))
+        if unknown:
+            raise ApiError(f"Field(s) not writable: {', '.join(unknown)}.")
+        form_class = modelform_factory(self.model, form=self.model_form, fields=fields)
+        data = model_to_dict(instance, fields=fields) if instance is not None else {}
+        data.update(payload)
+        form = form_class(data=data, instance=instance)
+        if not form.is_valid():
+            raise ApiError("Validation failed.", errors=form.errors.get_json_data())
+        return form
+
+    def commit_form(self, form):
+        try:
+            return form.save()
+        except IntegrityError:
+            raise ApiError("This change conflicts with an existing object.", status=409)
+
+    def require_course_owner(self, instructor_id):
+        if not is_course_owner(self.user, instructor_id):
+            raise ApiError("Only the course instructor can change this.", status=403)
+
+
+class UserResource(Resource):
+    model = User
+    fields = ('id', 'username', 'first_name', 'last_name')
+
+
+class CourseResource(Resource):
+    model = Course
+    fields = ('id', 'title', 'description', 'instructor', 'created_at', 'updated_at')
+    includes = {
+        'instructor': Include(UserResource),
+        'lessons': Include('LessonResource', many=True),
+    }
+    filters = {'instructor': 'instructor_id'}
+    form_fields = ('title', 'description')
+
+    def create(self, payload):
+        if not (self.user.role == INSTRUCTOR_ROLE or self.user.is_superuser):
+            raise ApiError("Only instructors can create courses.", status=403)
+        form = self.save_form(payload, self.form_fields)
+        form.instance.instructor = self.user
+        return self.commit_form(form)
+
+    def update(self, obj, payload):
+        self.require_course_owner(obj.instructor_id)
+        return self.commit_form(self.save_form(payload, self.form_fields, instance=obj))
+
+    def delete(self, obj):
+        self.require_course_owner(obj.instructor_id)
+        # Every lesson, quiz, question and answer deleted with the course bumps the course version.
+        with deferred_invalidation():
+            obj.delete()
+
+
+class LessonResource(Resource):
+    model = Lesson
+    fields = ('id', 'course', 'title', 'content', 'order', 'created_at', 'updated_at')
+    # Lesson bodies can be large; ask for them with ?fields=content.
+    default_fields = ('id', 'course', 'title', 'order', 'created_at', 'updated_at')
+    includes = {
+        'course': Include(CourseResource),
+        'quiz': Include('QuizResource'),
+    }
+    filters = {'course': 'course_id'}
+    # ``order`` is a gapped rank maintained by LessonService; new lessons are
+    # appended and moved through the course's lessons/order/ endpoint.
+    form_fields = ('course', 'title', 'content')
+    update_fields = ('title', 'content')
+    model_form = LessonContentForm
+
+    # ``content`` is not a column: it is read through the ``body`` relation
+    # and only loaded when requested.
+
+    def attname(self, name):
+        if name == 'content':
+            return 'body__data'
+        return super().attname(name)
+
+    def apply(self, queryset, fields, includes):
+        if 'content' in fields:
+            queryset = queryset.select_related('body')
+        return super().apply(queryset, fields, includes)
+
+    def serialize(self, obj, fields, includes=()):
+        data = super().serialize(obj, [name for name in fields if name != 'content'], includes)
+        if 'content' in fields:
+            data['content'] = obj.content
+        return data
+
+    def save_form(self, payload, fields, instance=None):
+        if instance is not None and 'content' in fields and 'content' not in payload:
+            payload = {**payload, 'content': instance.content}
+        return super().save_form(payload, fields, instance=instance)
+
+    def create(self, payload):
+        form = self.save_form(payload, self.form_fields)
+        self.require_course_owner(form.cleaned_data['course'].instructor_id)
+        form.instance.order = LessonService.next_lesson_order(form.cleaned_data['course'].pk)
+        return self.commit_form(form)
+
+    def update(self, obj, payload):
+        self.require_course_owner(obj.course.instructor_id)
+        return self.commit_form(self.save_form(payload, self.update_fields, instance=obj))
+
+    def delete(self, obj):
+        self.require_course_owner(obj.course.instructor_id)
+        obj.delete()
+
+
+class AnswerResource(Resource):
+    model = Answer
+    fields = ('id', 'text', 'is_correct')
+    default_fields = ('id', 'text')
+
+
+class QuestionResource(Resource):
+    model = Question
+    fields = ('id', 'text')
+
+
+class QuizResource(Resource):
+    model = Quiz
+    fields = ('id', 'lesson', 'title', 'question_count', 'time_limit_minutes', 'updated_at')
+    includes = {
+        'lesson': Include(LessonResource),
+        'questions': Include(QuestionResource, many=True),
+    }
+    filters = {'lesson': 'lesson_id', 'course': 'lesson__course_id'}
+    form_fields = ('lesson', 'title', 'time_limit_minutes')
+    update_fields = ('title', 'time_limit_minutes')
+
+    def get_queryset(self):
+        return Quiz.objects.annotate(course_instructor_id=F('lesson__course__instructor_id'))
+
+    def include_queryset(self, name, include):
+        queryset = super().include_queryset(name, include)
+        if name == 'questions':
+            queryset = queryset.prefetch_related(
+                Prefetch('answers', queryset=Answer.objects.only('id', 'question_id', 'text', 'is_correct'))
+            )
+        return queryset
+
+    def serialize_include(self, obj, name, include):
+        if name != 'questions':
+            return super().serialize_include(obj, name, include)
+        # Correct answers are only revealed to the course instructor.
+        answer_resource = AnswerResource(self.request)
+        answer_fields = answer_resource.resolve_fields(
+            AnswerResource.fields if is_course_owner(self.user, obj.course_instructor_id) else None
+        )
+        return [
+            {
+                'id': question.pk,
+                'text': question.text,
+                'answers': [answer_resource.serialize(answer, answer_fields) for answer in question.answers.all()],
+            }
+            for question in obj.questions.all()
+        ]
+
+    def create(self, payload):
+        form = self.save_form(payload, self.form_fields)
+        self.require_course_owner(form.cleaned_data['lesson'].course.instructor_id)
+        return self.commit_form(form)
+
+    def update(self, obj, payload):
+        self.require_course_owner(obj.course_instructor_id)
+        return self.commit_form(self.save_form(payload, self.update_fields, instance=obj))
+
+    def delete(self, obj):
+        self.require_course_owner(obj.course_instructor_id)
+        obj.delete()
+
+
+def scope_to_user(queryset, user, student_lookup, instructor_lookup):
+    """Students see their own rows, instructors rows in their courses."""
+    if user.is_superuser:
+        return queryset
+    if user.role == STUDENT_ROLE:
+        return queryset.filter(**{student_lookup: user})
+    return queryset.filter(**{instructor_lookup: user})
+
+
+class LessonProgressResource(Resource):
+    model = LessonProgress
+    fields = ('id', 'enrollment', 'lesson', 'completed', 'date_completed')
+    includes = {'lesson': Include(LessonResource)}
+    filters = {'lesson': 'lesson_id', 'enrollment': 'enrollment_id'}
+
+    def get_queryset(self):
+        return scope_to_user(
+            LessonProgress.objects.all(), self.user, 'enrollment__student', 'enrollment__course__instructor'
+        )
+
+    def create(self, payload):
+        """Mark a lesson completed: ``{"lesson": <id>}``."""
+        if self.user.role != STUDENT_ROLE:
+            raise ApiError("Only students can complete lessons.", status=403)
+        lesson_id = parse_id(payload.get('lesson'), 'lesson')
+        lesson = Lesson.objects.select_related('course').filter(pk=lesson_id).first()
+        if lesson is None:
+            raise ApiError("Lesson not found.", status=404)
+        try:
+            progress, _ = LessonService.mark_lesson_completed(self.user, lesson)
+        except Http404:
+            raise ApiError("You must be enrolled in the course to complete its lessons.", status=403)
+        return progress
+
+
+class EnrollmentResource(Resource):
+    model = Enrollment
+    fields = ('id', 'student', 'course', 'date_enrolled')
+    includes = {
+        'course': Include(CourseResource),
+        'student': Include(UserResource),
+        'lesson_progress': Include(LessonProgressResource, many=True),
+    }
+    filters = {'course': 'course_id'}
+
+    def get_queryset(self):
+        return scope_to_user(Enrollment.objects.all(), self.user, 'student', 'course__instructor')
+
+    def create(self, payload):
+        """Enroll the requesting student: ``{"course": <id>}``."""
+        if self.user.role != STUDENT_ROLE:
+            raise ApiError("Only students can enroll in courses.", status=403)
+        course_id = parse_id(payload.get('course'), 'course')
+        course = Course.objects.filter(pk=course_id).first()
+        if course is None:
+            raise ApiError("Course not found.", status=404)
+        enrollment, _ = EnrollmentService.enroll_student(self.user, course)
+        return enrollment
+
+
+class QuizAttemptResource(Resource):
+    model = QuizAttempt
+    fields = ('id', 'student', 'quiz', 'score', 'total_questions', 'date_attempted')
+    includes = {'quiz': Include(QuizResource), 'student': Include(UserResource)}
+    filters = {'quiz': 'quiz_id'}
+
+    def get_queryset(self):
+        return scope_to_user(QuizAttempt.objects.all(), self.user, 'student', 'quiz__lesson__course__instructor')
+
+    def create(self, payload):
+        """Submit a quiz: ``{"quiz": <id>, "answers": {"<question id>": <answer id>}}``.
+
+        Timed quizzes are graded through the student's exam session, as on
+        the quiz page: without an open session the post answers 409, and
+        after the deadline the attempt is graded on the answers saved in time.
+        Submissions share the quiz page's per-quiz rate limit, answered with
+        429 and ``Retry-After``. A client that sends an ``Idempotency-Key``
+        header may safely retry: a key seen before returns the attempt it
+        recorded without grading again, or 409 while that submission is
+        still being graded.
+        """
+        if self.user.role != STUDENT_ROLE:
+            raise ApiError("Only students can take quizzes.", status=403)
+        quiz_id = parse_id(payload.get('quiz'), 'quiz')
+        quiz = Quiz.objects.select_related('lesson').filter(pk=quiz_id).first()
+        if quiz is None:
+            raise ApiError("Quiz not found.", status=404)
+        if not Enrollment.objects.filter(student=self.user, course_id=quiz.lesson.course_id).exists():
+            raise ApiError("You must be enrolled in the course to take this quiz.", status=403)
+
+        answers = payload.get('answers')
+        if not isinstance(answers, dict):
+            raise ApiError("'answers' must map question ids to answer ids.")
+        try:
+            answers = {int(question_id): int(answer_id) for question_id, answer_id in answers.items()}
+        except (TypeError, ValueError):
+            raise ApiError("'answers' must map question ids to answer ids.")
+        key = self.request.headers.get('Idempotency-Key', '').strip()
+        if len(key) > API_MAX_IDEMPOTENCY_KEY:
+            raise ApiError(f"'Idempotency-Key' may be at most {API_MAX_IDEMPOTENCY_KEY} characters.")
+
+        scope = f'quiz:{self.user.pk}:{quiz.pk}'
+        if key:
+            attempt = self.recorded_attempt(scope, key)
+            if attempt is not None:
+                return attempt
+
+        wait = quiz_submission_bucket().consume(f'{self.user.pk}:{quiz.pk}')
+        if wait:
+            raise ApiError(
+                f"You are submitting this quiz too often. Try again in {ceil(wait)} seconds.",
+                status=429, headers={'Retry-After': str(ceil(wait))},
+            )
+
+        if key and not claim_submission(scope, key):
+            attempt = self.recorded_attempt(scope, key)
+            if attempt is None:
+                raise ApiError("This submission could not be recorded; retry it.", status=409)
+            return attempt
+
+        try:
+            attempt = self.grade(quiz, answers)
+        except Exception:
+            if key:
+                release_submission(scope, key)
+            raise
+        if key:
+            complete_submission(scope, key, attempt.pk)
+        return attempt
+
+    def grade(self, quiz, answers):
+        session = ExamService.get_open_session(self.user, quiz)
+        if session is not None:
+            return ExamService.submit(session, answers)
+        if quiz.is_timed:
+            raise ApiError("This exam has not been started or was already submitted.", status=409)
+        answers_data = {f'question_{question_id}': answer_id for question_id, answer_id in answers.items()}
+        score, total_questions = QuizService.calculate_quiz_score(quiz, answers_data)
+        return QuizService.record_quiz_attempt(self.user, quiz, score, total_questions)
+
+    def recorded_attempt(self, scope, key):
+        """The attempt recorded under idempotency ``key``, or None if the key is new."""
+        result = get_submission(scope, key)
+        if result is None:
+            return None
+        if result == SUBMISSION_PENDING:
+            raise ApiError("This submission is still being graded.", status=409)
+        return self.get_queryset().get(pk=result)
+
+
+class ApiView(View):
+    """Base view: JSON errors instead of redirects, JSON request bodies."""
+
+    resource_class = None
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return ApiError("Authentication required.", status=401).as_response()
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except ApiError as error:
+            return error.as_response()
+
+    def http_method_not_allowed(self, request, *args, **kwargs):
+        raise ApiError(f"Method {request.method} not allowed.", status=405)
+
+    def get_resource(self):
+        return self.resource_class(self.request)
+
+    def get_payload(self):
+        try:
+            payload = json.loads(self.request.body or b'{}')
+        except (ValueError, UnicodeDecodeError):
+            raise ApiError("Request body must be valid JSON.")
+        if not isinstance(payload, dict):
+            raise ApiError("Request body must be a JSON object.")
+        return payload
+
+    def render_object(self, resource, obj, status=200):
+        return JsonResponse(resource.serialize(obj, resource.resolve_fields(None)), status=status)
+
+
+class ResourceListView(ApiView):
+    def get(self, request):
+        resource = self.get_resource()
+        fields = resource.resolve_fields(parse_list_param(request, 'fields'))
+        includes = resource.resolve_includes(parse_list_param(request, 'include'))
+        queryset = resource.filter_queryset(resource.apply(resource.get_queryset(), fields, includes))
+        queryset = queryset.order_by('pk')
+
+        if 'ids' in request.GET:
+            ids = parse_id_list(parse_list_param(request, 'ids'), 'ids')
+            objects = list(queryset.filter(pk__in=ids))
+            return JsonResponse({
+                'results': [resource.serialize(obj, fields, includes) for obj in objects],
+                'next': None,
+            })
+
+        try:
+            limit = min(int(request.GET.get('limit', API_DEFAULT_LIMIT)), API_MAX_LIMIT)
+        except ValueError:
+            raise ApiError("'limit' must be an integer.")
+        if limit < 1:
+            raise ApiError("'limit' must be positive.")
+        if request.GET.get('cursor'):
+            queryset = queryset.filter(pk__gt=decode_cursor(request.GET['cursor']))
+
+        objects = list(queryset[:limit + 1])
+        next_url = None
+        if len(objects) > limit:
+            objects = objects[:limit]
+            params = request.GET.copy()
+            params['cursor'] = encode_cursor(objects[-1].pk)
+            next_url = f'{request.path}?{params.urlencode()}'
+        return JsonResponse({
+            'results': [resource.serialize(obj, fields, includes) for obj in objects],
+            'next': next_url,
+        })
+
+    def post(self, request):
+        resource = self.get_resource()
+        obj = resource.create(self.get_payload())
+        return self.render_object(resource, obj, status=201)
+
+
+class ResourceDetailView(ApiView):
+    def get_object(self, resource, fields=None, includes=()):
+        queryset = resource.get_queryset()
+        if fields is not None:
+            queryset = resource.apply(queryset, fields, includes)
+        obj = queryset.filter(pk=self.kwargs['pk']).first()
+        if obj is None:
+            raise ApiError("Not found.", status=404)
+        return obj
+
+    def get(self, request, pk):
+        resource = self.get_resource()
+        fields = resource.resolve_fields(parse_list_param(request, 'fields'))
+        includes = resource.resolve_includes(parse_list_param(request, 'include'))
+        obj = self.get_object(resource, fields, includes)
+        return JsonResponse(resource.serialize(obj, fields, includes))
+
+    def patch(self, request, pk):
+        resource = self.get_resource()
+        obj = resource.update(self.get_object(resource), self.get_payload())
+        return self.render_object(resource, obj)
+
+    def delete(self, request, pk):
+        resource = self.get_resource()
+        resource.delete(self.get_object(resource))
+        return HttpResponse(status=204)
+
+
+class LessonProgressBatchView(ApiView):
+    """Batch access to the requesting student's lesson progress.
+
+    ``GET ?lesson_ids=1,2,3`` returns progress for each lesson.
+    ``POST {"completions": [{"lesson": 1, "completed_at": "<ISO 8601>"}, ...]}``
+    marks lessons completed (``completed_at`` is optional) and returns a
+    result per lesson, with a fixed number of queries for any batch size.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.user.is_authenticated and request.user.role != STUDENT_ROLE:
+            return ApiError("Only students have lesson progress.", status=403).as_response()
+        return super().dispatch(request, *args, **kwargs)
+
+    def get(self, request):
+        lesson_ids = parse_id_list(parse_list_param(request, 'lesson_ids'), 'lesson_ids')
+        if not lesson_ids:
+            raise ApiError("'lesson_ids' is required.")
+        progress = LessonService.get_lesson_progress(request.user, lesson_ids)
+        return JsonResponse({'results': {str(lesson_id): data for lesson_id, data in progress.items()}})
+
+    def post(self, request):
+        completions = self.get_payload().get('completions')
+        if not isinstance(completions, list) or not completions:
+            raise ApiError("'completions' must be a non-empty list.")
+        if len(completions) > API_MAX_BATCH:
+            raise ApiError(f"'completions' accepts at most {API_MAX_BATCH} items.")
+
+        parsed = []
+        for index, item in enumerate(completions):
+            if not isinstance(item, dict):
+                raise ApiError(f"completions[{index}] must be an object.")
+            lesson_id = parse_id(item.get('lesson'), f'completions[{index}].lesson')
+            completed_at = None
+            if item.get('completed_at') is not None:
+                try:
+                    completed_at = parse_datetime(str(item['completed_at']))
+                except ValueError:
+                    completed_at = None
+                if completed_at is None:
+                    raise ApiError(f"completions[{index}].completed_at must be an ISO 8601 datetime.")
+                if timezone.is_naive(completed_at):
+                    completed_at = timezone.make_aware(completed_at)
+            parsed.append((lesson_id, completed_at))
+
+        results = LessonService.mark_lessons_completed(request.user, parsed)
+        return JsonResponse({'results': results})
+
+
+class EnrollmentBulkView(ApiView):
+    """Bulk enrollment for registrars (superusers only).
+
+    ``POST {"enrollments": [{"username": "alice", "course": 1}, ...]}``
+    enrolls up to ``API_MAX_ROSTER`` student-course pairs and returns the
+    counts from ``EnrollmentService.bulk_enroll``. Larger rosters go through
+    the ``import_roster`` management command.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.user.is_authenticated and not request.user.is_superuser:
+            return ApiError("Only administrators can bulk enroll.", status=403).as_response()
+        return super().dispatch(request, *args, **kwargs)
+
+    def post(self, request):
+        enrollments = self.get_payload().get('enrollments')
+        if not isinstance(enrollments, list) or not enrollments:
+            raise ApiError("'enrollments' must be a non-empty list.")
+        if len(enrollments) > API_MAX_ROSTER:
+            raise ApiError(f"'enrollments' accepts at most {API_MAX_ROSTER} items.")
+
+        roster = []
+        for index, item in enumerate(enrollments):
+            if not isinstance(item, dict):
+                raise ApiError(f"enrollments[{index}] must be an object.")
+            username = item.get('username')
+            if not isinstance(username, str) or not username.strip():
+                raise ApiError(f"enrollments[{index}].username must be a non-empty string.")
+            roster.append((username.strip(), parse_id(item.get('course'), f'enrollments[{index}].course')))
+
+        return JsonResponse(EnrollmentService.bulk_enroll(roster))
+
+
+class LessonOrderView(ApiView):
+    """Syllabus order of one course.
+
+    ``GET`` returns the lesson ids in order. ``POST {"lesson": 5, "position": 2}``
+    moves one lesson, writing only that lesson; ``POST {"lessons": [3, 1, 2]}``
+    sets the whole order in one transaction. Both return the new order.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        self.course = Course.objects.filter(pk=kwargs['pk']).values('pk', 'instructor_id').first()
+        return super().dispatch(request, *args, **kwargs)
+
+    def get(self, request, pk):
+        if self.course is None:
+            raise ApiError("Not found.", status=404)
+        return self.render_order()
+
+    def post(self, request, pk):
+        if self.course is None:
+            raise ApiError("Not found.", status=404)
+        if not is_course_owner(request.user, self.course['instructor_id']):
+            raise ApiError("Only the course instructor can change this.", status=403)
+
+        payload = self.get_payload()
+        if 'lessons' in payload:
+            if not isinstance(payload['lessons'], list):
+                raise ApiError("'lessons' must be a list of lesson ids.")
+            lesson_ids = [parse_id(value, 'lessons') for value in payload['lessons']]
+            try:
+                LessonService.reorder_lessons(self.course['pk'], lesson_ids)
+            except ValueError as error:
+                raise ApiError(str(error))
+        else:
+            lesson_id = parse_id(payload.get('lesson'), 'lesson')
+            position = payload.get('position')
+            if isinstance(position, bool) or not isinstance(position, int) or position < 1:
+                raise ApiError("'position' must be a positive integer.")
+            lesson = Lesson.objects.filter(pk=lesson_id, course_id=self.course['pk']).first()
+            if lesson is None:
+                raise ApiError(f"Lesson {lesson_id} is not part of this course.")
+            LessonService.move_lesson(lesson, position)
+        return self.render_order()
+
+    def render_order(self):
+        lessons = Lesson.objects.filter(course_id=self.course['pk']).order_by('order')
+        return JsonResponse({'course': self.course['pk'], 'lessons': list(lessons.values_list('pk', flat=True))})
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class LmsAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'lms_app'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,126 @@
+"""Tag-versioned caching helpers for the LMS application.
+
+Cached values are stored under keys that embed the current version of
+every tag they depend on. Invalidating a tag bumps its version, so all
+keys built from the old version simply stop being read and expire on
+their own. Tags are plain strings such as ``'course:5'``; the tags of
+course content nodes are versioned as a tree in ``versioning.py``.
+"""
+
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+TAG_PREFIX = 'lms:tag:'
+
+_deferred = threading.local()
+
+
+def get_cache():
+    """Return the cache backend used for LMS page and lookup caching."""
+    return caches[getattr(settings, 'LMS_CACHE_ALIAS', 'default')]
+
+
+def cache_is_shared():
+    """Whether the LMS cache is seen by every worker process.
+
+    False for the process-local and dummy backends, which cannot hold state
+    that a request served by another worker has to read.
+    """
+    return not isinstance(get_cache(), (LocMemCache, DummyCache))
+
+
+def _new_version():
+    # Tag keys share the cache with the values they version and can be
+    # evicted, so a tag is (re)started at the current time rather than at a
+    # small constant: a version it held before the eviction never comes back
+    # and revives values cached under it.
+    return time.time_ns()
+
+
+def get_tag_versions(tags):
+    """Return the current version of each tag, initialising unknown tags."""
+    cache = get_cache()
+    keys = [TAG_PREFIX + tag for tag in tags]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            version = _new_version()
+            cache.add(key, version, timeout=None)
+            versions[key] = cache.get(key, version)
+    return tuple(versions[key] for key in keys)
+
+
+def invalidate_tags(*tags):
+    """Invalidate every cached value that depends on any of ``tags``.
+
+    Inside a transaction the tags are bumped again on commit: a request
+    reading between the two bumps sees the data from before the commit and
+    may cache it under the first new version.
+    """
+    pending = getattr(_deferred, 'tags', None)
+    if pending is not None:
+        pending.update(tags)
+        return
+    _bump_tags(tags)
+    if tags and transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _bump_tags(tags))
+
+
+def _bump_tags(tags):
+    cache = get_cache()
+    for tag in tags:
+        key = TAG_PREFIX + tag
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), timeout=None)
+
+
+@contextmanager
+def deferred_invalidation():
+    """Collect the tags invalidated inside the block and bump each once when it ends.
+
+    For bulk changes that fire many signals, such as deleting a course with
+    its lessons and quizzes, where every node would otherwise bump the same
+    ancestors. Cached values read inside the block may be stale.
+    """
+    if getattr(_deferred, 'tags', None) is not None:
+        yield
+        return
+    _deferred.tags = set()
+    try:
+        yield
+    finally:
+        tags, _deferred.tags = _deferred.tags, None
+        invalidate_tags(*tags)
+
+
+def make_key(name, tags, *parts):
+    """Build a cache key for ``name`` from the tag versions and extra ``parts``."""
+    versions = get_tag_versions(tags)
+    digest = hashlib.md5(repr((tuple(tags), versions, parts)).encode()).hexdigest()
+    return f'lms:{name}:{digest}'
+
+
+def cached_lookup(name, tags, compute, timeout=None):
+    """Return ``compute()``, cached until one of ``tags`` is invalidated."""
+    cache = get_cache()
+    key = make_key(name, tags)
+    sentinel = object()
+    value = cache.get(key, sentinel)
+    if value is sentinel:
+        value = compute()
+        cache.set(key, value, timeout=timeout if timeout is not None else get_page_cache_timeout())
+    return value
+
+
+def get_page_cache_timeout():
+    return getattr(settings, 'LMS_PAGE_CACHE_TIMEOUT', 300)
@@ -9,6 +9,19 @@ USER_ROLES = [
     (INSTRUCTOR_ROLE, 'Instructor'),
 ]
 
+# Enrollment progress buckets, precomputed on Enrollment.progress_bucket
+PROGRESS_NOT_STARTED = 0
+PROGRESS_UNDER_HALF = 1
+PROGRESS_OVER_HALF = 2
+PROGRESS_COMPLETED = 3
+
+PROGRESS_BUCKETS = [
+    (PROGRESS_NOT_STARTED, 'Not started'),
+    (PROGRESS_UNDER_HALF, 'Under halfway'),
+    (PROGRESS_OVER_HALF, 'Halfway or more'),
+    (PROGRESS_COMPLETED, 'Completed'),
+]
+
 # Messages
 MESSAGES = {
     'ENROLLMENT_SUCCESS': 'Successfully enrolled in {course_title}!',
@@ -44,4 +57,28 @@ URLS = {
     'TAKE_QUIZ': 'take_quiz',
     'LOGIN': 'login',
     'PROFILE': 'profile',
-}
\ No newline at end of file
+}
+
+# Background report job statuses
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_SUCCEEDED = 'succeeded'
+JOB_FAILED = 'failed'
+
+JOB_STATUSES = [
+    (JOB_PENDING, 'Pending'),
+    (JOB_RUNNING, 'Running'),
+    (JOB_SUCCEEDED, 'Succeeded'),
+    (JOB_FAILED, 'Failed'),
+]
+
+# Approximate platform statistics kept in StatsSketch rows
+SKETCH_ACTIVE_STUDENTS = 'active_students'
+SKETCH_QUIZ_SCORES = 'quiz_scores'
+SKETCH_COMPLETION_HOURS = 'completion_hours'
+
+SKETCH_METRICS = [
+    (SKETCH_ACTIVE_STUDENTS, 'Active students'),
+    (SKETCH_QUIZ_SCORES, 'Quiz score percentages'),
+    (SKETCH_COMPLETION_HOURS, 'Hours from enrollment to course completion'),
+]
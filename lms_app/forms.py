@@ -1,7 +1,9 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
-from .models import User, Quiz, Question, Answer
-from .constants import USER_ROLES, STUDENT_ROLE
+from .models import User, Lesson, Quiz, Question, Answer
+from .constants import USER_ROLES, STUDENT_ROLE, PROGRESS_BUCKETS
+from .services import QuizService
+from .throttling import new_submission_token
 
 
 class UserRegisterForm(UserCreationForm):
@@ -22,12 +24,41 @@ class UserRegisterForm(UserCreationForm):
         fields = UserCreationForm.Meta.fields + ('role',)
 
 
+class LessonContentForm(forms.ModelForm):
+    """Edits ``Lesson.content``, which is stored outside the lesson row."""
+
+    content = forms.CharField(widget=forms.Textarea)
+
+    class Meta:
+        model = Lesson
+        fields = ['title', 'content']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk and 'content' not in self.initial:
+            self.initial['content'] = self.instance.content
+
+    def _post_clean(self):
+        super()._post_clean()
+        if 'content' in self.cleaned_data:
+            self.instance.content = self.cleaned_data['content']
+
+
+class LessonForm(LessonContentForm):
+    position = forms.IntegerField(
+        min_value=1,
+        required=False,
+        help_text='1 is the first lesson. Leave blank to add the lesson at the end.',
+    )
+
+
 class QuizForm(forms.ModelForm):
     class Meta:
         model = Quiz
-        fields = ['title']
+        fields = ['title', 'time_limit_minutes']
         widgets = {
-            'title': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Enter quiz title'})
+            'title': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Enter quiz title'}),
+            'time_limit_minutes': forms.NumberInput(attrs={'class': 'form-control', 'min': 1}),
         }
 
 
@@ -58,24 +89,69 @@ class AnswerForm(forms.ModelForm):
 
 
 class TakeQuizForm(forms.Form):
+    # Identifies one rendering of the form, so a resubmission is recognised.
+    submission_token = forms.CharField(widget=forms.HiddenInput, max_length=64, required=False)
+
     def __init__(self, *args, **kwargs):
         quiz = kwargs.pop('quiz')
+        # Autosaved answers: pre-selected on a fresh form, and not required in a post.
+        saved_answers = kwargs.pop('saved_answers', None) or {}
         super().__init__(*args, **kwargs)
         self.quiz = quiz
-        for i, question in enumerate(quiz.questions.all()):
-            choices = [(str(answer.pk), answer.text) for answer in question.answers.all()]
-            self.fields[f'question_{question.pk}'] = forms.ChoiceField(
+        self.saved_answers = saved_answers
+        # Built from the cached snapshot, so rendering the form runs no queries.
+        self.snapshot = QuizService.get_quiz_snapshot(quiz.pk)
+        if not self.is_bound:
+            self.initial['submission_token'] = new_submission_token()
+        for question in self.snapshot['questions']:
+            field_name = f"question_{question['id']}"
+            choices = [(str(answer_id), text) for answer_id, text in question['answers']]
+            self.fields[field_name] = forms.ChoiceField(
                 choices=choices,
                 widget=forms.RadioSelect(attrs={'class': 'form-check-input'}),
-                label=question.text,
-                required=True
+                label=question['text'],
+                required=question['id'] not in saved_answers
             )
+            if not self.is_bound and question['id'] in saved_answers:
+                self.initial.setdefault(field_name, str(saved_answers[question['id']]))
     
     def clean(self):
         cleaned_data = super().clean()
         # Ensure all questions are answered
-        for question in self.quiz.questions.all():
-            field_name = f'question_{question.pk}'
-            if not cleaned_data.get(field_name):
-                raise forms.ValidationError(f"Please answer question: {question.text[:50]}...")
+        for question in self.snapshot['questions']:
+            field_name = f"question_{question['id']}"
+            if not cleaned_data.get(field_name) and question['id'] not in self.saved_answers:
+                raise forms.ValidationError(f"Please answer question: {question['text'][:50]}...")
         return cleaned_data
+
+    def answers(self):
+        """Selected answers as ``{question_id: answer_id}``, saved ones filling the gaps."""
+        answers = dict(self.saved_answers)
+        answers.update(
+            (question['id'], int(self.cleaned_data[f"question_{question['id']}"]))
+            for question in self.snapshot['questions']
+            if self.cleaned_data.get(f"question_{question['id']}")
+        )
+        return answers
+
+
+class RosterFilterForm(forms.Form):
+    progress = forms.TypedChoiceField(
+        choices=[('', 'Any progress')] + PROGRESS_BUCKETS,
+        coerce=int,
+        empty_value=None,
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select form-select-sm'}),
+    )
+    active_within = forms.IntegerField(
+        min_value=1,
+        required=False,
+        label='Active in last (days)',
+        widget=forms.NumberInput(attrs={'class': 'form-control form-control-sm'}),
+    )
+    inactive_for = forms.IntegerField(
+        min_value=1,
+        required=False,
+        label='Inactive for (days)',
+        widget=forms.NumberInput(attrs={'class': 'form-control form-control-sm'}),
+    )
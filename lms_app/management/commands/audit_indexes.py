@@ -0,0 +1,211 @@
+import json
+import re
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Avg
+from django.db.models.constants import LOOKUP_SEP
+from django.test.utils import CaptureQueriesContext
+
+from lms_app.models import Course, Enrollment, QuizAttempt
+from lms_app.services import AttemptHistoryService, EnrollmentService
+from lms_app.utils import ReportingUtils
+
+COLUMN_PREDICATE = r'"{table}"\."(\w+)"\s*(?:=|IN\b|IS\b)'
+ORDER_COLUMN = r'"{table}"\."(\w+)"(?:\s+(ASC|DESC))?'
+BOOLEAN_PREDICATE = r'(?:^|\(|\bAND\s|\bOR\s)\s*"{table}"\."(\w+)"\s*(?=AND\b|OR\b|\)|$)'
+
+
+def capture_workload():
+    """Run the application's hot queries and return their SQL."""
+    enrollment = Enrollment.objects.select_related('student', 'course').order_by('pk').first()
+    if enrollment is None:
+        raise CommandError("No enrollments found; run generate_benchmark_data first.")
+    student, course = enrollment.student, enrollment.course
+    attempt = QuizAttempt.objects.filter(student=student).order_by('pk').first()
+
+    with CaptureQueriesContext(connection) as context:
+        ReportingUtils.get_student_dashboard_data(student)
+        ReportingUtils.get_courses_analytics(Course.objects.order_by('pk').values_list('pk', flat=True)[:500])
+        EnrollmentService.get_student_progress(enrollment)
+        QuizAttempt.objects.filter(quiz__lesson__course=course).aggregate(avg_score=Avg('score'))
+        if attempt is not None:
+            AttemptHistoryService.get_summary(student, attempt.quiz_id)
+        AttemptHistoryService.get_best_and_latest(QuizAttempt.objects.filter(student=student, quiz__lesson__course=course))
+
+    workload = []
+    for query in context.captured_queries:
+        if query['sql'] not in workload:
+            workload.append(query['sql'])
+    return workload
+
+
+def declared_indexes():
+    """Return ``(table, columns, condition)`` for every index declared on LMS models."""
+    declared = set()
+    for model in apps.get_app_config('lms_app').get_models():
+        for index in model._meta.indexes:
+            columns = []
+            for field_name in index.fields:
+                descending = field_name.startswith('-')
+                column = model._meta.get_field(field_name.lstrip('-')).column
+                columns.append(f'-{column}' if descending else column)
+            condition = ()
+            if index.condition is not None:
+                # Proposals only use bare boolean conditions, so other lookups
+                # (e.g. ``submitted_at__isnull``) are left out of the comparison.
+                condition = tuple(
+                    model._meta.get_field(lookup).column
+                    for lookup, value in index.condition.children
+                    if value is True and LOOKUP_SEP not in lookup
+                )
+            declared.add((model._meta.db_table, tuple(columns), condition))
+    return declared
+
+
+def explain(sql):
+    """Return the query plan for ``sql`` as a list of strings."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+        cursor.execute(f'EXPLAIN {sql}')
+        return [row[0] for row in cursor.fetchall()]
+
+
+def time_query(sql, repeat):
+    """Return the best wall-clock time of ``repeat`` executions of ``sql``."""
+    best = None
+    with connection.cursor() as cursor:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            cursor.execute(sql)
+            cursor.fetchall()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def table_accesses(plan):
+    """Yield ``(table, indexed_columns)`` for each table read in ``plan``.
+
+    ``indexed_columns`` is empty for full scans. Only SQLite plans report
+    the columns an index search used; PostgreSQL sequential scans are
+    reported as full scans.
+    """
+    for line in plan:
+        if 'USING INTEGER PRIMARY KEY' in line:
+            continue
+        sqlite_access = re.match(r'\s*(SCAN|SEARCH) (lms_\w+)(?: USING (?:COVERING )?INDEX \w+ \((.*)\))?', line)
+        if sqlite_access:
+            indexed = re.findall(r'(\w+)[=<>]', sqlite_access.group(3) or '')
+            yield sqlite_access.group(2), indexed
+            continue
+        postgres_scan = re.search(r'Seq Scan on (\w+)', line)
+        if postgres_scan:
+            yield postgres_scan.group(1), []
+
+
+def uses_temp_sort(plan):
+    return any('TEMP B-TREE FOR ORDER BY' in line or line.strip().startswith('Sort ') for line in plan)
+
+
+def top_level_clauses(sql):
+    """Return the outermost WHERE and ORDER BY clauses of ``sql``."""
+    clauses = {}
+    keywords = (' WHERE ', ' GROUP BY ', ' HAVING ', ' ORDER BY ', ' LIMIT ')
+    depth = 0
+    current = None
+    start = 0
+    for position, char in enumerate(sql):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif depth == 0 and char == ' ':
+            keyword = next((k for k in keywords if sql.startswith(k, position)), None)
+            if keyword:
+                if current:
+                    clauses[current] = sql[start:position]
+                current, start = keyword.strip(), position + len(keyword)
+    if current:
+        clauses[current] = sql[start:]
+    return clauses.get('WHERE', ''), clauses.get('ORDER BY', '')
+
+
+def propose_index(sql, table, indexed_columns, include_order=False):
+    """Propose ``(columns, condition)`` for ``table`` from the predicates in ``sql``.
+
+    Returns None when the index already in use covers every predicate.
+    Bare boolean predicates become a partial index condition.
+    """
+    where, order_by = top_level_clauses(sql)
+
+    columns = list(indexed_columns)
+    for column in re.findall(COLUMN_PREDICATE.format(table=table), where):
+        if column not in columns:
+            columns.append(column)
+    condition = [
+        column for column in re.findall(BOOLEAN_PREDICATE.format(table=table), where)
+        if column not in columns
+    ]
+    if include_order:
+        for column, direction in re.findall(ORDER_COLUMN.format(table=table), order_by):
+            if column not in columns:
+                columns.append(f'-{column}' if direction == 'DESC' else column)
+
+    if not columns or (columns == list(indexed_columns) and not condition):
+        return None
+    return tuple(columns), tuple(condition)
+
+
+class Command(BaseCommand):
+    help = "Replay a query workload, explain each query and propose missing indexes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workload', help='Replay SQL statements from this JSON file.')
+        parser.add_argument('--capture', help='Write the captured workload to this JSON file.')
+        parser.add_argument('--repeat', type=int, default=5, help='Timing runs per query (default: 5).')
+
+    def handle(self, *args, **options):
+        if options['workload']:
+            with open(options['workload']) as workload_file:
+                workload = json.load(workload_file)
+        else:
+            workload = capture_workload()
+
+        if options['capture']:
+            with open(options['capture'], 'w') as capture_file:
+                json.dump(workload, capture_file, indent=2)
+            self.stdout.write(f"Captured {len(workload)} queries to {options['capture']}.")
+
+        declared = declared_indexes()
+        proposals = {}
+        total_time = 0
+        for number, sql in enumerate(workload, start=1):
+            plan = explain(sql)
+            elapsed = time_query(sql, options['repeat'])
+            total_time += elapsed
+
+            self.stdout.write(f"\n[{number}] {elapsed * 1000:.2f} ms  {sql[:160]}{'...' if len(sql) > 160 else ''}")
+            for line in plan:
+                self.stdout.write(f"    {line}")
+
+            sorts = uses_temp_sort(plan)
+            for table, indexed_columns in table_accesses(plan):
+                proposal = propose_index(sql, table, indexed_columns, include_order=sorts)
+                if proposal and (table, *proposal) not in declared:
+                    proposals.setdefault((table, *proposal), []).append(number)
+
+        self.stdout.write(f"\nWorkload: {len(workload)} queries, {total_time * 1000:.2f} ms total (best of {options['repeat']}).")
+        if not proposals:
+            self.stdout.write(self.style.SUCCESS("Every query is served by an index covering its predicates."))
+            return
+
+        self.stdout.write(self.style.WARNING("Proposed indexes:"))
+        for (table, columns, condition), queries in proposals.items():
+            query_list = ', '.join(str(number) for number in queries)
+            partial = f" WHERE {' AND '.join(condition)}" if condition else ''
+            self.stdout.write(f"  {table} ({', '.join(columns)}){partial}  -- queries {query_list}")
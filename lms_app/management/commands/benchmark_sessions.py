@@ -0,0 +1,133 @@
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from lms_app.constants import INSTRUCTOR_ROLE, STUDENT_ROLE
+from lms_app.models import Answer, Course, Enrollment, Lesson, LessonContent, Question, Quiz, User
+
+WRITE_PREFIXES = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay the lesson-completion and quiz-submission POST flows under each "
+        "session backend and report database writes per request. Everything runs "
+        "inside a transaction that is rolled back, against caches of its own."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--modes', nargs='+', choices=sorted(settings.LMS_SESSION_ENGINES),
+            default=sorted(settings.LMS_SESSION_ENGINES),
+            help='Session modes to compare (default: all).',
+        )
+        parser.add_argument(
+            '--iterations', type=int, default=20,
+            help='Number of completion + quiz submissions per mode.',
+        )
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        if iterations < 1:
+            raise CommandError("--iterations must be at least 1.")
+
+        self.stdout.write(
+            f"{'mode':<16}{'flow':<12}{'requests':>9}{'queries/req':>13}"
+            f"{'writes/req':>12}{'session q/req':>15}"
+        )
+        for mode in options['modes']:
+            engine = settings.LMS_SESSION_ENGINES[mode]
+            # The replay submits the quiz once per iteration, so the per-student rate limit is lifted.
+            # Each mode starts from empty caches, kept apart from the ones the site uses.
+            with tempfile.TemporaryDirectory(prefix='lms-benchmark-cache-') as cache_dir, override_settings(
+                SESSION_ENGINE=engine, ALLOWED_HOSTS=['*'], LMS_QUIZ_SUBMIT_BURST=iterations,
+                CACHES=self._caches(cache_dir),
+            ):
+                totals = self._run_mode(iterations)
+            for flow, stats in totals.items():
+                requests = stats['requests']
+                self.stdout.write(
+                    f"{mode:<16}{flow:<12}{requests:>9}"
+                    f"{stats['queries'] / requests:>13.2f}"
+                    f"{stats['writes'] / requests:>12.2f}"
+                    f"{stats['session'] / requests:>15.2f}"
+                )
+
+    def _caches(self, location):
+        """The site's cache aliases, moved under ``location``.
+
+        Process-local caches stay local-memory; the rest become file-based,
+        so code that checks for a shared cache takes the same path.
+        """
+        local = 'django.core.cache.backends.locmem.LocMemCache'
+        return {
+            alias: {
+                'BACKEND': local if options['BACKEND'] == local else 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': f'{location}/{alias}',
+            }
+            for alias, options in settings.CACHES.items()
+        }
+
+    def _run_mode(self, iterations):
+        totals = {
+            flow: {'requests': 0, 'queries': 0, 'writes': 0, 'session': 0}
+            for flow in ('completion', 'quiz')
+        }
+        with transaction.atomic():
+            student, lessons, quiz, answers = self._build_fixture(iterations)
+            client = Client()
+            client.force_login(student)
+
+            for lesson in lessons:
+                self._measure(
+                    client, totals['completion'],
+                    reverse('mark_lesson_completed', kwargs={'pk': lesson.pk}), {},
+                )
+                self._measure(
+                    client, totals['quiz'],
+                    reverse('take_quiz', kwargs={'pk': quiz.pk}), answers,
+                )
+            transaction.set_rollback(True)
+        return totals
+
+    def _measure(self, client, stats, url, data):
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.post(url, data)
+        if response.status_code != 302:
+            raise CommandError(f"POST {url} returned {response.status_code}.")
+        stats['requests'] += 1
+        stats['queries'] += len(ctx.captured_queries)
+        for query in ctx.captured_queries:
+            sql = query['sql'].lstrip().upper()
+            if sql.startswith(WRITE_PREFIXES):
+                stats['writes'] += 1
+            if 'DJANGO_SESSION' in sql:
+                stats['session'] += 1
+
+    def _build_fixture(self, lesson_count):
+        instructor = User.objects.create_user(
+            username='session_bench_instructor', password='unused', role=INSTRUCTOR_ROLE,
+        )
+        student = User.objects.create_user(
+            username='session_bench_student', password='unused', role=STUDENT_ROLE,
+        )
+        course = Course.objects.create(title='Session benchmark', description='', instructor=instructor)
+        body = LessonContent.store('')
+        lessons = Lesson.objects.bulk_create(
+            Lesson(course=course, title=f'Lesson {i}', body=body, order=i)
+            for i in range(1, lesson_count + 1)
+        )
+        quiz = Quiz.objects.create(lesson=lessons[0], title='Session benchmark quiz')
+        answers = {}
+        for i in range(3):
+            question = Question.objects.create(quiz=quiz, text=f'Question {i}')
+            answer = Answer.objects.create(question=question, text='Yes', is_correct=True)
+            Answer.objects.create(question=question, text='No', is_correct=False)
+            answers[f'question_{question.pk}'] = str(answer.pk)
+        Enrollment.objects.create(student=student, course=course)
+        return student, lessons, quiz, answers
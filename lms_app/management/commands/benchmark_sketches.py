@@ -0,0 +1,164 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from lms_app.constants import PROGRESS_COMPLETED
+from lms_app.models import Enrollment, LessonProgress, QuizAttempt
+from lms_app.services import SKETCH_QUANTILES, SketchService
+from lms_app.sketches import (
+    CHECKED_QUANTILES, HLL_ERROR_BOUND, KLL_RANK_ERROR_BOUND, HyperLogLog, KLLSketch, rank_error,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Check the platform statistics sketches against their error bounds: first on "
+        "synthetic data split over sharded, serialized and merged sketches, then on the "
+        "stored StatsSketch rows against exact queries over the last --days days. "
+        "Exits with an error if any estimate is out of bounds."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100, 10000, 200000],
+                            help='Numbers of values in the synthetic checks.')
+        parser.add_argument('--shards', type=int, default=8, help='Sketches each synthetic data set is split over.')
+        parser.add_argument('--days', type=int, default=30, help='Days of stored statistics to check.')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if min(options['sizes'] + [options['shards'], options['days']]) < 1:
+            raise CommandError("--sizes, --shards and --days must be at least 1.")
+        random.seed(options['seed'])
+        self.failures = []
+
+        self.stdout.write(f"{'synthetic check':<34}{'values':>9}{'error':>9}{'bound':>9}{'bytes':>9}")
+        for size in options['sizes']:
+            self._check_synthetic(size, options['shards'])
+
+        end = timezone.localdate()
+        start = end - timedelta(days=options['days'] - 1)
+        self.stdout.write(f"\n{'stored check':<34}{'exact':>12}{'estimate':>12}{'error':>9}{'exact ms':>10}{'sketch ms':>10}")
+        self._check_active_students(start, end)
+        self._check_quiz_scores(start, end)
+        self._check_completion_hours(start, end)
+
+        if self.failures:
+            raise CommandError("Out of bounds: " + '; '.join(self.failures))
+        self.stdout.write(self.style.SUCCESS("\nAll estimates are within their error bounds."))
+
+    def _check(self, label, error, bound):
+        if error > bound:
+            self.failures.append(f"{label} ({error:.2%} > {bound:.2%})")
+
+    def _check_synthetic(self, size, shards):
+        # Each distinct id is added twice, to different shards, as a student
+        # active in two courses would be.
+        hlls = [HyperLogLog() for _ in range(shards)]
+        for value in range(size):
+            hlls[value % shards].add(value)
+            hlls[(value + 1) % shards].add(value)
+        merged = HyperLogLog()
+        for hll in hlls:
+            merged.merge(HyperLogLog.from_bytes(hll.to_bytes()))
+        error = abs(merged.count() - size) / size
+        self._check(f"distinct count of {size}", error, HLL_ERROR_BOUND)
+        self.stdout.write(
+            f"{'distinct count':<34}{size:>9}{error:>9.2%}{HLL_ERROR_BOUND:>9.2%}{len(merged.to_bytes()):>9}"
+        )
+
+        for distribution, draw in (
+            ('uniform', lambda: random.uniform(0, 100)),
+            ('skewed', lambda: random.expovariate(1 / 48)),
+            ('few distinct', lambda: random.randint(0, 10) * 10),
+        ):
+            values = [draw() for _ in range(size)]
+            klls = [KLLSketch() for _ in range(shards)]
+            for index, value in enumerate(values):
+                klls[index % shards].add(value)
+            merged = KLLSketch()
+            for kll in klls:
+                merged.merge(KLLSketch.from_bytes(kll.to_bytes()))
+            values.sort()
+            error = max(rank_error(values, merged.quantile(q), q) for q in CHECKED_QUANTILES)
+            self._check(f"{distribution} quantiles of {size}", error, KLL_RANK_ERROR_BOUND)
+            self.stdout.write(
+                f"{'quantile rank, ' + distribution:<34}{size:>9}{error:>9.2%}"
+                f"{KLL_RANK_ERROR_BOUND:>9.2%}{len(merged.to_bytes()):>9}"
+            )
+
+    def _timed(self, func):
+        start = time.perf_counter()
+        result = func()
+        return result, (time.perf_counter() - start) * 1000
+
+    def _report(self, label, exact, estimate, error, exact_ms, sketch_ms):
+        self.stdout.write(f"{label:<34}{exact:>12}{estimate:>12}{error:>9.2%}{exact_ms:>10.1f}{sketch_ms:>10.1f}")
+
+    def _check_active_students(self, start, end):
+        def exact():
+            students = set(QuizAttempt.objects.filter(date_attempted__date__range=(start, end)).values_list(
+                'student_id', flat=True
+            ).distinct())
+            students.update(LessonProgress.objects.filter(
+                completed=True, date_completed__date__range=(start, end)
+            ).values_list('enrollment__student_id', flat=True).distinct())
+            return len(students)
+
+        exact_count, exact_ms = self._timed(exact)
+        estimate, sketch_ms = self._timed(lambda: SketchService.active_students(start, end))
+        error = abs(estimate - exact_count) / exact_count if exact_count else float(estimate > 0)
+        self._check("active students", error, HLL_ERROR_BOUND)
+        self._report("active students", exact_count, estimate, error, exact_ms, sketch_ms)
+
+    def _check_quantiles(self, label, exact_values, percentiles):
+        """Worst rank error of ``percentiles`` over ``exact_values``, checked against the bound."""
+        if not exact_values:
+            return 0.0
+        exact_values.sort()
+        error = max(
+            rank_error(exact_values, estimate, q)
+            for q, estimate in zip(SKETCH_QUANTILES, percentiles)
+        )
+        self._check(label, error, KLL_RANK_ERROR_BOUND)
+        return error
+
+    def _check_quiz_scores(self, start, end):
+        def exact():
+            scores = {}
+            attempts = QuizAttempt.objects.filter(date_attempted__date__range=(start, end)).values_list(
+                'quiz_id', 'score', Coalesce('total_questions', 'quiz__question_count'),
+            )
+            for quiz_id, score, total_questions in attempts.order_by().iterator():
+                if total_questions:
+                    scores.setdefault(quiz_id, []).append(score / total_questions * 100)
+            return scores
+
+        scores, exact_ms = self._timed(exact)
+        sketched, sketch_ms = self._timed(lambda: SketchService.quiz_score_percentiles(start, end))
+        worst = 0.0
+        for quiz_id, values in scores.items():
+            if quiz_id not in sketched:
+                self.failures.append(f"quiz {quiz_id} has no score sketch; run rebuild_sketches")
+                continue
+            worst = max(worst, self._check_quantiles(f"quiz {quiz_id} scores", values, sketched[quiz_id]['percentiles']))
+        attempts = sum(len(values) for values in scores.values())
+        self._report(f"score percentiles, {len(scores)} quizzes", attempts, sum(
+            stats['attempts'] for stats in sketched.values()
+        ), worst, exact_ms, sketch_ms)
+
+    def _check_completion_hours(self, start, end):
+        def exact():
+            finished = Enrollment.objects.filter(progress_bucket=PROGRESS_COMPLETED).annotate(
+                finished_at=Max('lesson_progress__date_completed', filter=Q(lesson_progress__completed=True)),
+            ).filter(finished_at__date__range=(start, end)).values_list('date_enrolled', 'finished_at')
+            return [max(0.0, (finished_at - enrolled_at).total_seconds() / 3600) for enrolled_at, finished_at in finished]
+
+        hours, exact_ms = self._timed(exact)
+        stats, sketch_ms = self._timed(lambda: SketchService.completion_hours_percentiles(start, end))
+        error = self._check_quantiles("completion hours", hours, stats['percentiles'])
+        self._report("completion hours", len(hours), stats['completions'], error, exact_ms, sketch_ms)
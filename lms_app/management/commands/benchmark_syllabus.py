@@ -0,0 +1,139 @@
+import random
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from lms_app.cache import invalidate_tags
+from lms_app.constants import INSTRUCTOR_ROLE, STUDENT_ROLE
+from lms_app.models import Course, Enrollment, Lesson, LessonContent, User
+
+WORDS = (
+    'lesson', 'function', 'variable', 'example', 'result', 'network', 'matrix', 'theorem',
+    'student', 'proof', 'value', 'system', 'model', 'data', 'query', 'index', 'graph',
+    'vector', 'method', 'class', 'object', 'error', 'signal', 'filter', 'memory',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Build a course with large lesson bodies inside a rolled-back transaction "
+        "and report latency and peak Python memory for the syllabus page, the "
+        "lesson listing with and without bodies, and the streamed lesson page "
+        "with cached and freshly rendered HTML."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lessons', type=int, default=50, help='Lessons in the benchmark course.')
+        parser.add_argument('--size', type=int, default=200, help='Lesson body size in KB.')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement; the fastest is reported.')
+
+    def handle(self, *args, **options):
+        if min(options['lessons'], options['size'], options['repeat']) < 1:
+            raise CommandError("--lessons, --size and --repeat must be at least 1.")
+
+        with override_settings(ALLOWED_HOSTS=['*']), transaction.atomic():
+            student, course, lessons = self._build_fixture(options['lessons'], options['size'] * 1024)
+            client = Client()
+            client.force_login(student)
+            course_url = reverse('course_detail', kwargs={'pk': course.pk})
+            lesson_url = reverse('lesson_detail', kwargs={'pk': lessons[0].pk})
+
+            def syllabus_page():
+                # Skip the page cache so every run renders from the database.
+                invalidate_tags(f'course:{course.pk}')
+                response = client.get(course_url)
+                if response.status_code != 200:
+                    raise CommandError(f"GET {course_url} returned {response.status_code}.")
+
+            def listing():
+                list(course.lessons.select_related('quiz'))
+
+            def listing_with_bodies():
+                for lesson in course.lessons.select_related('quiz', 'body'):
+                    lesson.content
+
+            def lesson_page_streamed():
+                for _ in self._get_streaming(client, lesson_url):
+                    pass
+
+            def lesson_page_buffered():
+                b''.join(self._get_streaming(client, lesson_url))
+
+            def lesson_page_uncached():
+                LessonContent.objects.filter(pk=lessons[0].body_id).update(html=None)
+                lesson_page_streamed()
+
+            self.stdout.write(f"{'measurement':<28}{'ms':>10}{'peak KB':>12}{'queries':>9}")
+            for label, func in (
+                ('syllabus page', syllabus_page),
+                ('lesson listing', listing),
+                ('listing with bodies', listing_with_bodies),
+                ('lesson page, streamed', lesson_page_streamed),
+                ('lesson page, buffered', lesson_page_buffered),
+                ('lesson page, re-rendered', lesson_page_uncached),
+            ):
+                seconds, peak, queries = self._measure(func, options['repeat'])
+                self.stdout.write(f"{label:<28}{seconds * 1000:>10.2f}{peak / 1024:>12.1f}{queries:>9}")
+
+            stored = LessonContent.objects.filter(lessons__course=course).distinct()
+            totals = stored.aggregate(size=Sum('size'))
+            compressed = sum(len(data) for data in stored.values_list('data', flat=True))
+            self.stdout.write(
+                f"\nStored {stored.count()} bodies: {totals['size'] / 1024:.0f} KB of text "
+                f"in {compressed / 1024:.0f} KB ({totals['size'] / max(compressed, 1):.1f}x)."
+            )
+            transaction.set_rollback(True)
+
+    def _build_fixture(self, lesson_count, body_size):
+        instructor = User.objects.create_user(
+            username='syllabus_bench_instructor', password='unused', role=INSTRUCTOR_ROLE,
+        )
+        student = User.objects.create_user(
+            username='syllabus_bench_student', password='unused', role=STUDENT_ROLE,
+        )
+        course = Course.objects.create(title='Syllabus benchmark', description='', instructor=instructor)
+        Enrollment.objects.create(student=student, course=course)
+        rng = random.Random(42)
+        lessons = []
+        for order in range(1, lesson_count + 1):
+            words = []
+            length = 0
+            while length < body_size:
+                word = rng.choice(WORDS)
+                words.append(word)
+                length += len(word) + 1
+            lesson = Lesson(course=course, title=f'Lesson {order}', order=order)
+            lesson.content = f"<p>{' '.join(words)}</p>"
+            lesson.save()
+            lessons.append(lesson)
+        return student, course, lessons
+
+    def _get_streaming(self, client, url):
+        response = client.get(url)
+        if response.status_code != 200 or not response.streaming:
+            raise CommandError(f"GET {url} did not return a streamed page.")
+        return response.streaming_content
+
+    def _measure(self, func, repeat):
+        func()  # Warm template and query caches.
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        with CaptureQueriesContext(connection) as ctx:
+            tracemalloc.start()
+            try:
+                func()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+        return best, peak, len(ctx.captured_queries)
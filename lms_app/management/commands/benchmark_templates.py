@@ -0,0 +1,145 @@
+import re
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.template import Engine, RequestContext
+from django.template.loader import get_template
+from django.test import RequestFactory
+
+from lms_app.constants import INSTRUCTOR_ROLE, STUDENT_ROLE
+from lms_app.models import Course, Lesson, Quiz, User
+
+# Page bodies rendered by the list views and the components they include
+# once per item.
+BENCHMARK_TEMPLATES = {
+    'course_list': ('lms_app/components/course_list_body.html', 'lms_app/components/course_card.html'),
+    'course_detail': ('lms_app/components/course_detail_body.html', 'lms_app/components/lesson_item.html'),
+}
+
+# Rewrites the optimized tags back to Django's stock equivalents so the
+# two variants can be compared on identical markup.
+STOCK_TAG_REWRITES = (
+    (re.compile(r"\{% pk_url ('[\w-]+') ([\w.]+) kwarg='(\w+)' %\}"), r"{% url \1 \3=\2 %}"),
+    (re.compile(r"\{% pk_url ('[\w-]+') ([\w.]+) %\}"), r"{% url \1 pk=\2 %}"),
+    (re.compile(r"\|excerpt:"), "|truncatechars:"),
+)
+
+LESSON_CONTENT = (
+    "This lesson walks through the material step by step, with worked examples "
+    "and a short summary at the end. "
+) * 20
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the course list and course detail bodies with 10/100/1,000 items "
+        "and report total and per-item render time for the optimized templates "
+        "and for the same markup using stock {% url %} and truncatechars. "
+        "No database access is needed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', nargs='+', type=int, default=[10, 100, 1000],
+            help='Number of items to render per page.',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Renders per measurement; the fastest is reported.',
+        )
+        parser.add_argument(
+            '--viewer', choices=('student', 'owner'), default='student',
+            help='Render as an enrolled student or as the owning instructor.',
+        )
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError("--repeat must be at least 1.")
+
+        instructor = User(pk=1, username='instructor', role=INSTRUCTOR_ROLE)
+        student = User(pk=2, username='student', role=STUDENT_ROLE)
+        viewer = instructor if options['viewer'] == 'owner' else student
+        request = RequestFactory().get('/')
+        request.user = viewer
+
+        variants = {
+            'optimized': self._build_engine(rewrite=False),
+            'stock tags': self._build_engine(rewrite=True),
+        }
+
+        self.stdout.write(
+            f"{'page':<15}{'items':>7}{'variant':>12}{'total ms':>11}{'us/item':>10}"
+        )
+        for page, (body_name, _) in BENCHMARK_TEMPLATES.items():
+            for size in options['sizes']:
+                context = self._page_context(page, size, instructor, viewer)
+                results = {}
+                for variant, engine in variants.items():
+                    template = engine.get_template(body_name)
+                    results[variant] = self._time_render(template, request, context, options['repeat'])
+                for variant, seconds in results.items():
+                    self.stdout.write(
+                        f"{page:<15}{size:>7}{variant:>12}{seconds * 1000:>11.2f}{seconds / size * 1e6:>10.1f}"
+                    )
+                speedup = results['stock tags'] / results['optimized']
+                self.stdout.write(f"{'':<15}{'':>7}{'speedup':>12}{speedup:>10.2f}x")
+
+    def _build_engine(self, rewrite):
+        """Load the benchmark templates into an isolated engine.
+
+        Both variants go through the cached loader, exactly as the project
+        engine does, so only the tags and filters differ.
+        """
+        project_engine = get_template(BENCHMARK_TEMPLATES['course_list'][0]).template.engine
+        root = Path(apps.get_app_config('lms_app').path) / 'templates'
+        sources = {}
+        for names in BENCHMARK_TEMPLATES.values():
+            for name in names:
+                source = (root / name).read_text()
+                if rewrite:
+                    for pattern, replacement in STOCK_TAG_REWRITES:
+                        source = pattern.sub(replacement, source)
+                sources[name] = source
+        return Engine(
+            loaders=[('django.template.loaders.cached.Loader', [
+                ('django.template.loaders.locmem.Loader', sources),
+            ])],
+            libraries={'lms_app_extras': 'lms_app.templatetags.lms_app_extras'},
+            context_processors=project_engine.context_processors,
+            autoescape=project_engine.autoescape,
+        )
+
+    def _page_context(self, page, size, instructor, viewer):
+        if page == 'course_list':
+            courses = [
+                Course(pk=pk, title=f'Course {pk}', description=LESSON_CONTENT, instructor=instructor)
+                for pk in range(1, size + 1)
+            ]
+            return {'courses': courses, 'user': viewer}
+
+        course = Course(pk=1, title='Benchmark course', description=LESSON_CONTENT, instructor=instructor)
+        lessons = []
+        for pk in range(1, size + 1):
+            lesson = Lesson(pk=pk, course=course, title=f'Lesson {pk}', content=LESSON_CONTENT, order=pk)
+            lesson.quiz = Quiz(pk=pk, lesson=lesson, title=f'Quiz {pk}')
+            lessons.append(lesson)
+        return {
+            'course': course,
+            'lessons': lessons,
+            'user': viewer,
+            'is_enrolled': viewer.role == STUDENT_ROLE,
+            'lesson_progress': {lesson.pk: lesson.pk % 2 == 0 for lesson in lessons},
+        }
+
+    def _time_render(self, template, request, context, repeat):
+        # First render warms the per-node caches; it is not measured.
+        template.render(RequestContext(request, context))
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            template.render(RequestContext(request, context))
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
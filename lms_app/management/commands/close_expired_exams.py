@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from lms_app.services import ExamService
+
+
+class Command(BaseCommand):
+    help = (
+        "Grade and close timed exam sessions whose deadline has passed, using the "
+        "answers saved before it. Run periodically (e.g. from cron) so abandoned "
+        "exams still produce an attempt."
+    )
+
+    def handle(self, *args, **options):
+        closed = ExamService.close_expired_sessions()
+        self.stdout.write(self.style.SUCCESS(f"Closed {closed} expired exam session(s)."))
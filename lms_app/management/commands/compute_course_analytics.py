@@ -0,0 +1,76 @@
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from lms_app.models import Course
+from lms_app.parallel import (
+    DEFAULT_CHUNK_SIZE, compute_course_analytics, get_analytics_workers, summarize_course_analytics
+)
+
+
+class Command(BaseCommand):
+    help = "Compute analytics for every course, optionally across a process pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='Worker processes to use (default: LMS_ANALYTICS_WORKERS; 0 runs serially).',
+        )
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--output', help='Write per-course analytics to this JSON file.')
+        parser.add_argument(
+            '--benchmark', action='store_true',
+            help='Time serial and parallel runs for 1..N workers, N being the CPU count.',
+        )
+
+    def handle(self, *args, **options):
+        course_ids = list(Course.objects.order_by('pk').values_list('pk', flat=True))
+        chunk_size = options['chunk_size']
+
+        if options['benchmark']:
+            self._benchmark(course_ids, chunk_size)
+            return
+
+        workers = options['workers']
+        if workers is None:
+            workers = get_analytics_workers()
+
+        start = time.perf_counter()
+        analytics = compute_course_analytics(course_ids, workers=workers, chunk_size=chunk_size)
+        elapsed = time.perf_counter() - start
+
+        summary = summarize_course_analytics(analytics)
+        for key, value in summary.items():
+            if key == 'completion_distribution':
+                value = ', '.join(f"{bucket['from']}-{bucket['to']}%: {bucket['students']}" for bucket in value)
+            self.stdout.write(f"{key}: {value}")
+        self.stdout.write(f"Computed {len(analytics)} courses with {workers} worker(s) in {elapsed:.2f}s.")
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(analytics, output, indent=2)
+            self.stdout.write(f"Per-course analytics written to {options['output']}.")
+
+    def _benchmark(self, course_ids, chunk_size):
+        cpu_count = os.cpu_count() or 1
+        worker_counts = [0] + [n for n in (1, 2, 4, 8, 16, 32, 64) if n < cpu_count] + [cpu_count]
+
+        self.stdout.write(f"{len(course_ids)} courses, chunk size {chunk_size}, {cpu_count} CPU(s)")
+        self.stdout.write(f"{'workers':>8} {'seconds':>10} {'speedup':>8}")
+
+        baseline = None
+        expected = None
+        for workers in sorted(set(worker_counts)):
+            start = time.perf_counter()
+            analytics = compute_course_analytics(course_ids, workers=workers, chunk_size=chunk_size)
+            elapsed = time.perf_counter() - start
+
+            if baseline is None:
+                baseline, expected = elapsed, analytics
+            elif analytics != expected:
+                self.stderr.write(f"Results with {workers} worker(s) differ from the serial run.")
+
+            label = 'serial' if workers == 0 else workers
+            self.stdout.write(f"{label:>8} {elapsed:>10.3f} {baseline / elapsed:>7.2f}x")
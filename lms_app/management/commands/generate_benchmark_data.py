@@ -0,0 +1,143 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from lms_app.cache import deferred_invalidation, invalidate_tags
+from lms_app.constants import INSTRUCTOR_ROLE, STUDENT_ROLE
+from lms_app.models import (
+    LESSON_SUMMARY_LENGTH, User, Course, Lesson, LessonContent, Quiz, Question, Answer, Enrollment,
+    LessonProgress, QuizAttempt,
+)
+from lms_app.services import LESSON_ORDER_GAP, AttemptHistoryService, EnrollmentService, SketchService
+
+BENCHMARK_PREFIX = 'bench_'
+BATCH_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = "Generate a synthetic dataset for benchmarks (users are prefixed with 'bench_')."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--courses', type=int, default=10000)
+        parser.add_argument('--lessons-per-course', type=int, default=5)
+        parser.add_argument('--questions-per-quiz', type=int, default=2)
+        parser.add_argument('--instructors', type=int, default=50)
+        parser.add_argument('--students', type=int, default=2000)
+        parser.add_argument('--enrollments-per-course', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Delete previously generated benchmark data before generating.',
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        if options['clear']:
+            # The cascade fires a signal per deleted lesson, quiz, question and answer.
+            with deferred_invalidation():
+                deleted, _ = User.objects.filter(username__startswith=BENCHMARK_PREFIX).delete()
+            self.stdout.write(f"Deleted {deleted} existing benchmark rows.")
+
+        with transaction.atomic():
+            self._generate(rng, options)
+
+        self.stdout.write(self.style.SUCCESS("Benchmark data generated."))
+
+    def _bulk_create(self, model, objs):
+        model.objects.bulk_create(objs, batch_size=BATCH_SIZE)
+        self.stdout.write(f"  {model.__name__}: {len(objs)}")
+        return objs
+
+    def _generate(self, rng, options):
+        # Password hashing is deliberately skipped; these users never log in.
+        instructors = self._bulk_create(User, [
+            User(username=f'{BENCHMARK_PREFIX}instructor_{i}', role=INSTRUCTOR_ROLE, password='!')
+            for i in range(options['instructors'])
+        ])
+        students = self._bulk_create(User, [
+            User(username=f'{BENCHMARK_PREFIX}student_{i}', role=STUDENT_ROLE, password='!')
+            for i in range(options['students'])
+        ])
+
+        courses = self._bulk_create(Course, [
+            Course(
+                title=f'Benchmark Course {i}',
+                description='Generated benchmark course.',
+                instructor=rng.choice(instructors),
+            )
+            for i in range(options['courses'])
+        ])
+
+        # bulk_create skips Lesson.save(), so store the shared body directly.
+        content = 'Lorem ipsum ' * 50
+        body = LessonContent.store(content)
+        lessons = self._bulk_create(Lesson, [
+            Lesson(course=course, title=f'Lesson {order}', body=body,
+                   summary=content[:LESSON_SUMMARY_LENGTH], order=order * LESSON_ORDER_GAP)
+            for course in courses
+            for order in range(1, options['lessons_per_course'] + 1)
+        ])
+        quizzes = self._bulk_create(Quiz, [
+            Quiz(
+                lesson=lesson,
+                title=f'{lesson.title} Quiz',
+                question_count=options['questions_per_quiz'],
+            )
+            for lesson in lessons
+        ])
+        questions = self._bulk_create(Question, [
+            Question(quiz=quiz, text=f'Question {n}')
+            for quiz in quizzes
+            for n in range(1, options['questions_per_quiz'] + 1)
+        ])
+        self._bulk_create(Answer, [
+            Answer(question=question, text=text, is_correct=is_correct)
+            for question in questions
+            for text, is_correct in (('Correct', True), ('Incorrect', False))
+        ])
+
+        lessons_by_course = {}
+        for lesson in lessons:
+            lessons_by_course.setdefault(lesson.course_id, []).append(lesson)
+        quiz_by_lesson = {quiz.lesson_id: quiz for quiz in quizzes}
+
+        per_course = min(options['enrollments_per_course'], len(students))
+        enrollments = self._bulk_create(Enrollment, [
+            Enrollment(student=student, course=course)
+            for course in courses
+            for student in rng.sample(students, per_course)
+        ])
+
+        now = timezone.now()
+        progress = []
+        attempts = []
+        for enrollment in enrollments:
+            course_lessons = lessons_by_course.get(enrollment.course_id, [])
+            completed = rng.randint(0, len(course_lessons))
+            for lesson in course_lessons[:completed]:
+                progress.append(LessonProgress(
+                    enrollment=enrollment, lesson=lesson, completed=True, date_completed=now
+                ))
+                attempts.append(QuizAttempt(
+                    student_id=enrollment.student_id,
+                    quiz=quiz_by_lesson[lesson.pk],
+                    score=rng.randint(0, options['questions_per_quiz']),
+                    total_questions=options['questions_per_quiz'],
+                ))
+        self._bulk_create(LessonProgress, progress)
+        self._bulk_create(QuizAttempt, attempts)
+
+        # bulk_create skips the signals that maintain progress fields, attempt summaries and sketches.
+        bench_students = User.objects.filter(username__startswith=BENCHMARK_PREFIX, role=STUDENT_ROLE)
+        bench_enrollments = Enrollment.objects.filter(student__in=bench_students)
+        EnrollmentService.refresh_progress(bench_enrollments)
+        EnrollmentService.record_activity(bench_enrollments.filter(completed_lessons__gt=0), now)
+        summaries = AttemptHistoryService.rebuild_summaries(students=bench_students)
+        self.stdout.write(f"  QuizAttemptSummary: {summaries}")
+        sketches = SketchService.rebuild(timezone.localdate(now), timezone.localdate(now))
+        self.stdout.write(f"  StatsSketch: {sketches}")
+        # Nothing is cached for the new content yet, but the course listing changed.
+        invalidate_tags('courses')
@@ -0,0 +1,70 @@
+import csv
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from lms_app.services import ENROLLMENT_CHUNK_SIZE, EnrollmentService
+
+USERNAME_COLUMN = 'username'
+COURSE_COLUMNS = ('course_id', 'course')
+
+
+class Command(BaseCommand):
+    help = (
+        "Enroll students from a CSV roster with 'username' and 'course_id' columns. "
+        "Existing enrollments are skipped; counts are reported at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('roster', help="Path to the CSV roster, or '-' to read from stdin.")
+        parser.add_argument(
+            '--chunk-size', type=int, default=ENROLLMENT_CHUNK_SIZE,
+            help='Enrollments inserted per transaction.',
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+
+        if options['roster'] == '-':
+            roster, invalid = self._read(sys.stdin)
+        else:
+            try:
+                with open(options['roster'], newline='', encoding='utf-8-sig') as handle:
+                    roster, invalid = self._read(handle)
+            except OSError as exc:
+                raise CommandError(f"Cannot read roster: {exc}")
+
+        start = time.perf_counter()
+        stats = EnrollmentService.bulk_enroll(roster, chunk_size=options['chunk_size'])
+        elapsed = time.perf_counter() - start
+
+        stats['invalid_rows'] = invalid
+        for key in ('rows', 'invalid_rows', 'duplicates', 'unknown_users', 'not_students',
+                    'unknown_courses', 'already_enrolled', 'created'):
+            self.stdout.write(f"  {key.replace('_', ' '):<18}{stats[key]:>10}")
+        self.stdout.write(self.style.SUCCESS(f"Created {stats['created']} enrollment(s) in {elapsed:.2f}s."))
+
+    def _read(self, handle):
+        reader = csv.DictReader(handle)
+        fieldnames = [name.strip().lower() for name in reader.fieldnames or []]
+        course_column = next((name for name in COURSE_COLUMNS if name in fieldnames), None)
+        if USERNAME_COLUMN not in fieldnames or course_column is None:
+            raise CommandError("The roster needs a 'username' column and a 'course_id' column.")
+        reader.fieldnames = fieldnames
+
+        roster, invalid = [], 0
+        for line_number, row in enumerate(reader, start=2):
+            username = (row.get(USERNAME_COLUMN) or '').strip()
+            try:
+                course_id = int((row.get(course_column) or '').strip())
+            except ValueError:
+                course_id = None
+            if not username or course_id is None:
+                invalid += 1
+                if invalid <= 10:
+                    self.stderr.write(f"Skipping line {line_number}: {row}")
+                continue
+            roster.append((username, course_id))
+        return roster, invalid
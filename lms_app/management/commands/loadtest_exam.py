@@ -0,0 +1,177 @@
+import http.client
+import re
+import secrets
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.urls import reverse
+
+from lms_app.constants import INSTRUCTOR_ROLE, STUDENT_ROLE
+from lms_app.models import Answer, Course, Enrollment, ExamSession, Lesson, Question, Quiz, QuizAttempt, User
+
+LOAD_PREFIX = 'exam_load_'
+TOKEN_PATTERN = re.compile(r'name="submission_token" value="(\w+)"')
+PHASES = ('start', 'autosave', 'submit')
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate a synchronized timed exam against a running server: every "
+        "test-taker opens the exam, autosaves answers and submits at once. "
+        "Start the server first (e.g. 'python manage.py runserver --noreload' "
+        "or gunicorn on the same database); users, the course and the quiz are "
+        "created here and deleted afterwards unless --keep is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Base URL of the running server.')
+        parser.add_argument('--students', type=int, default=5000, help='Number of test-takers.')
+        parser.add_argument(
+            '--concurrency', type=int, default=1000,
+            help='Test-takers in flight at once; equal to --students for a fully simultaneous start.',
+        )
+        parser.add_argument('--questions', type=int, default=20, help='Questions in the exam.')
+        parser.add_argument('--autosaves', type=int, default=5, help='Answers autosaved per test-taker.')
+        parser.add_argument('--timeout', type=float, default=60, help='Per-request timeout in seconds.')
+        parser.add_argument('--keep', action='store_true', help='Keep the generated users, course and attempts.')
+
+    def handle(self, *args, **options):
+        if min(options['students'], options['concurrency'], options['questions']) < 1:
+            raise CommandError("--students, --concurrency and --questions must be at least 1.")
+        if options['autosaves'] < 0:
+            raise CommandError("--autosaves cannot be negative.")
+        url = urlsplit(options['url'])
+        if url.scheme != 'http' or not url.hostname:
+            raise CommandError("--url must be an http:// URL of a running server.")
+        self.host, self.port, self.timeout = url.hostname, url.port or 80, options['timeout']
+
+        self.stdout.write(f"Creating {options['students']} test-takers and a {options['questions']}-question exam...")
+        quiz, questions, cookies = self._build_fixture(options['students'], options['questions'])
+        self.paths = {
+            'take': reverse('take_quiz', kwargs={'pk': quiz.pk}),
+            'autosave': reverse('quiz_save_answer', kwargs={'pk': quiz.pk}),
+        }
+        self.results = {phase: [] for phase in PHASES}
+        self.statuses = {phase: {} for phase in PHASES}
+        self.lock = threading.Lock()
+
+        try:
+            self.stdout.write(
+                f"Running against {options['url']} with {options['concurrency']} test-takers in flight..."
+            )
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+                for cookie in cookies:
+                    pool.submit(self._take_exam, cookie, questions, options['autosaves'])
+            elapsed = time.perf_counter() - start
+            self._report(elapsed, quiz)
+        finally:
+            if not options['keep']:
+                User.objects.filter(username__startswith=LOAD_PREFIX).delete()
+                session_store = import_module(settings.SESSION_ENGINE).SessionStore
+                for session_key in self.session_keys:
+                    session_store(session_key=session_key).delete()
+
+    def _build_fixture(self, student_count, question_count):
+        User.objects.filter(username__startswith=LOAD_PREFIX).delete()
+        with transaction.atomic():
+            instructor = User.objects.create(username=f'{LOAD_PREFIX}instructor', role=INSTRUCTOR_ROLE, password='!')
+            course = Course.objects.create(title='Exam load test', description='', instructor=instructor)
+            lesson = Lesson(course=course, title='Exam', order=1)
+            lesson.content = ''
+            lesson.save()
+            quiz = Quiz.objects.create(lesson=lesson, title='Load test exam', time_limit_minutes=60)
+            questions = []
+            for number in range(1, question_count + 1):
+                question = Question.objects.create(quiz=quiz, text=f'Question {number}')
+                right = Answer.objects.create(question=question, text='Right', is_correct=True)
+                wrong = Answer.objects.create(question=question, text='Wrong', is_correct=False)
+                questions.append((question.pk, right.pk, wrong.pk))
+
+            # Password hashing is skipped; test-takers are logged in through sessions created here.
+            students = User.objects.bulk_create([
+                User(username=f'{LOAD_PREFIX}student_{i}', role=STUDENT_ROLE, password='!')
+                for i in range(student_count)
+            ])
+            Enrollment.objects.bulk_create([Enrollment(student=student, course=course) for student in students])
+
+        session_store = import_module(settings.SESSION_ENGINE).SessionStore
+        self.session_keys = []
+        cookies = []
+        for student in students:
+            session = session_store()
+            session[SESSION_KEY] = str(student.pk)
+            session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+            session[HASH_SESSION_KEY] = student.get_session_auth_hash()
+            session.save()
+            # Any 32-character secret is a valid CSRF token when the cookie matches it.
+            csrf = secrets.token_hex(16)
+            cookies.append((f'{settings.SESSION_COOKIE_NAME}={session.session_key}; '
+                            f'{settings.CSRF_COOKIE_NAME}={csrf}', csrf))
+            self.session_keys.append(session.session_key)
+        return quiz, questions, cookies
+
+    def _request(self, phase, method, path, cookie, body=None):
+        cookie_header, csrf = cookie
+        headers = {'Cookie': cookie_header, 'X-CSRFToken': csrf}
+        if body is not None:
+            body = urlencode(body)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        start = time.perf_counter()
+        try:
+            connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            content = response.read()
+            status = response.status
+            connection.close()
+        except (OSError, http.client.HTTPException) as exc:
+            content, status = b'', type(exc).__name__
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.results[phase].append(elapsed)
+            self.statuses[phase][status] = self.statuses[phase].get(status, 0) + 1
+        return status, content
+
+    def _take_exam(self, cookie, questions, autosaves):
+        status, content = self._request('start', 'GET', self.paths['take'], cookie)
+        match = TOKEN_PATTERN.search(content.decode('utf-8', 'replace')) if status == 200 else None
+        if match is None:
+            return
+        for question_id, right, _ in questions[:autosaves]:
+            self._request('autosave', 'POST', self.paths['autosave'], cookie, {'question': question_id, 'answer': right})
+        form = {'csrfmiddlewaretoken': cookie[1], 'submission_token': match.group(1)}
+        for question_id, right, wrong in questions:
+            form[f'question_{question_id}'] = right if question_id % 2 else wrong
+        self._request('submit', 'POST', self.paths['take'], cookie, form)
+
+    def _report(self, elapsed, quiz):
+        total = sum(len(timings) for timings in self.results.values())
+        self.stdout.write(f"\n{total} requests in {elapsed:.1f}s ({total / elapsed:.0f} req/s)\n")
+        self.stdout.write(f"{'phase':<10}{'requests':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}  statuses")
+        for phase in PHASES:
+            timings = sorted(self.results[phase])
+            if not timings:
+                self.stdout.write(f"{phase:<10}{0:>9}")
+                continue
+            quantiles = statistics.quantiles(timings, n=100) if len(timings) > 1 else timings * 99
+            statuses = ', '.join(f'{status}: {count}' for status, count in sorted(
+                self.statuses[phase].items(), key=lambda item: str(item[0])
+            ))
+            self.stdout.write(
+                f"{phase:<10}{len(timings):>9}{quantiles[49] * 1000:>9.1f}{quantiles[94] * 1000:>9.1f}"
+                f"{quantiles[98] * 1000:>9.1f}{timings[-1] * 1000:>9.1f}  {statuses}"
+            )
+        sessions = ExamSession.objects.filter(quiz=quiz)
+        self.stdout.write(
+            f"\nExam sessions: {sessions.count()} started, {sessions.filter(submitted_at__isnull=False).count()} "
+            f"submitted; {QuizAttempt.objects.filter(quiz=quiz).count()} attempts recorded."
+        )
@@ -0,0 +1,136 @@
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter so module imports are measured cold. The
+# final line of stdout is a JSON object with the phase timings.
+PROBE_SCRIPT = r"""
+import json, os, sys, time
+
+timings = {}
+start = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lms_project.settings')
+from django.conf import settings
+settings.INSTALLED_APPS
+timings['settings'] = time.perf_counter() - start
+
+import django
+mark = time.perf_counter()
+django.setup(set_prefix=False)
+timings['apps_ready'] = time.perf_counter() - mark
+
+mark = time.perf_counter()
+import lms_project.wsgi
+application = lms_project.wsgi.application
+timings['wsgi'] = time.perf_counter() - mark
+
+steps = {}
+if os.environ.get('LMS_PROBE_PRELOAD') == '1':
+    from lms_app.preload import preload
+    steps = preload()
+    timings['preload'] = sum(step['seconds'] for step in steps.values())
+timings['startup_total'] = time.perf_counter() - start
+
+from django.test import Client
+client = Client(HTTP_HOST='localhost')
+path = os.environ['LMS_PROBE_PATH']
+for label in ('first_request', 'second_request'):
+    mark = time.perf_counter()
+    response = client.get(path)
+    timings[label] = time.perf_counter() - mark
+
+print(json.dumps({'timings': timings, 'preload_steps': steps, 'status': response.status_code}))
+"""
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def parse_import_times(stderr):
+    """Parse ``python -X importtime`` output into (module, self_us, cumulative_us, depth)."""
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Profile cold start of lms_project.wsgi in a fresh interpreter: import time "
+        "per module, settings and app-ready time, WSGI setup, optional preloading "
+        "and the first versus second request."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top', type=int, default=15,
+            help='Number of modules and packages to list by import time.',
+        )
+        parser.add_argument(
+            '--path', default='/accounts/login/',
+            help='URL requested after startup (must not require the database).',
+        )
+        parser.add_argument(
+            '--mode', choices=('cold', 'preload', 'both'), default='both',
+            help='Profile a plain start, a start with lms_app.preload, or both.',
+        )
+
+    def handle(self, *args, **options):
+        modes = ('cold', 'preload') if options['mode'] == 'both' else (options['mode'],)
+        results = {mode: self._probe(mode, options['path']) for mode in modes}
+
+        first = results[modes[0]]
+        self._report_imports(first['imports'], options['top'])
+
+        self.stdout.write("\nStartup phases (ms):")
+        phases = ['settings', 'apps_ready', 'wsgi', 'preload', 'startup_total', 'first_request', 'second_request']
+        self.stdout.write(f"  {'phase':<16}" + ''.join(f"{mode:>12}" for mode in modes))
+        for phase in phases:
+            cells = []
+            for mode in modes:
+                value = results[mode]['timings'].get(phase)
+                cells.append(f"{value * 1000:>12.1f}" if value is not None else f"{'-':>12}")
+            self.stdout.write(f"  {phase:<16}" + ''.join(cells))
+
+        if 'preload' in results:
+            self.stdout.write("\nPreload steps:")
+            for step, data in results['preload']['preload_steps'].items():
+                self.stdout.write(f"  {step:<14}{data['seconds'] * 1000:>9.1f} ms  ({data['items']} items)")
+
+    def _probe(self, mode, path):
+        env = dict(os.environ)
+        env['DJANGO_SETTINGS_MODULE'] = os.environ.get('DJANGO_SETTINGS_MODULE', 'lms_project.settings')
+        env['LMS_PROBE_PATH'] = path
+        env['LMS_PROBE_PRELOAD'] = '1' if mode == 'preload' else '0'
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', PROBE_SCRIPT],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if completed.returncode != 0:
+            raise CommandError(f"Startup probe failed:\n{completed.stderr[-2000:]}")
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        result['imports'] = parse_import_times(completed.stderr)
+        return result
+
+    def _report_imports(self, rows, top):
+        total_us = sum(self_us for _, self_us, _, _ in rows)
+        self.stdout.write(f"Imported {len(rows)} modules in {total_us / 1000:.1f} ms (self time).")
+
+        self.stdout.write(f"\nTop {top} modules by self time (ms):")
+        for module, self_us, cumulative_us, _ in sorted(rows, key=lambda row: -row[1])[:top]:
+            self.stdout.write(f"  {self_us / 1000:>8.1f}  {module}  (cumulative {cumulative_us / 1000:.1f})")
+
+        packages = defaultdict(int)
+        for module, self_us, _, _ in rows:
+            packages[module.split('.')[0]] += self_us
+        self.stdout.write(f"\nTop {top} top-level packages by self time (ms):")
+        for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+            self.stdout.write(f"  {self_us / 1000:>8.1f}  {package}")
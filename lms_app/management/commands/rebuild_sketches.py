@@ -0,0 +1,22 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from lms_app.services import SketchService
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the platform statistics sketches from quiz attempts and lesson progress, "
+        "e.g. after bulk imports that bypassed signals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, help='First day (YYYY-MM-DD); defaults to the first activity.')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last day (YYYY-MM-DD); defaults to today.')
+
+    def handle(self, *args, **options):
+        if options['start'] and options['end'] and options['start'] > options['end']:
+            raise CommandError("--start must not be after --end.")
+        written = SketchService.rebuild(options['start'], options['end'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} sketch row(s)."))
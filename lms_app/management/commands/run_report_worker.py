@@ -0,0 +1,65 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from lms_app.services import ReportJobService
+
+
+def _run_job(job):
+    try:
+        return ReportJobService.run_job(job)
+    finally:
+        # Each pool thread holds its own connection; release it per job.
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = "Process queued report jobs using a local thread pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=2,
+            help='Number of jobs to run concurrently (default: 2).',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=2.0,
+            help='Seconds to wait between polls when the queue is empty (default: 2).',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Drain the queue and exit instead of polling forever.',
+        )
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        poll_interval = options['poll_interval']
+        running = set()
+
+        self.stdout.write(f"Report worker started with {workers} worker(s).")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            try:
+                while True:
+                    close_old_connections()
+                    while len(running) < workers:
+                        job = ReportJobService.claim_next_job()
+                        if job is None:
+                            break
+                        self.stdout.write(f"Running {job}")
+                        running.add(executor.submit(_run_job, job))
+
+                    if not running:
+                        if options['once']:
+                            break
+                        time.sleep(poll_interval)
+                        continue
+
+                    done, running = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        job = future.result()
+                        self.stdout.write(f"Finished {job}")
+            except KeyboardInterrupt:
+                self.stdout.write("Stopping report worker; waiting for running jobs.")
+
+        self.stdout.write(self.style.SUCCESS("Report worker stopped."))
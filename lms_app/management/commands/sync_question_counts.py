@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import OuterRef, Subquery
+
+from lms_app.models import Quiz, QuizAttempt
+from lms_app.services import QuizService
+
+
+class Command(BaseCommand):
+    help = "Check or repair the denormalized Quiz.question_count values."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Only report mismatches; exit with an error if any are found.',
+        )
+        parser.add_argument(
+            '--attempts', action='store_true',
+            help='Also fill in total_questions on attempts recorded before it existed.',
+        )
+
+    def handle(self, *args, **options):
+        if options['check']:
+            mismatches = list(QuizService.find_question_count_mismatches())
+            for quiz in mismatches:
+                self.stdout.write(
+                    f"Quiz {quiz.pk} '{quiz.title}': stored {quiz.question_count}, actual {quiz.actual_count}"
+                )
+            if mismatches:
+                raise CommandError(f"{len(mismatches)} quiz question count(s) are out of sync.")
+            self.stdout.write(self.style.SUCCESS("All quiz question counts are in sync."))
+            return
+
+        fixed = QuizService.sync_question_counts()
+        self.stdout.write(f"Updated question_count on {fixed} quiz(zes).")
+
+        if options['attempts']:
+            updated = QuizAttempt.objects.filter(total_questions__isnull=True).update(
+                total_questions=Subquery(Quiz.objects.filter(pk=OuterRef('quiz')).values('question_count'))
+            )
+            self.stdout.write(f"Filled total_questions on {updated} attempt(s).")
+
+        self.stdout.write(self.style.SUCCESS("Question counts synchronized."))
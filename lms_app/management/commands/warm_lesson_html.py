@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from lms_app.models import Course, LessonContent
+from lms_app.rendering import LESSON_RENDERER_VERSION
+
+BATCH_SIZE = 100
+
+
+class Command(BaseCommand):
+    help = (
+        "Render lesson bodies to sanitized HTML ahead of the first view. Only "
+        "bodies without a current rendering are processed unless --force is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_ids', nargs='*', type=int, help='Courses whose lessons should be rendered.')
+        parser.add_argument('--all', action='store_true', help='Render lessons of every course.')
+        parser.add_argument('--force', action='store_true', help='Re-render bodies that are already current.')
+
+    def handle(self, *args, **options):
+        course_ids = options['course_ids']
+        if not course_ids and not options['all']:
+            raise CommandError("Pass one or more course ids, or --all.")
+
+        contents = LessonContent.objects.all()
+        if course_ids:
+            missing = set(course_ids) - set(Course.objects.filter(pk__in=course_ids).values_list('pk', flat=True))
+            if missing:
+                raise CommandError(f"Unknown course id(s): {', '.join(map(str, sorted(missing)))}.")
+            contents = contents.filter(lessons__course_id__in=course_ids).distinct()
+        if not options['force']:
+            contents = contents.filter(Q(html__isnull=True) | ~Q(html_version=LESSON_RENDERER_VERSION))
+
+        start = time.perf_counter()
+        rendered = text_bytes = html_bytes = 0
+        for content in contents.only('digest', 'data', 'size').iterator(chunk_size=BATCH_SIZE):
+            content.render_html()
+            rendered += 1
+            text_bytes += content.size
+            html_bytes += len(content.html)
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered {rendered} lesson bod{'y' if rendered == 1 else 'ies'} "
+            f"({text_bytes / 1024:.0f} KB of text, {html_bytes / 1024:.0f} KB compressed HTML) "
+            f"in {elapsed:.2f}s with renderer version {LESSON_RENDERER_VERSION}."
+        ))
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-19 02:09
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_question_counts(apps, schema_editor):
+    Quiz = apps.get_model('lms_app', 'Quiz')
+    Question = apps.get_model('lms_app', 'Question')
+    QuizAttempt = apps.get_model('lms_app', 'QuizAttempt')
+
+    counts = Question.objects.filter(quiz=OuterRef('pk')).order_by().values('quiz').annotate(
+        total=Count('pk')
+    ).values('total')
+    Quiz.objects.update(question_count=Coalesce(Subquery(counts), 0))
+
+    QuizAttempt.objects.filter(total_questions__isnull=True).update(
+        total_questions=Subquery(Quiz.objects.filter(pk=OuterRef('quiz')).values('question_count'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_app', '0002_report_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='question_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='quizattempt',
+            name='total_questions',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_question_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-19 02:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_app', '0003_quiz_question_count'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='quizattempt',
+            name='lms_app_qui_student_d3939f_idx',
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['student', '-date_enrolled'], name='enrollment_student_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lessonprogress',
+            index=models.Index(condition=models.Q(('completed', True)), fields=['enrollment'], name='lessonprogress_completed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quizattempt',
+            index=models.Index(fields=['student', 'quiz', '-date_attempted'], name='quizattempt_student_quiz_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:40
+
+from django.db import migrations
+from django.db.models import F, Max
+
+# Matches services.LESSON_ORDER_GAP at the time of this migration.
+LESSON_ORDER_GAP = 1024
+
+
+def respace_lesson_order(apps, schema_editor):
+    """Rewrite lesson orders as gapped ranks, keeping each course's sequence."""
+    Lesson = apps.get_model('lms_app', 'Lesson')
+    highest = Lesson.objects.aggregate(highest=Max('order'))['highest']
+    if highest is None:
+        return
+    # Shift every rank below zero first so the new ranks never collide with
+    # old ones under the (course, order) unique constraint.
+    Lesson.objects.update(order=F('order') - (highest + 1))
+
+    lessons, course_id, rank = [], None, 0
+    for pk, lesson_course_id in Lesson.objects.order_by('course_id', 'order').values_list('pk', 'course_id'):
+        rank = rank + 1 if lesson_course_id == course_id else 1
+        course_id = lesson_course_id
+        lessons.append(Lesson(pk=pk, order=rank * LESSON_ORDER_GAP))
+    Lesson.objects.bulk_update(lessons, ['order'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_app', '0005_quiz_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(respace_lesson_order, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Lesson bodies move to LessonContent in three migrations: this one adds the
+# nullable field, 0008 fills it in and 0009 makes it required. Keeping the
+# data migration apart means PostgreSQL commits its row updates before the
+# ALTER TABLEs on the same table, which otherwise fail with "pending trigger
+# events".
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_app', '0006_gapped_lesson_order'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LessonContent',
+            fields=[
+                ('digest', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('data', models.BinaryField()),
+                ('size', models.PositiveIntegerField(help_text='Uncompressed size in bytes.')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='body',
+            field=models.ForeignKey(
+                editable=False, null=True, on_delete=django.db.models.deletion.PROTECT,
+                related_name='lessons', to='lms_app.lessoncontent',
+            ),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='summary',
+            field=models.CharField(blank=True, editable=False, max_length=300),
+        ),
+    ]
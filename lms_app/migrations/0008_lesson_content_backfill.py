@@ -0,0 +1,62 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:20
+
+import hashlib
+import zlib
+
+from django.db import migrations
+
+# Values of models.LESSON_SUMMARY_LENGTH / LESSON_CONTENT_COMPRESSION at the
+# time of this migration.
+LESSON_SUMMARY_LENGTH = 300
+LESSON_CONTENT_COMPRESSION = 6
+BATCH_SIZE = 500
+
+
+def move_content_to_storage(apps, schema_editor):
+    """Compress every lesson body into LessonContent, one row per distinct text."""
+    Lesson = apps.get_model('lms_app', 'Lesson')
+    LessonContent = apps.get_model('lms_app', 'LessonContent')
+
+    def flush(contents, lessons):
+        LessonContent.objects.bulk_create(contents.values(), ignore_conflicts=True)
+        Lesson.objects.bulk_update(lessons, ['body', 'summary'])
+        contents.clear()
+        lessons.clear()
+
+    contents, lessons = {}, []
+    for pk, text in Lesson.objects.values_list('pk', 'content').iterator(chunk_size=BATCH_SIZE):
+        raw = text.encode('utf-8')
+        digest = hashlib.sha256(raw).hexdigest()
+        if digest not in contents:
+            contents[digest] = LessonContent(
+                digest=digest, data=zlib.compress(raw, LESSON_CONTENT_COMPRESSION), size=len(raw)
+            )
+        lessons.append(Lesson(pk=pk, body_id=digest, summary=text[:LESSON_SUMMARY_LENGTH]))
+        if len(lessons) >= BATCH_SIZE:
+            flush(contents, lessons)
+    if lessons:
+        flush(contents, lessons)
+
+
+def restore_content(apps, schema_editor):
+    Lesson = apps.get_model('lms_app', 'Lesson')
+    lessons = []
+    for lesson in Lesson.objects.select_related('body').only('pk', 'body__data').iterator(chunk_size=BATCH_SIZE):
+        lesson.content = zlib.decompress(lesson.body.data).decode('utf-8')
+        lessons.append(lesson)
+        if len(lessons) >= BATCH_SIZE:
+            Lesson.objects.bulk_update(lessons, ['content'])
+            lessons.clear()
+    if lessons:
+        Lesson.objects.bulk_update(lessons, ['content'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_app', '0007_lesson_content_storage'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_content_to_storage, restore_content),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_app', '0008_lesson_content_backfill'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='lesson',
+            name='body',
+            field=models.ForeignKey(
+                editable=False, on_delete=django.db.models.deletion.PROTECT,
+                related_name='lessons', to='lms_app.lessoncontent',
+            ),
+        ),
+        # Gives the column a default so that unapplying the removal can
+        # re-add it before restore_content fills it in.
+        migrations.AlterField(
+            model_name='lesson',
+            name='content',
+            field=models.TextField(default=''),
+        ),
+        migrations.RemoveField(
+            model_name='lesson',
+            name='content',
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:50
+
+from django.db import migrations, models
+from django.db.models import Case, Count, F, Max, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.lookups import GreaterThanOrEqual, LessThan
+
+# Values of constants.PROGRESS_* at the time of this migration.
+PROGRESS_NOT_STARTED = 0
+PROGRESS_UNDER_HALF = 1
+PROGRESS_OVER_HALF = 2
+PROGRESS_COMPLETED = 3
+
+
+def backfill_progress(apps, schema_editor):
+    Enrollment = apps.get_model('lms_app', 'Enrollment')
+    Lesson = apps.get_model('lms_app', 'Lesson')
+    LessonProgress = apps.get_model('lms_app', 'LessonProgress')
+    QuizAttempt = apps.get_model('lms_app', 'QuizAttempt')
+
+    completed = LessonProgress.objects.filter(
+        enrollment=OuterRef('pk'), completed=True
+    ).order_by().values('enrollment').annotate(completed=Count('pk')).values('completed')
+    last_completed = LessonProgress.objects.filter(
+        enrollment=OuterRef('pk'), completed=True
+    ).order_by().values('enrollment').annotate(latest=Max('date_completed')).values('latest')
+    last_attempt = QuizAttempt.objects.filter(
+        student=OuterRef('student_id'), quiz__lesson__course=OuterRef('course_id')
+    ).order_by().values('student').annotate(latest=Max('date_attempted')).values('latest')
+    Enrollment.objects.update(
+        completed_lessons=Coalesce(Subquery(completed), 0),
+        last_activity_at=Greatest(
+            Coalesce(Subquery(last_completed), Subquery(last_attempt)),
+            Coalesce(Subquery(last_attempt), Subquery(last_completed)),
+        ),
+    )
+
+    total = Coalesce(
+        Subquery(
+            Lesson.objects.filter(course_id=OuterRef('course_id')).order_by().values('course_id')
+            .annotate(total=Count('pk')).values('total')
+        ),
+        0,
+    )
+    Enrollment.objects.update(progress_bucket=Case(
+        When(completed_lessons=0, then=Value(PROGRESS_NOT_STARTED)),
+        When(GreaterThanOrEqual(F('completed_lessons'), total), then=Value(PROGRESS_COMPLETED)),
+        When(LessThan(F('completed_lessons') * 2, total), then=Value(PROGRESS_UNDER_HALF)),
+        default=Value(PROGRESS_OVER_HALF),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_app', '0010_lessoncontent_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='completed_lessons',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='last_activity_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='progress_bucket',
+            field=models.PositiveSmallIntegerField(
+                choices=[(0, 'Not started'), (1, 'Under halfway'), (2, 'Halfway or more'), (3, 'Completed')],
+                default=0, editable=False,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['course', 'date_enrolled', 'id'], name='enrollment_roster_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(
+                fields=['course', 'progress_bucket', 'date_enrolled', 'id'], name='enrollment_roster_bucket_idx'
+            ),
+        ),
+        migrations.RunPython(backfill_progress, migrations.RunPython.noop),
+    ]
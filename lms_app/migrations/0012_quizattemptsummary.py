@@ -0,0 +1,69 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Window
+from django.db.models.functions import Least, RowNumber
+
+BATCH_SIZE = 1000
+
+
+def backfill_summaries(apps, schema_editor):
+    QuizAttempt = apps.get_model('lms_app', 'QuizAttempt')
+    QuizAttemptSummary = apps.get_model('lms_app', 'QuizAttemptSummary')
+
+    pair = [F('student_id'), F('quiz_id')]
+    heads = QuizAttempt.objects.order_by().annotate(
+        best_rank=Window(RowNumber(), partition_by=pair, order_by=[F('score').desc(), F('date_attempted'), F('pk')]),
+        latest_rank=Window(RowNumber(), partition_by=pair, order_by=[F('date_attempted').desc(), F('pk').desc()]),
+        attempt_count=Window(Count('pk'), partition_by=pair),
+        head=Least('best_rank', 'latest_rank'),
+    ).filter(head=1).order_by('student_id', 'quiz_id')
+
+    summaries = {}
+    for attempt in heads.iterator(chunk_size=BATCH_SIZE):
+        key = (attempt.student_id, attempt.quiz_id)
+        summary = summaries.get(key)
+        if summary is None:
+            if len(summaries) >= BATCH_SIZE:
+                QuizAttemptSummary.objects.bulk_create(summaries.values())
+                summaries.clear()
+            summary = summaries[key] = QuizAttemptSummary(
+                student_id=attempt.student_id, quiz_id=attempt.quiz_id, attempt_count=attempt.attempt_count,
+            )
+        if attempt.best_rank == 1:
+            summary.best_attempt_id, summary.best_score = attempt.pk, attempt.score
+        if attempt.latest_rank == 1:
+            summary.latest_attempt_id, summary.latest_score = attempt.pk, attempt.score
+            summary.last_attempted_at = attempt.date_attempted
+    QuizAttemptSummary.objects.bulk_create(summaries.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('lms_app', '0011_enrollment_progress_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizAttemptSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempt_count', models.PositiveIntegerField(default=0)),
+                ('best_score', models.IntegerField(default=0)),
+                ('latest_score', models.IntegerField(default=0)),
+                ('last_attempted_at', models.DateTimeField()),
+                ('best_attempt', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='lms_app.quizattempt')),
+                ('latest_attempt', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='lms_app.quizattempt')),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempt_summaries', to='lms_app.quiz')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempt_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('student', 'quiz')},
+            },
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
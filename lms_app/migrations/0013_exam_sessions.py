@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('lms_app', '0012_quizattemptsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='time_limit_minutes',
+            field=models.PositiveIntegerField(
+                blank=True, null=True,
+                help_text='Makes this a timed exam: minutes allowed from the moment a student starts. '
+                          'Leave empty for an untimed quiz.',
+            ),
+        ),
+        migrations.CreateModel(
+            name='ExamSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField()),
+                ('answer_log', models.TextField(blank=True, default='', editable=False)),
+                ('submitted_at', models.DateTimeField(blank=True, null=True)),
+                ('attempt', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='exam_session', to='lms_app.quizattempt')),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exam_sessions', to='lms_app.quiz')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exam_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('submitted_at__isnull', True)), fields=['expires_at'], name='examsession_open_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='examsession',
+            constraint=models.UniqueConstraint(condition=models.Q(('submitted_at__isnull', True)), fields=('student', 'quiz'), name='unique_open_exam_session'),
+        ),
+    ]
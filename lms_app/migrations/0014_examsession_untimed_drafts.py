@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_app', '0013_exam_sessions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='examsession',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, help_text='Empty for untimed quizzes.', null=True),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-19 18:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_app', '0014_examsession_untimed_drafts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatsSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('metric', models.CharField(choices=[('active_students', 'Active students'), ('quiz_scores', 'Quiz score percentages'), ('completion_hours', 'Hours from enrollment to course completion')], max_length=20)),
+                ('data', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stats_sketches', to='lms_app.course')),
+                ('quiz', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stats_sketches', to='lms_app.quiz')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['metric', 'day'], name='statssketch_metric_day_idx')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='lessonprogress',
+            index=models.Index(condition=models.Q(('completed', True)), fields=['date_completed'], name='lessonprogress_done_at_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='statssketch',
+            constraint=models.UniqueConstraint(condition=models.Q(('quiz__isnull', True)), fields=('course', 'day', 'metric'), name='unique_course_stats_sketch'),
+        ),
+        migrations.AddConstraint(
+            model_name='statssketch',
+            constraint=models.UniqueConstraint(condition=models.Q(('quiz__isnull', False)), fields=('quiz', 'day', 'metric'), name='unique_quiz_stats_sketch'),
+        ),
+    ]
@@ -1,6 +1,18 @@
+import calendar
+import hashlib
+import re
+
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib import messages
 from django.http import HttpResponseForbidden
+from django.middleware.csrf import get_token
+from django.shortcuts import render
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .cache import get_cache, get_page_cache_timeout, make_key
 
 
 class InstructorOrSuperuserRequiredMixin(LoginRequiredMixin, UserPassesTestMixin):
@@ -35,4 +47,98 @@ class CourseOwnerMixin(UserPassesTestMixin):
     
     def test_func(self):
         course = self.get_object()
-        return course.instructor == self.request.user or self.request.user.is_superuser
\ No newline at end of file
+        return course.instructor == self.request.user or self.request.user.is_superuser
+
+
+class ConditionalGetMixin:
+    """Answer repeat GET requests with 304 Not Modified.
+
+    Views implement ``get_content_version()``, returning a
+    ``(last_modified, parts)`` pair built from cheap lookups, or None to
+    skip conditional handling. The ETag also covers the requesting user
+    and CSRF secret, since rendered pages embed both. Requests with
+    pending flash messages are always rendered so that messages are shown.
+    """
+
+    def get_content_version(self):
+        raise NotImplementedError("Views using ConditionalGetMixin must define get_content_version().")
+
+    def get(self, request, *args, **kwargs):
+        version = None
+        if not len(messages.get_messages(request)):
+            version = self.get_content_version()
+        if version is None:
+            return super().get(request, *args, **kwargs)
+
+        last_modified, parts = version
+        user = request.user
+        get_token(request)  # Ensure the CSRF secret exists before it is hashed
+        parts = (*parts, user.pk, getattr(user, 'role', None), user.is_superuser, request.META.get('CSRF_COOKIE'))
+        etag = quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+        timestamp = calendar.timegm(last_modified.utctimetuple()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+            response.headers['ETag'] = etag
+            if timestamp is not None:
+                response.headers['Last-Modified'] = http_date(timestamp)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+CSRF_PLACEHOLDER = '__lms_csrf_token__'
+CSRF_INPUT = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+
+
+class SegmentCacheMixin:
+    """Cache the rendered page body per object version and user segment.
+
+    Only the body template is cached; the surrounding layout (navigation,
+    messages) is rendered for every request from ``cached_page.html``.
+    CSRF tokens in cached bodies are replaced with the requester's token
+    when served. Views define ``body_template_name`` and implement
+    ``get_cache_tags()``, ``get_user_segment()`` and ``get_page_title()``.
+    On a cache hit the view's own queries are skipped entirely.
+    """
+
+    body_template_name = None
+    page_template_name = 'lms_app/cached_page.html'
+
+    def get_cache_tags(self):
+        raise NotImplementedError("Views using SegmentCacheMixin must define get_cache_tags().")
+
+    def get_user_segment(self):
+        raise NotImplementedError("Views using SegmentCacheMixin must define get_user_segment().")
+
+    def get_page_title(self, context):
+        raise NotImplementedError("Views using SegmentCacheMixin must define get_page_title().")
+
+    def get(self, request, *args, **kwargs):
+        self.page_cache_key = make_key(
+            f'page:{self.__class__.__name__}',
+            self.get_cache_tags(),
+            sorted(self.kwargs.items()),
+            request.GET.urlencode(),
+            self.get_user_segment(),
+        )
+        page = get_cache().get(self.page_cache_key)
+        if page is not None:
+            return self.render_cached_page(page)
+        return super().get(request, *args, **kwargs)
+
+    def render_to_response(self, context, **response_kwargs):
+        body = render_to_string(self.body_template_name, context, request=self.request)
+        page = {
+            'title': self.get_page_title(context),
+            'body': CSRF_INPUT.sub(rf'\g<1>{CSRF_PLACEHOLDER}\g<2>', body),
+        }
+        get_cache().set(self.page_cache_key, page, timeout=get_page_cache_timeout())
+        return self.render_cached_page(page)
+
+    def render_cached_page(self, page):
+        body = page['body'].replace(CSRF_PLACEHOLDER, get_token(self.request))
+        return render(self.request, self.page_template_name, {
+            'page_title': page['title'],
+            'page_body': mark_safe(body),
+        })
@@ -1,6 +1,16 @@
+import codecs
+import hashlib
+import zlib
+from functools import cached_property
+
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
-from .constants import USER_ROLES, STUDENT_ROLE
+from .constants import (
+    USER_ROLES, STUDENT_ROLE, JOB_STATUSES, JOB_PENDING, JOB_SUCCEEDED, JOB_FAILED, PROGRESS_BUCKETS,
+    PROGRESS_NOT_STARTED, SKETCH_METRICS,
+)
+from .rendering import LESSON_RENDERER_VERSION, render_lesson_html
 
 class User(AbstractUser):
     role = models.CharField(max_length=10, choices=USER_ROLES, default=STUDENT_ROLE)
@@ -34,10 +44,106 @@ class Course(models.Model):
         return f"{self.title} (by {self.instructor.username})"
 
 
+# Characters of the body kept on the lesson row for listings; list pages
+# show at most 150.
+LESSON_SUMMARY_LENGTH = 300
+LESSON_CONTENT_COMPRESSION = 6
+LESSON_CONTENT_CHUNK_SIZE = 64 * 1024
+
+
+def _iter_decompressed(data, chunk_size):
+    """Decode zlib-compressed UTF-8 in pieces of at most ``chunk_size`` bytes."""
+    decompressor = zlib.decompressobj()
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    pending = data
+    while not decompressor.eof:
+        raw = decompressor.decompress(pending, chunk_size)
+        pending = decompressor.unconsumed_tail
+        if not raw and not pending:
+            break
+        piece = decoder.decode(raw)
+        if piece:
+            yield piece
+    piece = decoder.decode(b'', final=True)
+    if piece:
+        yield piece
+
+
+class LessonContent(models.Model):
+    """A lesson body, zlib-compressed and stored once per distinct text.
+
+    Rows are addressed by the SHA-256 of the UTF-8 text, so lessons with the
+    same body (copied courses, templates) share one row. The text of a row
+    never changes; editing a lesson points it at another row. The sanitized
+    HTML rendering is cached alongside, compressed, and redone when
+    ``LESSON_RENDERER_VERSION`` changes.
+    """
+
+    digest = models.CharField(max_length=64, primary_key=True)
+    data = models.BinaryField()
+    size = models.PositiveIntegerField(help_text="Uncompressed size in bytes.")
+    html = models.BinaryField(null=True, editable=False)
+    html_version = models.PositiveSmallIntegerField(default=0, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.digest[:12]} ({self.size} bytes)"
+
+    @classmethod
+    def store(cls, text):
+        """Return the row holding ``text``, inserting it if it is new."""
+        raw = text.encode('utf-8')
+        content = cls(
+            digest=hashlib.sha256(raw).hexdigest(),
+            data=zlib.compress(raw, LESSON_CONTENT_COMPRESSION),
+            size=len(raw),
+        )
+        content.html = content._render_html()
+        content.html_version = LESSON_RENDERER_VERSION
+        cls.objects.bulk_create([content], ignore_conflicts=True)
+        content._state.adding = False
+        return content
+
+    @cached_property
+    def text(self):
+        return zlib.decompress(self.data).decode('utf-8')
+
+    def iter_text(self, chunk_size=LESSON_CONTENT_CHUNK_SIZE):
+        """Yield the text in pieces of at most ``chunk_size`` bytes of UTF-8."""
+        return _iter_decompressed(self.data, chunk_size)
+
+    @property
+    def has_current_html(self):
+        return self.html is not None and self.html_version == LESSON_RENDERER_VERSION
+
+    def render_html(self):
+        """Render and store the sanitized HTML for this text."""
+        self.html = self._render_html()
+        self.html_version = LESSON_RENDERER_VERSION
+        LessonContent.objects.filter(pk=self.pk).update(html=self.html, html_version=self.html_version)
+
+    def iter_html(self, chunk_size=LESSON_CONTENT_CHUNK_SIZE):
+        """Yield the sanitized HTML in pieces, rendering it first if it is stale."""
+        if not self.has_current_html:
+            self.render_html()
+        return _iter_decompressed(self.html, chunk_size)
+
+    def _render_html(self):
+        compressor = zlib.compressobj(LESSON_CONTENT_COMPRESSION)
+        parts = [compressor.compress(piece.encode('utf-8')) for piece in render_lesson_html(self.iter_text())]
+        parts.append(compressor.flush())
+        return b''.join(parts)
+
+
 class Lesson(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="lessons")
     title = models.CharField(max_length=200, db_index=True)
-    content = models.TextField()
+    # The body lives in LessonContent so lesson queries never load it; use
+    # the ``content`` property to read or replace it.
+    body = models.ForeignKey(LessonContent, on_delete=models.PROTECT, related_name="lessons", editable=False)
+    summary = models.CharField(max_length=LESSON_SUMMARY_LENGTH, blank=True, editable=False)
+    # Gapped rank within the course, not the displayed position; reorder
+    # through LessonService.move_lesson / reorder_lessons.
     order = models.IntegerField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -52,14 +158,60 @@ class Lesson(models.Model):
     def __str__(self):
         return f"{self.order}. {self.title} ({self.course.title})"
 
+    # Set by the ``content`` setter and stored on save().
+    _new_content = None
+
+    @property
+    def content(self):
+        """The lesson body. Loads and decompresses ``body`` on first access."""
+        if self._new_content is not None:
+            return self._new_content
+        if self.body_id is None:
+            return ''
+        return self.body.text
+
+    @content.setter
+    def content(self, text):
+        self._new_content = text
+        self.summary = text[:LESSON_SUMMARY_LENGTH]
+
+    def save(self, *args, **kwargs):
+        if self._new_content is not None:
+            self.body = LessonContent.store(self._new_content)
+            self._new_content = None
+        super().save(*args, **kwargs)
+
 
 class Quiz(models.Model):
     lesson = models.OneToOneField(Lesson, on_delete=models.CASCADE, related_name="quiz")
     title = models.CharField(max_length=200)
+    # Denormalized count of questions, kept in sync by signals (see signals.py).
+    question_count = models.PositiveIntegerField(default=0, editable=False)
+    # Also bumped when a question or answer changes (see signals.py).
+    updated_at = models.DateTimeField(auto_now=True)
+    time_limit_minutes = models.PositiveIntegerField(
+        null=True, blank=True,
+        help_text="Makes this a timed exam: minutes allowed from the moment a student starts. "
+                  "Leave empty for an untimed quiz.",
+    )
 
     def __str__(self):
         return f"Quiz for {self.lesson.title}"
 
+    def save(self, *args, **kwargs):
+        # question_count is only written through F() updates from the question
+        # signals, so a full save from a stale instance must not write it back.
+        if not self._state.adding and not args and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'question_count'
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def is_timed(self):
+        return bool(self.time_limit_minutes)
+
 
 class Question(models.Model):
     quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name="questions")
@@ -82,6 +234,13 @@ class Enrollment(models.Model):
     student = models.ForeignKey(User, on_delete=models.CASCADE, related_name="enrollments", limit_choices_to={"role": "student"})
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="enrollments")
     date_enrolled = models.DateTimeField(auto_now_add=True)
+    # Precomputed by EnrollmentService.refresh_progress / record_activity so
+    # rosters filter on columns instead of aggregating LessonProgress.
+    completed_lessons = models.PositiveIntegerField(default=0, editable=False)
+    progress_bucket = models.PositiveSmallIntegerField(
+        choices=PROGRESS_BUCKETS, default=PROGRESS_NOT_STARTED, editable=False
+    )
+    last_activity_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     objects = models.Manager()  # Default manager
     
@@ -91,6 +250,12 @@ class Enrollment(models.Model):
         indexes = [
             models.Index(fields=['student', 'course']),
             models.Index(fields=['date_enrolled']),
+            models.Index(fields=['student', '-date_enrolled'], name='enrollment_student_recent_idx'),
+            # Keyset pagination of course rosters, optionally by progress bucket.
+            models.Index(fields=['course', 'date_enrolled', 'id'], name='enrollment_roster_idx'),
+            models.Index(
+                fields=['course', 'progress_bucket', 'date_enrolled', 'id'], name='enrollment_roster_bucket_idx'
+            ),
         ]
 
     def __str__(self):
@@ -105,6 +270,16 @@ class LessonProgress(models.Model):
 
     class Meta:
         unique_together = ["enrollment", "lesson"]
+        indexes = [
+            # Completed-lesson counts per enrollment only ever read completed rows.
+            models.Index(
+                fields=['enrollment'], condition=models.Q(completed=True), name='lessonprogress_completed_idx'
+            ),
+            # Completions by time, for rebuilding the statistics sketches a day at a time.
+            models.Index(
+                fields=['date_completed'], condition=models.Q(completed=True), name='lessonprogress_done_at_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.enrollment.student.username}'s progress in {self.lesson.title}"
@@ -114,6 +289,8 @@ class QuizAttempt(models.Model):
     student = models.ForeignKey(User, on_delete=models.CASCADE, related_name="quiz_attempts", limit_choices_to={"role": "student"})
     quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name="attempts")
     score = models.IntegerField(default=0)
+    # Number of questions in the quiz when the attempt was graded.
+    total_questions = models.PositiveIntegerField(null=True, blank=True)
     date_attempted = models.DateTimeField(auto_now_add=True)
 
     objects = models.Manager()  # Default manager
@@ -121,7 +298,7 @@ class QuizAttempt(models.Model):
     class Meta:
         ordering = ['-date_attempted']
         indexes = [
-            models.Index(fields=['student', 'quiz']),
+            models.Index(fields=['student', 'quiz', '-date_attempted'], name='quizattempt_student_quiz_idx'),
             models.Index(fields=['date_attempted']),
         ]
 
@@ -131,5 +308,161 @@ class QuizAttempt(models.Model):
     @property
     def percentage_score(self):
         """Calculate percentage score based on total questions."""
-        total_questions = self.quiz.questions.count()
+        total_questions = self.total_questions
+        if total_questions is None:
+            total_questions = self.quiz.question_count
         return (self.score / total_questions * 100) if total_questions > 0 else 0
+
+
+
+class QuizAttemptSummary(models.Model):
+    """Best and latest attempt of one student at one quiz.
+
+    Maintained on every write by ``AttemptHistoryService`` so pages can show a
+    student's standing with a single unique-key lookup instead of sorting
+    their attempt history.
+    """
+
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name="attempt_summaries")
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name="attempt_summaries")
+    attempt_count = models.PositiveIntegerField(default=0)
+    best_attempt = models.ForeignKey(QuizAttempt, on_delete=models.SET_NULL, null=True, related_name="+")
+    best_score = models.IntegerField(default=0)
+    latest_attempt = models.ForeignKey(QuizAttempt, on_delete=models.SET_NULL, null=True, related_name="+")
+    latest_score = models.IntegerField(default=0)
+    last_attempted_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ["student", "quiz"]
+
+    def __str__(self):
+        return f"{self.student_id} → {self.quiz_id}: best {self.best_score}, latest {self.latest_score}"
+
+
+class ExamSession(models.Model):
+    """A student's in-progress attempt at a quiz, from start until it is submitted.
+
+    For a timed quiz the server owns the clock: ``expires_at`` is fixed when
+    the exam starts. Untimed quizzes have no deadline and get a session when
+    the first answer is autosaved, so the draft survives an expired login.
+    Saved answers are appended to ``answer_log`` as ``question:answer,``
+    entries, later entries winning, so writing them is a single UPDATE that
+    never reads the row.
+    """
+
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name="exam_sessions")
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name="exam_sessions")
+    started_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(null=True, blank=True, help_text="Empty for untimed quizzes.")
+    answer_log = models.TextField(default='', blank=True, editable=False)
+    submitted_at = models.DateTimeField(null=True, blank=True)
+    attempt = models.OneToOneField(QuizAttempt, on_delete=models.SET_NULL, null=True, blank=True, related_name="exam_session")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['student', 'quiz'], condition=models.Q(submitted_at__isnull=True),
+                name='unique_open_exam_session',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at'], condition=models.Q(submitted_at__isnull=True), name='examsession_open_idx'),
+        ]
+
+    def __str__(self):
+        if self.expires_at is None:
+            return f"{self.student_id} → quiz {self.quiz_id} (draft)"
+        return f"{self.student_id} → quiz {self.quiz_id} (expires {self.expires_at:%Y-%m-%d %H:%M})"
+
+    @property
+    def answers(self):
+        """Saved answers as ``{question_id: answer_id}``."""
+        answers = {}
+        for entry in self.answer_log.split(','):
+            question_id, _, answer_id = entry.partition(':')
+            if question_id and answer_id:
+                answers[int(question_id)] = int(answer_id)
+        return answers
+
+    @staticmethod
+    def format_answers(answers):
+        """Encode ``{question_id: answer_id}`` as ``answer_log`` entries."""
+        return ''.join(f'{question_id}:{answer_id},' for question_id, answer_id in answers.items())
+
+    def seconds_left(self, now=None):
+        if self.expires_at is None:
+            return None
+        return max(0, int((self.expires_at - (now or timezone.now())).total_seconds()))
+
+    def is_expired(self, now=None):
+        return self.expires_at is not None and self.expires_at <= (now or timezone.now())
+
+
+class ReportJob(models.Model):
+    """A queued report computed by the background worker.
+
+    Jobs are stored in the database so that the web process only has to
+    insert a row; ``manage.py run_report_worker`` picks them up, runs the
+    registered task and stores the JSON result on the row.
+    """
+    task_name = models.CharField(max_length=100)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=JOB_STATUSES, default=JOB_PENDING)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="report_jobs"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['requested_by', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.task_name} #{self.pk} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in (JOB_SUCCEEDED, JOB_FAILED)
+
+
+class StatsSketch(models.Model):
+    """A serialized sketch of one metric for one course and day.
+
+    ``SketchService`` folds each quiz attempt and lesson completion into the
+    matching row as it is written, so platform-wide figures merge a few rows
+    instead of scanning attempts and progress. Quiz score sketches are kept
+    per quiz.
+    """
+
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="stats_sketches")
+    day = models.DateField()
+    metric = models.CharField(max_length=20, choices=SKETCH_METRICS)
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, null=True, blank=True, related_name="stats_sketches")
+    data = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['course', 'day', 'metric'], condition=models.Q(quiz__isnull=True),
+                name='unique_course_stats_sketch',
+            ),
+            models.UniqueConstraint(
+                fields=['quiz', 'day', 'metric'], condition=models.Q(quiz__isnull=False),
+                name='unique_quiz_stats_sketch',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['metric', 'day'], name='statssketch_metric_day_idx'),
+        ]
+
+    def __str__(self):
+        scope = f"quiz {self.quiz_id}" if self.quiz_id else f"course {self.course_id}"
+        return f"{self.metric} for {scope} on {self.day}"
@@ -0,0 +1,116 @@
+"""Custom paginators for the LMS application."""
+
+import base64
+import binascii
+
+from django.core.paginator import InvalidPage, Paginator
+from django.db import connections
+from django.db.models import Max, Q, QuerySet
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+# Below this many rows an exact COUNT(*) is cheap and worth its accuracy.
+ESTIMATE_THRESHOLD = 10000
+
+
+def estimate_row_count(model, using='default'):
+    """Return a cheap estimate of the number of rows in ``model``'s table.
+
+    PostgreSQL reads the planner statistics in ``pg_class``. Other
+    backends use the largest primary key, which is an index lookup and
+    overestimates only by the number of deleted rows. Returns None when
+    no estimate is available.
+    """
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row and row[0] >= 0:
+            return row[0]
+        return None
+
+    return model._base_manager.using(using).aggregate(max_pk=Max('pk'))['max_pk']
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that avoids COUNT(*) scans on large unfiltered querysets.
+
+    Filtered querysets are still counted exactly, since filters usually
+    narrow the result to an indexed range.
+    """
+
+    @cached_property
+    def count(self):
+        object_list = self.object_list
+        if isinstance(object_list, QuerySet) and not object_list.query.where:
+            estimate = estimate_row_count(object_list.model, using=object_list.db)
+            if estimate is not None and estimate >= ESTIMATE_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class KeysetPage:
+    """One page of a :class:`KeysetPaginator`."""
+
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+class KeysetPaginator:
+    """Newest-first pagination that seeks past the last row shown instead of using OFFSET.
+
+    Pages are addressed by an opaque cursor holding the ``(field, pk)`` of
+    the previous page's last row, so every page is the same short index
+    range scan however deep it is. Needs an index ending in ``(field, id)``
+    after the queryset's equality filters. There is no total count.
+    """
+
+    def __init__(self, queryset, per_page, field):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.field = field
+
+    def page(self, cursor=None):
+        queryset = self.queryset.order_by(f'-{self.field}', '-pk')
+        if cursor:
+            value, pk = self.decode_cursor(cursor)
+            # The plain bound lets the index seek; the OR breaks ties on pk.
+            queryset = queryset.filter(
+                Q(**{f'{self.field}__lt': value}) | Q(**{self.field: value, 'pk__lt': pk}),
+                **{f'{self.field}__lte': value},
+            )
+        rows = list(queryset[:self.per_page + 1])
+        next_cursor = None
+        if len(rows) > self.per_page:
+            rows = rows[:self.per_page]
+            next_cursor = self.encode_cursor(rows[-1])
+        return KeysetPage(rows, next_cursor)
+
+    def encode_cursor(self, obj):
+        raw = f'{getattr(obj, self.field).isoformat()}|{obj.pk}'
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+            value, pk = raw.rsplit('|', 1)
+            value, pk = parse_datetime(value), int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise InvalidPage("Invalid cursor.")
+        if value is None:
+            raise InvalidPage("Invalid cursor.")
+        return value, pk
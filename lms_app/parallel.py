@@ -0,0 +1,100 @@
+"""Process-pool execution of course analytics.
+
+Course ids are split into chunks and each chunk is computed in a worker
+process with its own database connection. The parent process merges the
+per-chunk dictionaries. Models are imported lazily so that this module
+can be unpickled by freshly spawned workers before Django is set up.
+"""
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def _init_worker():
+    """Prepare a worker process for database access."""
+    import django
+
+    # A no-op in forked workers; spawned workers start without app loading.
+    django.setup()
+
+
+def _analytics_for_chunk(course_ids):
+    from .utils import ReportingUtils
+
+    return ReportingUtils.get_courses_analytics(course_ids)
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def get_analytics_workers():
+    """Return the configured number of analytics worker processes."""
+    return getattr(settings, 'LMS_ANALYTICS_WORKERS', 0)
+
+
+def compute_course_analytics(course_ids, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Compute analytics for ``course_ids``, in parallel when workers > 0.
+
+    With ``workers`` of 0 (or a single chunk) everything runs in the
+    current process. Returns a dict keyed by course id.
+    """
+    from .utils import ReportingUtils
+
+    course_ids = list(course_ids)
+    if workers is None:
+        workers = get_analytics_workers()
+
+    chunks = list(_chunks(course_ids, chunk_size))
+    if workers <= 0 or len(chunks) <= 1:
+        return ReportingUtils.get_courses_analytics(course_ids)
+
+    # Forking copies only the calling thread, but with the memory of every
+    # other one, including their open database connections and any locks
+    # they hold. That is only safe from a single-threaded process; callers
+    # such as run_report_worker's thread pool get spawned workers instead.
+    if 'fork' in multiprocessing.get_all_start_methods() and threading.active_count() == 1:
+        context = multiprocessing.get_context('fork')
+        # Close this thread's connections so no worker inherits a live one;
+        # each opens its own on first query.
+        connections.close_all()
+    else:
+        context = multiprocessing.get_context('spawn')
+
+    analytics = {}
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as executor:
+        for chunk_result in executor.map(_analytics_for_chunk, chunks):
+            analytics.update(chunk_result)
+    return analytics
+
+
+def summarize_course_analytics(analytics):
+    """Merge per-course analytics into platform-wide totals.
+
+    The completion histograms add up; medians do not merge, so the summary
+    has none.
+    """
+    from .utils import merge_distributions
+
+    total_students = sum(data['total_students'] for data in analytics.values())
+    total_completed = sum(data['total_completed_lessons'] for data in analytics.values())
+    possible = sum(data['total_students'] * data['total_lessons'] for data in analytics.values())
+    total_attempts = sum(data['total_quiz_attempts'] for data in analytics.values())
+    total_score = sum(data['total_quiz_score'] for data in analytics.values())
+
+    return {
+        'total_courses': len(analytics),
+        'total_students': total_students,
+        'total_lessons': sum(data['total_lessons'] for data in analytics.values()),
+        'avg_completion_rate': (total_completed / possible * 100) if possible > 0 else 0,
+        'completion_distribution': merge_distributions(data['completion_distribution'] for data in analytics.values()),
+        'avg_quiz_score': (total_score / total_attempts) if total_attempts > 0 else 0,
+        'total_quiz_attempts': total_attempts,
+    }
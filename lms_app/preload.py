@@ -0,0 +1,113 @@
+"""Warm per-process caches before a WSGI server forks its workers.
+
+Everything here is process-local state that Django otherwise builds on the
+first request a worker serves: imported view modules, the populated URL
+resolver, compiled templates held by the cached template loader and the
+translation catalogs. Running it in the master process (e.g. gunicorn
+``--preload`` with ``LMS_PRELOAD = True``) lets forked workers inherit the
+warm state. Nothing here opens a database connection, so it is safe to
+call before forking.
+"""
+import time
+from importlib import import_module
+from pathlib import Path
+
+import django.forms
+from django.apps import apps
+from django.conf import settings
+from django.forms.renderers import get_default_renderer
+from django.template.loader import get_template
+from django.urls import get_resolver
+from django.utils import translation
+from django.utils.module_loading import import_string
+
+PRELOAD_MODULES = (
+    'lms_app.views',
+    'lms_app.forms',
+    'lms_app.mixins',
+    'lms_app.services',
+    'lms_app.utils',
+    'lms_app.cache',
+    'lms_app.templatetags.lms_app_extras',
+)
+
+
+def _template_names(directory):
+    root = Path(directory)
+    if not root.is_dir():
+        return []
+    return sorted(path.relative_to(root).as_posix() for path in root.rglob('*.html'))
+
+
+def preload_modules():
+    """Import view-layer modules and the classes named in settings.
+
+    Returns the number of modules and classes imported.
+    """
+    for name in PRELOAD_MODULES:
+        import_module(name)
+    import_module(settings.SESSION_ENGINE)
+    dotted_paths = [settings.MESSAGE_STORAGE, *settings.AUTHENTICATION_BACKENDS]
+    dotted_paths += [validator['NAME'] for validator in settings.AUTH_PASSWORD_VALIDATORS]
+    for dotted_path in dotted_paths:
+        import_string(dotted_path)
+    return len(PRELOAD_MODULES) + 1 + len(dotted_paths)
+
+
+def warm_url_resolvers():
+    """Populate the root resolver and every included resolver.
+
+    Returns the number of reversible names.
+    """
+    resolver = get_resolver()
+    return len(resolver.reverse_dict)
+
+
+def warm_templates():
+    """Compile all lms_app templates and the form widget templates.
+
+    Both the project engine and the form renderer wrap their loaders in
+    Django's cached loader, so each compiled template is kept for the life
+    of the process. Returns the number of templates compiled.
+    """
+    app_templates = _template_names(Path(apps.get_app_config('lms_app').path) / 'templates')
+    for name in app_templates:
+        get_template(name)
+
+    renderer = get_default_renderer()
+    form_root = Path(django.forms.__file__).parent / 'templates'
+    form_templates = [
+        name for name in _template_names(form_root) if name.startswith('django/forms/')
+    ]
+    for name in form_templates:
+        renderer.get_template(name)
+    return len(app_templates) + len(form_templates)
+
+
+def warm_translations():
+    """Load the gettext catalogs for the default language."""
+    with translation.override(settings.LANGUAGE_CODE):
+        translation.gettext('')
+    return 1
+
+
+PRELOAD_STEPS = (
+    ('modules', preload_modules),
+    ('urls', warm_url_resolvers),
+    ('templates', warm_templates),
+    ('translations', warm_translations),
+)
+
+
+def preload():
+    """Run every warmup step.
+
+    Returns:
+        dict: ``{step: {'seconds': float, 'items': int}}`` in execution order.
+    """
+    timings = {}
+    for name, step in PRELOAD_STEPS:
+        start = time.perf_counter()
+        items = step()
+        timings[name] = {'seconds': time.perf_counter() - start, 'items': items}
+    return timings
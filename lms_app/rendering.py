@@ -0,0 +1,143 @@
+"""Rendering of lesson bodies to sanitized HTML.
+
+Lesson bodies are written by instructors either as plain text or as HTML.
+Plain text gets the ``linebreaks`` treatment; HTML is reduced to an
+allow-list of tags and attributes, with links limited to safe schemes.
+Rendered output depends only on the text and ``LESSON_RENDERER_VERSION``,
+so it is cached on the content-addressed ``LessonContent`` row.
+"""
+
+import re
+from html import escape
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+from django.utils.html import linebreaks
+
+# Bump whenever the output for an unchanged text changes; stale renders are
+# then redone lazily or by ``warm_lesson_html``.
+LESSON_RENDERER_VERSION = 1
+
+ALLOWED_TAGS = {
+    'a', 'abbr', 'b', 'blockquote', 'br', 'code', 'dd', 'div', 'dl', 'dt', 'em', 'figcaption',
+    'figure', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'i', 'img', 'kbd', 'li', 'mark', 'ol', 'p',
+    'pre', 'q', 's', 'small', 'span', 'strong', 'sub', 'sup', 'table', 'tbody', 'td', 'tfoot', 'th',
+    'thead', 'tr', 'u', 'ul',
+}
+ALLOWED_ATTRIBUTES = {
+    '*': {'title'},
+    'a': {'href'},
+    'abbr': {'title'},
+    'code': {'class'},
+    'img': {'src', 'alt', 'width', 'height'},
+    'ol': {'start'},
+    'pre': {'class'},
+    'td': {'colspan', 'rowspan'},
+    'th': {'colspan', 'rowspan', 'scope'},
+}
+URL_ATTRIBUTES = {'href', 'src'}
+ALLOWED_URL_SCHEMES = {'', 'http', 'https', 'mailto'}
+VOID_TAGS = {'br', 'hr', 'img'}
+# Dropped together with everything inside them.
+DROPPED_TAGS = {'script', 'style', 'iframe', 'object', 'embed', 'template', 'noscript', 'textarea', 'select'}
+
+HTML_TAG = re.compile(r'<[A-Za-z/!]')
+
+
+class LessonHTMLSanitizer(HTMLParser):
+    """Streaming allow-list sanitizer; feed text and collect ``drain()`` output."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.output = []
+        self.open_tags = []
+        self.dropping = 0
+
+    def drain(self):
+        html = ''.join(self.output)
+        self.output.clear()
+        return html
+
+    def close(self):
+        super().close()
+        while self.open_tags:
+            self.output.append(f'</{self.open_tags.pop()}>')
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROPPED_TAGS:
+            self.dropping += 1
+            return
+        if self.dropping or tag not in ALLOWED_TAGS:
+            return
+        self.output.append(f'<{tag}{self._attributes(tag, attrs)}>')
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and tag not in DROPPED_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROPPED_TAGS:
+            self.dropping = max(self.dropping - 1, 0)
+            return
+        if self.dropping or tag not in self.open_tags:
+            return
+        # Close anything left open inside ``tag`` so the output stays balanced.
+        while self.open_tags:
+            open_tag = self.open_tags.pop()
+            self.output.append(f'</{open_tag}>')
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if not self.dropping:
+            self.output.append(escape(data, quote=False))
+
+    def _attributes(self, tag, attrs):
+        allowed = ALLOWED_ATTRIBUTES['*'] | ALLOWED_ATTRIBUTES.get(tag, set())
+        rendered = []
+        for name, value in attrs:
+            if name not in allowed or value is None:
+                continue
+            if name in URL_ATTRIBUTES and not is_safe_url(value):
+                continue
+            rendered.append(f' {name}="{escape(value)}"')
+        return ''.join(rendered)
+
+
+def is_safe_url(value):
+    try:
+        scheme = urlsplit(value.strip()).scheme
+    except ValueError:
+        return False
+    return scheme.lower() in ALLOWED_URL_SCHEMES
+
+
+def render_lesson_html(chunks):
+    """Render a lesson body, given as an iterable of text chunks, to safe HTML.
+
+    Yields HTML pieces as the input is consumed, so long bodies are never
+    held whole. Bodies whose first chunk contains no markup are treated as
+    plain text and rendered like the ``linebreaks`` filter.
+    """
+    chunks = iter(chunks)
+    first = next(chunks, '')
+    if not first:
+        return
+    if not HTML_TAG.search(first):
+        # Paragraph breaks can span chunks, so plain text is rendered whole.
+        yield linebreaks(first + ''.join(chunks), autoescape=True)
+        return
+
+    sanitizer = LessonHTMLSanitizer()
+    sanitizer.feed(first)
+    yield sanitizer.drain()
+    for chunk in chunks:
+        sanitizer.feed(chunk)
+        html = sanitizer.drain()
+        if html:
+            yield html
+    sanitizer.close()
+    yield sanitizer.drain()
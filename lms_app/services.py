@@ -1,6 +1,77 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import BigIntegerField, Case, Count, F, Max, Min, OuterRef, Q, QuerySet, Subquery, Value, When, Window
+from django.db.models.functions import Coalesce, Concat, Least, Length, RowNumber
+from django.db.models.lookups import GreaterThan, GreaterThanOrEqual, LessThan
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
-from .models import Enrollment, LessonProgress, QuizAttempt, Course, Lesson, Quiz, Answer
+from .cache import cache_is_shared, cached_lookup, get_cache, invalidate_tags
+from .constants import (
+    STUDENT_ROLE, JOB_PENDING, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED, PROGRESS_NOT_STARTED, PROGRESS_UNDER_HALF,
+    PROGRESS_OVER_HALF, PROGRESS_COMPLETED, SKETCH_ACTIVE_STUDENTS, SKETCH_QUIZ_SCORES, SKETCH_COMPLETION_HOURS,
+)
+from .models import (
+    Enrollment, LessonProgress, QuizAttempt, QuizAttemptSummary, Course, Lesson, Quiz, Question, Answer, ReportJob,
+    User, ExamSession, StatsSketch,
+)
+from .sketches import HyperLogLog, KLLSketch
+from .tasks import get_task
+from .versioning import tag_for
+
+ENROLLMENT_CHUNK_SIZE = 5000
+ATTEMPT_SUMMARY_BATCH_SIZE = 1000
+# Timed exams accept answers and submissions this long after the deadline,
+# to absorb network and queueing delay.
+EXAM_GRACE_SECONDS = 30
+# Upper bound on an exam session's answer log. Far above any real exam, it
+# only stops a runaway client from growing the row without limit.
+EXAM_ANSWER_LOG_LIMIT = 20000
+DRAFT_PREFIX = 'lms:draft:'
+# Spacing between consecutive ``Lesson.order`` ranks. A lesson moved between
+# two neighbours takes the midpoint, so about log2(gap) moves into the same
+# spot fit before the course has to be rebalanced.
+LESSON_ORDER_GAP = 1024
+# Percentiles reported from quantile sketches.
+SKETCH_QUANTILES = (0.25, 0.5, 0.75, 0.9)
+SKETCH_TYPES = {
+    SKETCH_ACTIVE_STUDENTS: HyperLogLog,
+    SKETCH_QUIZ_SCORES: KLLSketch,
+    SKETCH_COMPLETION_HOURS: KLLSketch,
+}
+
+
+def _before_deadline(expires_at, now=None):
+    """Whether a session expiring at ``expires_at`` (None for no deadline) still accepts answers."""
+    if expires_at is None:
+        return True
+    return expires_at + timedelta(seconds=EXAM_GRACE_SECONDS) > (now or timezone.now())
+
+
+def _in_batches(values):
+    """Split ``values`` so that ``__in`` lookups stay under the database's parameter limit."""
+    values = list(values)
+    size = connection.features.max_query_params or len(values) or 1
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _progress_bucket_expression():
+    """``Enrollment.progress_bucket`` computed from ``completed_lessons`` in SQL."""
+    total = Coalesce(
+        Subquery(
+            Lesson.objects.filter(course_id=OuterRef('course_id')).order_by().values('course_id')
+            .annotate(total=Count('pk')).values('total')
+        ),
+        0,
+    )
+    return Case(
+        When(completed_lessons=0, then=Value(PROGRESS_NOT_STARTED)),
+        When(GreaterThanOrEqual(F('completed_lessons'), total), then=Value(PROGRESS_COMPLETED)),
+        When(LessThan(F('completed_lessons') * 2, total), then=Value(PROGRESS_UNDER_HALF)),
+        default=Value(PROGRESS_OVER_HALF),
+    )
 
 
 class EnrollmentService:
@@ -14,6 +85,129 @@ class EnrollmentService:
         )
         return enrollment, created
     
+    @staticmethod
+    def bulk_enroll(roster, chunk_size=ENROLLMENT_CHUNK_SIZE):
+        """Enroll many students at once from ``(username, course_id)`` pairs.
+
+        Usernames and course ids are resolved with one query each (split only
+        where the database limits query parameters). Each chunk reads the
+        students' existing enrollments once and inserts only the new pairs
+        with ``bulk_create(ignore_conflicts=True)``, so the ``(student, course)``
+        unique constraint still absorbs concurrent enrollments.
+
+        Returns:
+            dict: Counts for ``rows``, ``duplicates``, ``unknown_users``,
+            ``not_students``, ``unknown_courses``, ``created`` and
+            ``already_enrolled``.
+        """
+        pairs = list(roster)
+        unique_pairs = list(dict.fromkeys(pairs))
+        stats = {
+            'rows': len(pairs),
+            'duplicates': len(pairs) - len(unique_pairs),
+            'unknown_users': 0,
+            'not_students': 0,
+            'unknown_courses': 0,
+            'created': 0,
+            'already_enrolled': 0,
+        }
+
+        users = {}
+        for batch in _in_batches({username for username, _ in unique_pairs}):
+            users.update(
+                (username, (pk, role))
+                for username, pk, role in User.objects.filter(username__in=batch).values_list('username', 'pk', 'role')
+            )
+        course_ids = set()
+        for batch in _in_batches({course_id for _, course_id in unique_pairs}):
+            course_ids.update(Course.objects.filter(pk__in=batch).values_list('pk', flat=True))
+
+        valid_pairs = []
+        for username, course_id in unique_pairs:
+            if username not in users:
+                stats['unknown_users'] += 1
+            elif users[username][1] != STUDENT_ROLE:
+                stats['not_students'] += 1
+            elif course_id not in course_ids:
+                stats['unknown_courses'] += 1
+            else:
+                valid_pairs.append((users[username][0], course_id))
+
+        # Grouped by student so each chunk reads a disjoint set of existing rows.
+        valid_pairs.sort()
+        for start in range(0, len(valid_pairs), chunk_size):
+            chunk = valid_pairs[start:start + chunk_size]
+            student_batches = list(_in_batches({student_id for student_id, _ in chunk}))
+            with transaction.atomic():
+                existing = set()
+                for batch in student_batches:
+                    existing.update(
+                        Enrollment.objects.filter(student_id__in=batch).values_list('student_id', 'course_id')
+                    )
+                new_enrollments = [
+                    Enrollment(student_id=student_id, course_id=course_id)
+                    for student_id, course_id in chunk
+                    if (student_id, course_id) not in existing
+                ]
+                created = 0
+                if new_enrollments:
+                    Enrollment.objects.bulk_create(new_enrollments, ignore_conflicts=True)
+                    created = sum(
+                        Enrollment.objects.filter(student_id__in=batch).count() for batch in student_batches
+                    ) - len(existing)
+            stats['created'] += created
+            stats['already_enrolled'] += len(chunk) - created
+
+        # bulk_create sends no post_save signals, so invalidate here. Only the
+        # per-student enrollment tags matter: pages carrying a progress tag are
+        # cached per enrolled student, and none can exist for a new enrollment.
+        invalidate_tags(*{f'enrollments:{student_id}' for student_id, _ in valid_pairs})
+        return stats
+
+    @staticmethod
+    def refresh_progress(enrollments):
+        """Recompute ``completed_lessons`` and ``progress_bucket``.
+
+        Args:
+            enrollments: A queryset of enrollments, or enrollment pks.
+
+        Two UPDATE statements, however many enrollments are refreshed; used
+        after progress changes and for a whole course when lessons are added
+        or removed.
+        """
+        if not isinstance(enrollments, QuerySet):
+            enrollments = Enrollment.objects.filter(pk__in=list(enrollments))
+        completed = LessonProgress.objects.filter(
+            enrollment=OuterRef('pk'), completed=True
+        ).order_by().values('enrollment').annotate(completed=Count('pk')).values('completed')
+        enrollments.update(completed_lessons=Coalesce(Subquery(completed), 0))
+        enrollments.update(progress_bucket=_progress_bucket_expression())
+
+    @staticmethod
+    def record_activity(enrollments, timestamp):
+        """Move ``last_activity_at`` forward to ``timestamp``; never backwards."""
+        enrollments.filter(Q(last_activity_at__isnull=True) | Q(last_activity_at__lt=timestamp)).update(
+            last_activity_at=timestamp
+        )
+
+    @staticmethod
+    def record_activities(timestamps):
+        """``record_activity`` for many enrollments in one UPDATE.
+
+        Args:
+            timestamps: ``{enrollment_id: timestamp}``.
+        """
+        if not timestamps:
+            return
+        Enrollment.objects.filter(pk__in=list(timestamps)).update(last_activity_at=Case(
+            *(
+                When(Q(pk=enrollment_id) & (Q(last_activity_at__isnull=True) | Q(last_activity_at__lt=timestamp)),
+                     then=Value(timestamp))
+                for enrollment_id, timestamp in timestamps.items()
+            ),
+            default=F('last_activity_at'),
+        ))
+
     @staticmethod
     def get_student_progress(enrollment):
         """Get progress data for a student's enrollment."""
@@ -28,6 +222,29 @@ class EnrollmentService:
             'completion_percentage': (completed_lessons / total_lessons * 100) if total_lessons > 0 else 0
         }
 
+    @staticmethod
+    def get_progress_version(student, course_id):
+        """Return ``(last_modified, parts)`` describing a student's progress in a course.
+
+        Changes whenever the student enrolls, completes a lesson or attempts
+        a quiz in the course. Non-students have no progress and cost no queries.
+        """
+        if getattr(student, 'role', None) != STUDENT_ROLE:
+            return None, ()
+
+        progress = Enrollment.objects.filter(student=student, course_id=course_id).aggregate(
+            enrollment=Max('pk'),
+            enrolled_at=Max('date_enrolled'),
+            completed_at=Max('lesson_progress__date_completed'),
+            completed=Count('lesson_progress', filter=Q(lesson_progress__completed=True)),
+        )
+        attempts = QuizAttempt.objects.filter(student=student, quiz__lesson__course_id=course_id).aggregate(
+            attempted_at=Max('date_attempted'), attempts=Count('pk')
+        )
+        timestamps = [progress['enrolled_at'], progress['completed_at'], attempts['attempted_at']]
+        last_modified = max((ts for ts in timestamps if ts is not None), default=None)
+        return last_modified, (progress['enrollment'], progress['completed'], attempts['attempts'], *timestamps)
+
 
 class LessonService:
     """Service for handling lesson-related business logic."""
@@ -50,30 +267,923 @@ class LessonService:
         
         return lesson_progress, created
 
+    @staticmethod
+    def mark_lessons_completed(student, completions):
+        """Mark many lessons completed at once, e.g. when an offline client syncs.
+
+        Args:
+            student: The student completing the lessons.
+            completions: Iterable of ``(lesson_id, completed_at)`` pairs;
+                ``completed_at`` may be None for "now". Future timestamps are
+                clamped to now, and duplicate lessons keep the earliest time.
+
+        Returns:
+            list[dict]: One ``{'lesson', 'status', 'date_completed'}`` per
+            distinct lesson, in input order. ``status`` is ``completed``,
+            ``already_completed``, ``not_enrolled`` or ``not_found``.
+
+        Uses one query to validate enrollment and read existing progress and
+        one upsert, whatever the batch size. Lessons that were already
+        completed keep their original completion time.
+        """
+        now = timezone.now()
+        requested = {}
+        for lesson_id, completed_at in completions:
+            completed_at = min(completed_at or now, now)
+            if lesson_id not in requested or completed_at < requested[lesson_id]:
+                requested[lesson_id] = completed_at
+        if not requested:
+            return []
+
+        enrollments = Enrollment.objects.filter(student=student, course=OuterRef('course_id'))
+        progress = LessonProgress.objects.filter(enrollment__student=student, lesson=OuterRef('pk'))
+        lessons = {
+            row['pk']: row
+            for row in Lesson.objects.filter(pk__in=requested).annotate(
+                enrollment_id=Subquery(enrollments.values('pk')[:1]),
+                progress_completed=Subquery(progress.values('completed')[:1]),
+                progress_date=Subquery(progress.values('date_completed')[:1]),
+            ).values('pk', 'course_id', 'enrollment_id', 'progress_completed', 'progress_date')
+        }
+
+        results = []
+        new_rows, existing_rows = [], []
+        for lesson_id, completed_at in requested.items():
+            lesson = lessons.get(lesson_id)
+            if lesson is None:
+                results.append({'lesson': lesson_id, 'status': 'not_found', 'date_completed': None})
+            elif lesson['enrollment_id'] is None:
+                results.append({'lesson': lesson_id, 'status': 'not_enrolled', 'date_completed': None})
+            elif lesson['progress_completed']:
+                results.append({
+                    'lesson': lesson_id, 'status': 'already_completed', 'date_completed': lesson['progress_date'],
+                })
+            else:
+                row = LessonProgress(
+                    enrollment_id=lesson['enrollment_id'], lesson_id=lesson_id,
+                    completed=True, date_completed=completed_at,
+                )
+                (new_rows if lesson['progress_completed'] is None else existing_rows).append(row)
+                results.append({'lesson': lesson_id, 'status': 'completed', 'date_completed': completed_at})
+
+        rows = new_rows + existing_rows
+        if rows:
+            with transaction.atomic():
+                if connection.features.supports_update_conflicts_with_target:
+                    LessonProgress.objects.bulk_create(
+                        rows,
+                        update_conflicts=True,
+                        unique_fields=['enrollment', 'lesson'],
+                        update_fields=['completed', 'date_completed'],
+                    )
+                else:
+                    LessonProgress.objects.bulk_create(new_rows, ignore_conflicts=True)
+                    for row in existing_rows:
+                        LessonProgress.objects.filter(
+                            enrollment_id=row.enrollment_id, lesson_id=row.lesson_id
+                        ).update(completed=True, date_completed=row.date_completed)
+            # bulk_create sends no post_save signals, so do their work here.
+            latest = {}
+            for row in rows:
+                latest[row.enrollment_id] = max(latest.get(row.enrollment_id, row.date_completed), row.date_completed)
+            EnrollmentService.refresh_progress(latest)
+            EnrollmentService.record_activities(latest)
+            SketchService.record_lesson_completions((row.enrollment_id, row.date_completed) for row in rows)
+            course_ids = {lessons[row.lesson_id]['course_id'] for row in rows}
+            invalidate_tags(*(f'progress:{student.pk}:{course_id}' for course_id in course_ids))
+
+        return results
+
+    @staticmethod
+    def get_lesson_progress(student, lesson_ids):
+        """Return ``{lesson_id: {'completed', 'date_completed'}}`` for the given lessons.
+
+        One query regardless of how many ids are passed; lessons the student
+        has not started are reported as not completed.
+        """
+        progress = {
+            lesson_id: {'completed': False, 'date_completed': None} for lesson_id in lesson_ids
+        }
+        rows = LessonProgress.objects.filter(
+            enrollment__student=student, lesson_id__in=progress
+        ).values_list('lesson_id', 'completed', 'date_completed')
+        for lesson_id, completed, date_completed in rows:
+            progress[lesson_id] = {'completed': completed, 'date_completed': date_completed}
+        return progress
+
+    @staticmethod
+    def next_lesson_order(course_id):
+        """Rank for a lesson appended to the end of a course."""
+        last = Lesson.objects.filter(course_id=course_id).aggregate(last=Max('order'))['last']
+        return LESSON_ORDER_GAP if last is None else max(last, 0) + LESSON_ORDER_GAP
+
+    @staticmethod
+    def get_lesson_position(lesson):
+        """1-based position of ``lesson`` within its course."""
+        return Lesson.objects.filter(course_id=lesson.course_id, order__lt=lesson.order).count() + 1
+
+    @staticmethod
+    def move_lesson(lesson, position):
+        """Move ``lesson`` to the 1-based ``position`` within its course.
+
+        ``Lesson.order`` holds gapped ranks, so the move reads the two
+        neighbours at the target position and writes only the moved lesson,
+        at their midpoint. If the neighbours are adjacent integers the course
+        is rebalanced first, which rewrites it with two statements.
+
+        Returns:
+            bool: Whether the lesson changed position.
+        """
+        with transaction.atomic():
+            LessonService._lock_course(lesson.course_id)
+            current = Lesson.objects.filter(pk=lesson.pk).values_list('order', flat=True).first()
+            if current is None:
+                return False
+            siblings = Lesson.objects.filter(course_id=lesson.course_id).exclude(pk=lesson.pk).order_by('order')
+            position = max(int(position), 1)
+            if position == 1:
+                before, after = 0, siblings.values_list('order', flat=True).first()
+            else:
+                neighbours = list(siblings.values_list('order', flat=True)[position - 2:position])
+                if not neighbours:
+                    # Past the end: append after the last lesson.
+                    neighbours = [siblings.aggregate(last=Max('order'))['last'] or 0]
+                before = neighbours[0]
+                after = neighbours[1] if len(neighbours) > 1 else None
+
+            if before < current and (after is None or current < after):
+                return False
+            if after is None:
+                order = before + LESSON_ORDER_GAP
+            elif after - before > 1:
+                order = (before + after) // 2
+            else:
+                ordered_ids = list(siblings.values_list('pk', flat=True))
+                ordered_ids.insert(position - 1, lesson.pk)
+                LessonService._write_lesson_orders(lesson.course_id, ordered_ids)
+                lesson.order = Lesson.objects.values_list('order', flat=True).get(pk=lesson.pk)
+                return True
+
+            now = timezone.now()
+            Lesson.objects.filter(pk=lesson.pk).update(order=order, updated_at=now)
+            LessonService._touch_course(lesson.course_id, now, [lesson.pk])
+        lesson.order = order
+        return True
+
+    @staticmethod
+    def reorder_lessons(course, lesson_ids):
+        """Set the whole syllabus order of ``course`` in one transaction.
+
+        Args:
+            course: The course, or its pk.
+            lesson_ids: Every lesson pk of the course, in the new order.
+
+        Raises:
+            ValueError: If ``lesson_ids`` is not exactly the course's lessons.
+        """
+        course_id = getattr(course, 'pk', course)
+        lesson_ids = [int(lesson_id) for lesson_id in lesson_ids]
+        with transaction.atomic():
+            LessonService._lock_course(course_id)
+            existing = set(Lesson.objects.filter(course_id=course_id).values_list('pk', flat=True))
+            if len(lesson_ids) != len(set(lesson_ids)) or set(lesson_ids) != existing:
+                raise ValueError("The new order must list every lesson of the course exactly once.")
+            LessonService._write_lesson_orders(course_id, lesson_ids)
+
+    @staticmethod
+    def rebalance_lessons(course):
+        """Respace a course's ranks ``LESSON_ORDER_GAP`` apart, keeping their order."""
+        course_id = getattr(course, 'pk', course)
+        with transaction.atomic():
+            LessonService._lock_course(course_id)
+            ordered_ids = list(Lesson.objects.filter(course_id=course_id).order_by('order').values_list('pk', flat=True))
+            LessonService._write_lesson_orders(course_id, ordered_ids)
+
+    @staticmethod
+    def _lock_course(course_id):
+        # Serializes reorders of one course; a no-op on SQLite, whose writes
+        # are serialized anyway.
+        list(Course.objects.select_for_update().filter(pk=course_id).values_list('pk', flat=True))
+
+    @staticmethod
+    def _touch_course(course_id, now, lesson_ids):
+        # Positions shown on other lessons' pages change too; bumping the
+        # course version refreshes their ETags. update() sends no signals,
+        # and the moved lessons' parent is known, so their tags are built here.
+        Course.objects.filter(pk=course_id).update(updated_at=now)
+        invalidate_tags(tag_for(Course, course_id), *(tag_for(Lesson, lesson_id) for lesson_id in lesson_ids))
+
+    @staticmethod
+    def _write_lesson_orders(course_id, ordered_ids):
+        """Rewrite ranks as ``LESSON_ORDER_GAP`` multiples in ``ordered_ids`` order.
+
+        Ranks are first moved to distinct negative values so the new ones never
+        collide with the old under the ``(course, order)`` unique constraint,
+        then set with one ``CASE`` update per batch.
+        """
+        now = timezone.now()
+        Lesson.objects.filter(course_id=course_id).update(order=-F('pk'))
+        Lesson.objects.bulk_update(
+            [
+                Lesson(pk=lesson_id, order=index * LESSON_ORDER_GAP, updated_at=now)
+                for index, lesson_id in enumerate(ordered_ids, start=1)
+            ],
+            ['order', 'updated_at'],
+        )
+        LessonService._touch_course(course_id, now, ordered_ids)
+
 
 class QuizService:
     """Service for handling quiz-related business logic."""
     
+    @staticmethod
+    def get_quiz_snapshot(quiz_id):
+        """Return everything needed to render and grade a quiz, or None if it does not exist.
+
+        The snapshot is built with three queries and kept in the shared cache
+        until the quiz, one of its questions or one of its answers changes, so
+        rendering and grading a cached quiz touch no quiz tables. It holds
+        ``questions`` (dicts with ``id``, ``text`` and ``answers`` as
+        ``(id, text)`` pairs), ``answer_ids`` and ``correct`` (both
+        ``{question_id: frozenset of answer ids}``), ``title`` and
+        ``time_limit_minutes``.
+        """
+        def build():
+            quiz = Quiz.objects.filter(pk=quiz_id).values('title', 'time_limit_minutes').first()
+            if quiz is None:
+                return None
+            questions = {
+                question_id: {'id': question_id, 'text': text, 'answers': []}
+                for question_id, text in Question.objects.filter(quiz_id=quiz_id).order_by('pk').values_list('pk', 'text')
+            }
+            correct = {question_id: set() for question_id in questions}
+            for answer_id, question_id, text, is_correct in Answer.objects.filter(
+                question__quiz_id=quiz_id
+            ).order_by('pk').values_list('pk', 'question_id', 'text', 'is_correct'):
+                questions[question_id]['answers'].append((answer_id, text))
+                if is_correct:
+                    correct[question_id].add(answer_id)
+            return {
+                **quiz,
+                'questions': list(questions.values()),
+                'answer_ids': {
+                    question['id']: frozenset(answer_id for answer_id, _ in question['answers'])
+                    for question in questions.values()
+                },
+                'correct': {question_id: frozenset(answer_ids) for question_id, answer_ids in correct.items()},
+            }
+
+        return cached_lookup('quiz-snapshot', [tag_for(Quiz, quiz_id)], build)
+
+    @staticmethod
+    def grade_answers(snapshot, answers):
+        """Score ``answers`` (``{question_id: answer_id}``) against a quiz snapshot.
+
+        Returns ``(score, total_questions)``; only a correct answer belonging
+        to its question scores.
+        """
+        correct = snapshot['correct']
+        score = sum(1 for question_id, answer_id in answers.items() if answer_id in correct.get(question_id, ()))
+        return score, len(snapshot['questions'])
+
     @staticmethod
     def calculate_quiz_score(quiz, answers_data):
-        """Calculate score for a quiz attempt."""
-        score = 0
-        total_questions = quiz.questions.count()
-        
-        for question in quiz.questions.all():
-            selected_answer_id = answers_data.get(f'question_{question.pk}')
-            if selected_answer_id:
-                selected_answer = get_object_or_404(Answer, pk=selected_answer_id)
-                if selected_answer.is_correct:
-                    score += 1
-        
-        return score, total_questions
+        """Calculate score for a quiz attempt.
+
+        ``answers_data`` maps ``question_<pk>`` to the selected answer pk. The
+        quiz is graded against its cached snapshot, without queries once the
+        snapshot is warm.
+        """
+        snapshot = QuizService.get_quiz_snapshot(quiz.pk)
+        answers = {}
+        for question in snapshot['questions']:
+            try:
+                answers[question['id']] = int(answers_data.get(f"question_{question['id']}"))
+            except (TypeError, ValueError):
+                continue
+        return QuizService.grade_answers(snapshot, answers)
     
     @staticmethod
-    def record_quiz_attempt(student, quiz, score):
-        """Record a quiz attempt."""
+    def record_quiz_attempt(student, quiz, score, total_questions=None):
+        """Record a quiz attempt along with the question count it was graded against."""
+        if total_questions is None:
+            total_questions = quiz.question_count
         return QuizAttempt.objects.create(
             student=student,
             quiz=quiz,
-            score=score
-        )
\ No newline at end of file
+            score=score,
+            total_questions=total_questions,
+        )
+
+    @staticmethod
+    def find_question_count_mismatches():
+        """Return quizzes whose stored question_count differs from the actual count."""
+        return Quiz.objects.annotate(actual_count=Count('questions')).exclude(
+            question_count=F('actual_count')
+        ).order_by('pk')
+
+    @staticmethod
+    def sync_question_counts():
+        """Recompute every stale ``Quiz.question_count`` and return how many were fixed."""
+        fixed = 0
+        for quiz in QuizService.find_question_count_mismatches():
+            Quiz.objects.filter(pk=quiz.pk).update(question_count=quiz.actual_count)
+            fixed += 1
+        return fixed
+
+
+
+class AttemptHistoryService:
+    """Best and latest quiz attempts per (student, quiz) pair.
+
+    History queries rank attempts with window functions so any number of
+    pairs is answered in one query. ``QuizAttemptSummary`` keeps the same
+    figures per pair, updated on every write, for single-row lookups.
+    """
+
+    @staticmethod
+    def ranked_attempts(attempts):
+        """Annotate ``attempts`` with their rank inside their (student, quiz) pair.
+
+        ``best_rank`` orders by score, earliest first on ties; ``latest_rank``
+        by date; ``attempt_count`` counts the pair's attempts. ``head`` is 1 on
+        the rows that are the pair's best or latest attempt.
+        """
+        pair = [F('student_id'), F('quiz_id')]
+        return attempts.order_by().annotate(
+            best_rank=Window(RowNumber(), partition_by=pair, order_by=[F('score').desc(), F('date_attempted'), F('pk')]),
+            latest_rank=Window(RowNumber(), partition_by=pair, order_by=[F('date_attempted').desc(), F('pk').desc()]),
+            attempt_count=Window(Count('pk'), partition_by=pair),
+            head=Least('best_rank', 'latest_rank'),
+        )
+
+    @staticmethod
+    def get_best_and_latest(attempts):
+        """Return ``{(student_id, quiz_id): {'best', 'latest', 'attempts'}}`` for the pairs in ``attempts``."""
+        history = {}
+        for attempt in AttemptHistoryService.ranked_attempts(attempts).filter(head=1).select_related('quiz'):
+            entry = history.setdefault((attempt.student_id, attempt.quiz_id), {'attempts': attempt.attempt_count})
+            if attempt.best_rank == 1:
+                entry['best'] = attempt
+            if attempt.latest_rank == 1:
+                entry['latest'] = attempt
+        return history
+
+    @staticmethod
+    def get_summary(student, quiz):
+        """Return the student's ``QuizAttemptSummary`` for ``quiz``, or None before the first attempt."""
+        return QuizAttemptSummary.objects.filter(student=student, quiz=quiz).first()
+
+    @staticmethod
+    def record_attempt(attempt):
+        """Fold a new attempt into its pair's summary.
+
+        One conditional UPDATE for a returning student, an INSERT for the first
+        attempt. The attempt is taken to be the pair's latest.
+        """
+        better = GreaterThan(Value(attempt.score), F('best_score'))
+        updated = QuizAttemptSummary.objects.filter(student_id=attempt.student_id, quiz_id=attempt.quiz_id).update(
+            attempt_count=F('attempt_count') + 1,
+            best_attempt=Case(
+                When(better, then=Value(attempt.pk)), default=F('best_attempt'), output_field=BigIntegerField()
+            ),
+            best_score=Case(When(better, then=Value(attempt.score)), default=F('best_score')),
+            latest_attempt=attempt.pk,
+            latest_score=attempt.score,
+            last_attempted_at=attempt.date_attempted,
+        )
+        if updated:
+            return
+        try:
+            with transaction.atomic():
+                QuizAttemptSummary.objects.create(
+                    student_id=attempt.student_id,
+                    quiz_id=attempt.quiz_id,
+                    attempt_count=1,
+                    best_attempt=attempt,
+                    best_score=attempt.score,
+                    latest_attempt=attempt,
+                    latest_score=attempt.score,
+                    last_attempted_at=attempt.date_attempted,
+                )
+        except IntegrityError:
+            # A concurrent first attempt created the summary; fold into it instead.
+            AttemptHistoryService.record_attempt(attempt)
+
+    @staticmethod
+    def rebuild_summaries(students=None, quizzes=None):
+        """Recompute the summaries of every pair within the given students and quizzes.
+
+        Used after attempts are deleted or bulk-created, which bypass
+        ``record_attempt``. Pairs left without attempts lose their summary.
+        Returns the number of summaries written.
+        """
+        scope = Q()
+        if students is not None:
+            scope &= Q(student__in=students)
+        if quizzes is not None:
+            scope &= Q(quiz__in=quizzes)
+
+        heads = AttemptHistoryService.ranked_attempts(QuizAttempt.objects.filter(scope)).filter(head=1)
+        written = 0
+        with transaction.atomic():
+            QuizAttemptSummary.objects.filter(scope).delete()
+            summaries = {}
+            for attempt in heads.order_by('student_id', 'quiz_id').iterator(chunk_size=ATTEMPT_SUMMARY_BATCH_SIZE):
+                key = (attempt.student_id, attempt.quiz_id)
+                summary = summaries.get(key)
+                if summary is None:
+                    if len(summaries) >= ATTEMPT_SUMMARY_BATCH_SIZE:
+                        written += len(QuizAttemptSummary.objects.bulk_create(summaries.values()))
+                        summaries.clear()
+                    summary = summaries[key] = QuizAttemptSummary(
+                        student_id=attempt.student_id, quiz_id=attempt.quiz_id, attempt_count=attempt.attempt_count,
+                    )
+                if attempt.best_rank == 1:
+                    summary.best_attempt_id, summary.best_score = attempt.pk, attempt.score
+                if attempt.latest_rank == 1:
+                    summary.latest_attempt_id, summary.latest_score = attempt.pk, attempt.score
+                    summary.last_attempted_at = attempt.date_attempted
+            written += len(QuizAttemptSummary.objects.bulk_create(summaries.values()))
+        return written
+
+
+
+class ExamService:
+    """In-progress quiz attempts: timed exam sessions, untimed drafts and submission."""
+
+    @staticmethod
+    def get_open_session(student, quiz):
+        session = ExamSession.objects.filter(student=student, quiz=quiz, submitted_at__isnull=True).first()
+        if session is not None:
+            session.student, session.quiz = student, quiz
+        return session
+
+    @staticmethod
+    def start_session(student, quiz):
+        """Return the student's open session for ``quiz``, starting the clock if there is none."""
+        session = ExamService.get_open_session(student, quiz)
+        if session is not None:
+            return session
+        try:
+            with transaction.atomic():
+                return ExamSession.objects.create(
+                    student=student, quiz=quiz,
+                    expires_at=timezone.now() + timedelta(minutes=quiz.time_limit_minutes),
+                )
+        except IntegrityError:
+            # The same student started the exam in another request.
+            return ExamService.get_open_session(student, quiz)
+
+    @staticmethod
+    def accepts_answers(session, now=None):
+        """Whether the session's deadline, plus the grace period, is still ahead."""
+        return _before_deadline(session.expires_at, now)
+
+    @staticmethod
+    def submit(session, answers=None):
+        """Grade and close ``session``, returning its attempt.
+
+        Graded on the saved answers, including those still buffered in the
+        cache. ``answers`` (``{question_id: answer_id}`` from the final form
+        post) are merged over them if they arrive in time; late submissions
+        are graded on what was saved before the deadline. Submitting a
+        session that is already closed returns its attempt.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            if not ExamSession.objects.filter(pk=session.pk, submitted_at__isnull=True).update(submitted_at=now):
+                return ExamSession.objects.select_related('attempt').get(pk=session.pk).attempt
+            session.refresh_from_db(fields=['answer_log'])
+            snapshot = QuizService.get_quiz_snapshot(session.quiz_id)
+            graded = AnswerDraftService.get_answers(session, snapshot)
+            if answers and ExamService.accepts_answers(session, now):
+                graded.update(answers)
+            score, total_questions = QuizService.grade_answers(snapshot, graded)
+            attempt = QuizService.record_quiz_attempt(session.student, session.quiz, score, total_questions)
+            # The log is compacted to the graded answers, which it keeps as the record of the attempt.
+            ExamSession.objects.filter(pk=session.pk).update(
+                attempt=attempt, answer_log=ExamSession.format_answers(graded),
+            )
+        AnswerDraftService.discard(session.student_id, session.quiz_id, snapshot)
+        session.submitted_at, session.attempt = now, attempt
+        return attempt
+
+    @staticmethod
+    def close_expired_sessions():
+        """Submit every session past its deadline and grace period; returns how many were closed."""
+        cutoff = timezone.now() - timedelta(seconds=EXAM_GRACE_SECONDS)
+        expired = ExamSession.objects.filter(submitted_at__isnull=True, expires_at__lte=cutoff)
+        closed = 0
+        for session in expired.select_related('student', 'quiz').iterator():
+            ExamService.submit(session)
+            closed += 1
+        return closed
+
+
+class AnswerDraftService:
+    """Autosaved quiz answers, buffered in the shared cache.
+
+    Each save sets one cache key per question, so saves never conflict and
+    touch no table. The buffer is written to the student's open
+    ``ExamSession`` at most once per ``LMS_DRAFT_FLUSH_SECONDS``, appending
+    only the answers that changed since the last write, and is merged in
+    when the quiz is submitted. Answers saved since the last write are lost
+    only if the cache loses them.
+
+    A process-local cache (``cache_is_shared()`` is False) cannot buffer
+    answers that another worker may grade, so each save is then written
+    straight to the session instead.
+    """
+
+    @staticmethod
+    def _key(student_id, quiz_id, suffix=''):
+        return f'{DRAFT_PREFIX}{student_id}:{quiz_id}{suffix}'
+
+    @staticmethod
+    def _answer_keys(student_id, quiz_id, snapshot):
+        return {
+            AnswerDraftService._key(student_id, quiz_id, f":q{question['id']}"): question['id']
+            for question in snapshot['questions']
+        }
+
+    @staticmethod
+    def get_buffered(student_id, quiz_id, snapshot):
+        """Answers saved since the session started, as ``{question_id: answer_id}``."""
+        if not cache_is_shared():
+            return {}
+        keys = AnswerDraftService._answer_keys(student_id, quiz_id, snapshot)
+        return {keys[key]: answer_id for key, answer_id in get_cache().get_many(keys).items()}
+
+    @staticmethod
+    def get_answers(session, snapshot=None):
+        """The session's written answers with the buffered ones merged over them."""
+        snapshot = snapshot or QuizService.get_quiz_snapshot(session.quiz_id)
+        answers = session.answers
+        answers.update(AnswerDraftService.get_buffered(session.student_id, session.quiz_id, snapshot))
+        return answers
+
+    @staticmethod
+    def open_draft(student, quiz_id, snapshot):
+        """Return ``(session_id, expires_at)`` of the session answers are saved to, or None.
+
+        Cached, so only the first save of a session queries. An untimed
+        quiz gets its draft session here, if the student is enrolled; a
+        timed exam has to be started from the quiz page.
+        """
+        cache = get_cache()
+        key = AnswerDraftService._key(student.pk, quiz_id)
+        draft = cache.get(key)
+        if draft is not None:
+            return draft
+        draft = ExamSession.objects.filter(
+            student=student, quiz_id=quiz_id, submitted_at__isnull=True,
+        ).values_list('pk', 'expires_at').first()
+        if draft is None:
+            if snapshot['time_limit_minutes'] or not Enrollment.objects.filter(
+                student=student, course__lessons__quiz__pk=quiz_id,
+            ).exists():
+                return None
+            try:
+                with transaction.atomic():
+                    draft = (ExamSession.objects.create(student=student, quiz_id=quiz_id, expires_at=None).pk, None)
+            except IntegrityError:
+                # Another save from the same student created it first.
+                return AnswerDraftService.open_draft(student, quiz_id, snapshot)
+        cache.set(key, draft, timeout=getattr(settings, 'LMS_DRAFT_BUFFER_TIMEOUT', 86400))
+        return draft
+
+    @staticmethod
+    def save_answer(student, quiz_id, question_id, answer_id, snapshot):
+        """Buffer one answer, writing the buffer out if the last write is old enough.
+
+        Returns False when the student has no session that accepts answers.
+        """
+        draft = AnswerDraftService.open_draft(student, quiz_id, snapshot)
+        if draft is None or not _before_deadline(draft[1]):
+            return False
+        cache = get_cache()
+        if not cache_is_shared():
+            if not AnswerDraftService._append(draft[0], {question_id: answer_id}):
+                cache.delete(AnswerDraftService._key(student.pk, quiz_id))
+                return False
+            return True
+        timeout = getattr(settings, 'LMS_DRAFT_BUFFER_TIMEOUT', 86400)
+        cache.set(AnswerDraftService._key(student.pk, quiz_id, f':q{question_id}'), answer_id, timeout=timeout)
+        flush_seconds = getattr(settings, 'LMS_DRAFT_FLUSH_SECONDS', 10)
+        if cache.add(AnswerDraftService._key(student.pk, quiz_id, ':flush'), 1, timeout=flush_seconds):
+            if not AnswerDraftService.flush(student.pk, quiz_id, draft[0], snapshot):
+                cache.delete(AnswerDraftService._key(student.pk, quiz_id))
+                return False
+        return True
+
+    @staticmethod
+    def flush(student_id, quiz_id, session_id, snapshot):
+        """Append buffered answers that changed since the last flush to the session.
+
+        A single UPDATE that does not read the session; returns False when
+        the session is closed or past its deadline.
+        """
+        cache = get_cache()
+        buffered = AnswerDraftService.get_buffered(student_id, quiz_id, snapshot)
+        written_key = AnswerDraftService._key(student_id, quiz_id, ':written')
+        written = cache.get(written_key, {})
+        changed = {
+            question_id: answer_id for question_id, answer_id in buffered.items()
+            if written.get(question_id) != answer_id
+        }
+        if not changed:
+            return True
+        updated = AnswerDraftService._append(session_id, changed)
+        if updated:
+            cache.set(written_key, buffered, timeout=getattr(settings, 'LMS_DRAFT_BUFFER_TIMEOUT', 86400))
+        return updated
+
+    @staticmethod
+    def _append(session_id, answers):
+        """Append ``answers`` to an open session's log; False if it is closed or past its deadline."""
+        cutoff = timezone.now() - timedelta(seconds=EXAM_GRACE_SECONDS)
+        return bool(ExamSession.objects.filter(
+            Q(expires_at__isnull=True) | Q(expires_at__gt=cutoff),
+            LessThan(Length('answer_log'), EXAM_ANSWER_LOG_LIMIT),
+            pk=session_id, submitted_at__isnull=True,
+        ).update(answer_log=Concat('answer_log', Value(ExamSession.format_answers(answers)))))
+
+    @staticmethod
+    def discard(student_id, quiz_id, snapshot):
+        """Drop the buffer of a submitted session."""
+        keys = list(AnswerDraftService._answer_keys(student_id, quiz_id, snapshot))
+        keys += [AnswerDraftService._key(student_id, quiz_id, suffix) for suffix in ('', ':flush', ':written')]
+        get_cache().delete_many(keys)
+
+
+class SketchService:
+    """Approximate platform-wide statistics kept in ``StatsSketch`` rows.
+
+    Each quiz attempt and lesson completion is folded into the sketches of
+    its course and day as it is written: distinct active students
+    (HyperLogLog), quiz score percentages and hours from enrollment to course
+    completion (KLL). Reports merge the rows of any set of courses and days,
+    reading a few rows per course and day however much activity there was.
+    See ``sketches.py`` for the error bounds.
+    """
+
+    @staticmethod
+    def _fold(folds):
+        """Add values to sketch rows; ``folds`` maps ``(metric, course_id, day, quiz_id)`` to values.
+
+        The rows are locked, read and written together, so one write costs
+        the same few queries however many courses and days it touches.
+        """
+        if not folds:
+            return
+        now = timezone.now()
+        with transaction.atomic():
+            candidates = StatsSketch.objects.select_for_update().filter(
+                metric__in={metric for metric, _, _, _ in folds},
+                course_id__in={course_id for _, course_id, _, _ in folds},
+                day__in={day for _, _, day, _ in folds},
+            ).values_list('pk', 'metric', 'course_id', 'day', 'quiz_id', 'data')
+            rows = {tuple(row[1:5]): (row[0], bytes(row[5])) for row in candidates.order_by()}
+            updated, created = [], []
+            for key, values in folds.items():
+                metric, course_id, day, quiz_id = key
+                sketch_class = SKETCH_TYPES[metric]
+                row = rows.get(key)
+                sketch = sketch_class.from_bytes(row[1]) if row is not None else sketch_class()
+                for value in values:
+                    sketch.add(value)
+                data = sketch.to_bytes()
+                if row is None:
+                    created.append(StatsSketch(course_id=course_id, day=day, metric=metric, quiz_id=quiz_id, data=data))
+                elif data != row[1]:
+                    # A student already counted that day leaves a HyperLogLog unchanged.
+                    updated.append(StatsSketch(pk=row[0], data=data, updated_at=now))
+            StatsSketch.objects.bulk_update(updated, ['data', 'updated_at'], batch_size=ATTEMPT_SUMMARY_BATCH_SIZE)
+            if not created:
+                return
+            try:
+                with transaction.atomic():
+                    StatsSketch.objects.bulk_create(created, batch_size=ATTEMPT_SUMMARY_BATCH_SIZE)
+                return
+            except IntegrityError:
+                pass
+        # A concurrent write created one of the rows; fold the new ones again.
+        SketchService._fold({
+            (row.metric, row.course_id, row.day, row.quiz_id): folds[(row.metric, row.course_id, row.day, row.quiz_id)]
+            for row in created
+        })
+
+    @staticmethod
+    def record_attempt(attempt):
+        """Fold a new quiz attempt into its course's active students and its quiz's scores."""
+        quiz = Quiz.objects.filter(pk=attempt.quiz_id).values('lesson__course_id', 'question_count').first()
+        if quiz is None:
+            return
+        course_id, day = quiz['lesson__course_id'], timezone.localdate(attempt.date_attempted)
+        folds = {(SKETCH_ACTIVE_STUDENTS, course_id, day, None): [attempt.student_id]}
+        total_questions = attempt.total_questions if attempt.total_questions is not None else quiz['question_count']
+        if total_questions:
+            folds[(SKETCH_QUIZ_SCORES, course_id, day, attempt.quiz_id)] = [attempt.score / total_questions * 100]
+        SketchService._fold(folds)
+
+    @staticmethod
+    def record_lesson_completions(completions):
+        """Fold lesson completions, ``(enrollment_id, date_completed)`` pairs, into the sketches.
+
+        Call after the enrollments' progress has been refreshed. An
+        enrollment that is now complete, and whose latest completion is among
+        ``completions``, also adds its time from enrollment to completion.
+        """
+        dates = {}
+        for enrollment_id, completed_at in completions:
+            if completed_at is not None:
+                dates.setdefault(enrollment_id, set()).add(completed_at)
+        if not dates:
+            return
+        enrollments = Enrollment.objects.filter(pk__in=list(dates)).annotate(
+            finished_at=Max('lesson_progress__date_completed', filter=Q(lesson_progress__completed=True)),
+        ).values_list('pk', 'student_id', 'course_id', 'date_enrolled', 'progress_bucket', 'finished_at')
+        folds = {}
+        for enrollment_id, student_id, course_id, enrolled_at, bucket, finished_at in enrollments:
+            for day in {timezone.localdate(completed_at) for completed_at in dates[enrollment_id]}:
+                folds.setdefault((SKETCH_ACTIVE_STUDENTS, course_id, day, None), []).append(student_id)
+            if bucket == PROGRESS_COMPLETED and finished_at in dates[enrollment_id]:
+                key = (SKETCH_COMPLETION_HOURS, course_id, timezone.localdate(finished_at), None)
+                folds.setdefault(key, []).append(SketchService._hours_between(enrolled_at, finished_at))
+        SketchService._fold(folds)
+
+    @staticmethod
+    def _hours_between(start, end):
+        return max(0.0, (end - start).total_seconds() / 3600)
+
+    @staticmethod
+    def _merge(metric, start, end, courses=None, group_by=None):
+        """Merge the ``metric`` rows of ``start``–``end`` into ``{group: sketch}``.
+
+        Rows are grouped by the ``group_by`` field, or all merged under None.
+        """
+        rows = StatsSketch.objects.filter(metric=metric, day__range=(start, end))
+        if courses is not None:
+            rows = rows.filter(course__in=courses)
+        fields = ('data',) if group_by is None else (group_by, 'data')
+        merged = {}
+        for row in rows.order_by().values_list(*fields).iterator():
+            group = None if group_by is None else row[0]
+            if group in merged:
+                merged[group].merge_bytes(bytes(row[-1]))
+            else:
+                merged[group] = SKETCH_TYPES[metric].from_bytes(bytes(row[-1]))
+        return merged
+
+    @staticmethod
+    def active_students(start, end, courses=None):
+        """Estimated distinct students active between ``start`` and ``end`` (dates, inclusive)."""
+        sketch = SketchService._merge(SKETCH_ACTIVE_STUDENTS, start, end, courses).get(None)
+        return sketch.count() if sketch is not None else 0
+
+    @staticmethod
+    def daily_active_students(start, end, courses=None):
+        """``[(day, estimated distinct active students)]`` for every day from ``start`` to ``end``."""
+        per_day = SketchService._merge(SKETCH_ACTIVE_STUDENTS, start, end, courses, group_by='day')
+        days = (start + timedelta(days=offset) for offset in range((end - start).days + 1))
+        return [(day, per_day[day].count() if day in per_day else 0) for day in days]
+
+    @staticmethod
+    def quiz_score_percentiles(start, end, courses=None, quantiles=SKETCH_QUANTILES):
+        """``{quiz_id: {'attempts', 'percentiles'}}`` of score percentages, for quizzes attempted in the range."""
+        return {
+            quiz_id: {'attempts': sketch.n, 'percentiles': sketch.quantiles(quantiles)}
+            for quiz_id, sketch in SketchService._merge(
+                SKETCH_QUIZ_SCORES, start, end, courses, group_by='quiz_id'
+            ).items()
+        }
+
+    @staticmethod
+    def completion_hours_percentiles(start, end, courses=None, quantiles=SKETCH_QUANTILES):
+        """``{'completions', 'percentiles'}`` of hours from enrollment to completion, for courses completed in the range."""
+        sketch = SketchService._merge(SKETCH_COMPLETION_HOURS, start, end, courses).get(None)
+        if sketch is None:
+            return {'completions': 0, 'percentiles': [None] * len(quantiles)}
+        return {'completions': sketch.n, 'percentiles': sketch.quantiles(quantiles)}
+
+    @staticmethod
+    def rebuild(start=None, end=None):
+        """Recompute the sketches of ``start``–``end`` (inclusive) from attempts and progress.
+
+        For data written without signals, such as by ``bulk_create()``. The
+        range defaults to the first recorded activity through today. Days are
+        rebuilt one at a time, so memory stays bounded by one day's sketches.
+        Returns the number of rows written.
+        """
+        if start is None:
+            first = [
+                QuizAttempt.objects.aggregate(first=Min('date_attempted'))['first'],
+                LessonProgress.objects.filter(completed=True).aggregate(first=Min('date_completed'))['first'],
+            ]
+            first = [timestamp for timestamp in first if timestamp is not None]
+            if not first:
+                return 0
+            start = timezone.localdate(min(first))
+        end = end or timezone.localdate()
+        written = 0
+        day = start
+        while day <= end:
+            written += SketchService._rebuild_day(day)
+            day += timedelta(days=1)
+        return written
+
+    @staticmethod
+    def _rebuild_day(day):
+        # Half-open datetime bounds rather than ``__date`` lookups, which
+        # cannot use the indexes on the timestamps.
+        start = timezone.make_aware(datetime.combine(day, time.min))
+        end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+        sketches = {}
+
+        def add(metric, course_id, value, quiz_id=None):
+            key = (course_id, metric, quiz_id)
+            if key not in sketches:
+                sketches[key] = SKETCH_TYPES[metric]()
+            sketches[key].add(value)
+
+        attempts = QuizAttempt.objects.filter(date_attempted__gte=start, date_attempted__lt=end).values_list(
+            'student_id', 'quiz_id', 'quiz__lesson__course_id', 'score',
+            Coalesce('total_questions', 'quiz__question_count'),
+        )
+        for student_id, quiz_id, course_id, score, total_questions in attempts.order_by().iterator():
+            add(SKETCH_ACTIVE_STUDENTS, course_id, student_id)
+            if total_questions:
+                add(SKETCH_QUIZ_SCORES, course_id, score / total_questions * 100, quiz_id)
+        completions = LessonProgress.objects.filter(
+            completed=True, date_completed__gte=start, date_completed__lt=end,
+        )
+        for student_id, course_id in completions.values_list(
+            'enrollment__student_id', 'enrollment__course_id',
+        ).order_by().iterator():
+            add(SKETCH_ACTIVE_STUDENTS, course_id, student_id)
+        # Only enrollments with a completion that day can have finished on it.
+        finished = Enrollment.objects.filter(
+            progress_bucket=PROGRESS_COMPLETED, pk__in=completions.values('enrollment_id'),
+        ).annotate(
+            finished_at=Max('lesson_progress__date_completed', filter=Q(lesson_progress__completed=True)),
+        ).filter(finished_at__gte=start, finished_at__lt=end).values_list('course_id', 'date_enrolled', 'finished_at')
+        for course_id, enrolled_at, finished_at in finished.order_by().iterator():
+            add(SKETCH_COMPLETION_HOURS, course_id, SketchService._hours_between(enrolled_at, finished_at))
+
+        with transaction.atomic():
+            StatsSketch.objects.filter(day=day).delete()
+            StatsSketch.objects.bulk_create([
+                StatsSketch(course_id=course_id, day=day, metric=metric, quiz_id=quiz_id, data=sketch.to_bytes())
+                for (course_id, metric, quiz_id), sketch in sketches.items()
+            ], batch_size=ATTEMPT_SUMMARY_BATCH_SIZE)
+        return len(sketches)
+
+
+class ReportJobService:
+    """Service for queuing and running background report jobs."""
+
+    @staticmethod
+    def enqueue(task_name, params=None, requested_by=None):
+        """Queue a report job for the worker and return it."""
+        get_task(task_name)  # Fail fast on unknown task names
+        return ReportJob.objects.create(
+            task_name=task_name,
+            params=params or {},
+            requested_by=requested_by,
+        )
+
+    @staticmethod
+    def claim_next_job():
+        """Atomically claim the oldest pending job, or return None.
+
+        The claim is a conditional UPDATE, so concurrent workers sharing
+        the same database never run a job twice.
+        """
+        while True:
+            job_id = ReportJob.objects.filter(status=JOB_PENDING).order_by(
+                'created_at', 'pk'
+            ).values_list('pk', flat=True).first()
+            if job_id is None:
+                return None
+
+            claimed = ReportJob.objects.filter(pk=job_id, status=JOB_PENDING).update(
+                status=JOB_RUNNING, started_at=timezone.now()
+            )
+            if claimed:
+                return ReportJob.objects.get(pk=job_id)
+
+    @staticmethod
+    def run_job(job):
+        """Run a claimed job and store its result or error."""
+        try:
+            result = get_task(job.task_name)(**job.params)
+        except Exception as exc:
+            job.status = JOB_FAILED
+            job.error = f"{type(exc).__name__}: {exc}"
+        else:
+            job.status = JOB_SUCCEEDED
+            job.result = result
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'result', 'error', 'finished_at'])
+        return job
@@ -0,0 +1,33 @@
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBSessionStore
+
+
+class SessionStore(CachedDBSessionStore):
+    """Cached database sessions that only write through when data changes.
+
+    Django flags a session as modified on any assignment, even when the
+    stored value is the same, and ``cached_db`` then rewrites the row.
+    This store remembers the serialized data it loaded and skips the
+    database write (but still refreshes the cache) when nothing changed.
+    New sessions and key rotations always hit the database.
+    """
+
+    _loaded_state = None
+
+    def _serialize(self, data):
+        return self.serializer().dumps(data)
+
+    def load(self):
+        data = super().load()
+        self._loaded_state = self._serialize(data)
+        return data
+
+    def save(self, must_create=False):
+        if self.session_key is None or must_create:
+            super().save(must_create=must_create)
+        else:
+            state = self._serialize(self._get_session())
+            if state != self._loaded_state:
+                super().save()
+            else:
+                self._cache.set(self.cache_key, self._session, self.get_expiry_age())
+        self._loaded_state = self._serialize(self._session)
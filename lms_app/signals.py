@@ -0,0 +1,142 @@
+"""Signal handlers for the LMS application."""
+
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import versioning
+from .cache import invalidate_tags
+from .constants import INSTRUCTOR_ROLE
+from .models import Answer, Course, Enrollment, Lesson, LessonProgress, Question, Quiz, QuizAttempt, User
+from .services import AttemptHistoryService, EnrollmentService, SketchService
+
+
+@receiver(post_save, sender=Question)
+def question_saved(sender, instance, created, **kwargs):
+    """Bump the quiz version and, for new questions, ``Quiz.question_count``."""
+    updates = {'updated_at': timezone.now()}
+    if created:
+        updates['question_count'] = F('question_count') + 1
+    Quiz.objects.filter(pk=instance.quiz_id).update(**updates)
+
+
+@receiver(post_delete, sender=Question)
+def question_deleted(sender, instance, **kwargs):
+    """Bump the quiz version and keep ``Quiz.question_count`` in sync."""
+    Quiz.objects.filter(pk=instance.quiz_id, question_count__gt=0).update(
+        question_count=F('question_count') - 1, updated_at=timezone.now()
+    )
+
+
+@receiver(post_save, sender=Answer)
+@receiver(post_delete, sender=Answer)
+def answer_changed(sender, instance, **kwargs):
+    """Bump the versions of the answer and everything above it, up to the course."""
+    ancestors = versioning.get_ancestors(instance)
+    if Quiz in ancestors:
+        Quiz.objects.filter(pk=ancestors[Quiz]).update(updated_at=timezone.now())
+    versioning.bump(instance, ancestors)
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_save, sender=Quiz)
+@receiver(post_delete, sender=Quiz)
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def content_changed(sender, instance, **kwargs):
+    """Bump the versions of a content node and everything above it, up to the course."""
+    versioning.bump(instance)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def course_changed(sender, instance, **kwargs):
+    """Invalidate cached course listings and the course's own pages."""
+    invalidate_tags('courses', versioning.tag_for(Course, instance.pk))
+
+
+@receiver(post_delete, sender=Lesson)
+def lesson_deleted(sender, instance, **kwargs):
+    """Later lessons move up a position, so bump the course version they share."""
+    Course.objects.filter(pk=instance.course_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=User)
+def instructor_changed(sender, instance, **kwargs):
+    """Instructor names appear on course pages, so refresh them on change."""
+    if instance.role == INSTRUCTOR_ROLE:
+        invalidate_tags('courses', f'instructor:{instance.pk}')
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def enrollment_changed(sender, instance, **kwargs):
+    invalidate_tags(f'enrollments:{instance.student_id}', f'progress:{instance.student_id}:{instance.course_id}')
+
+
+@receiver(post_save, sender=LessonProgress)
+@receiver(post_delete, sender=LessonProgress)
+def lesson_progress_changed(sender, instance, **kwargs):
+    enrollment = Enrollment.objects.filter(pk=instance.enrollment_id).values('student_id', 'course_id').first()
+    if enrollment is not None:
+        invalidate_tags(f"progress:{enrollment['student_id']}:{enrollment['course_id']}")
+
+
+@receiver(post_save, sender=LessonProgress)
+@receiver(post_delete, sender=LessonProgress)
+def refresh_enrollment_progress(sender, instance, **kwargs):
+    """Keep the enrollment's precomputed progress fields current."""
+    EnrollmentService.refresh_progress(Enrollment.objects.filter(pk=instance.enrollment_id))
+
+
+@receiver(post_save, sender=LessonProgress)
+def lesson_completion_activity(sender, instance, **kwargs):
+    if instance.completed and instance.date_completed:
+        EnrollmentService.record_activity(Enrollment.objects.filter(pk=instance.enrollment_id), instance.date_completed)
+
+
+@receiver(post_save, sender=QuizAttempt)
+def quiz_attempt_activity(sender, instance, created, **kwargs):
+    if created:
+        enrollments = Enrollment.objects.filter(student_id=instance.student_id, course__lessons__quiz=instance.quiz_id)
+        EnrollmentService.record_activity(enrollments, instance.date_attempted)
+
+
+@receiver(post_save, sender=QuizAttempt)
+def quiz_attempt_recorded(sender, instance, created, **kwargs):
+    if created:
+        AttemptHistoryService.record_attempt(instance)
+
+
+@receiver(post_save, sender=QuizAttempt)
+def quiz_attempt_sketched(sender, instance, created, **kwargs):
+    if created:
+        SketchService.record_attempt(instance)
+
+
+@receiver(post_save, sender=LessonProgress)
+def lesson_completion_sketched(sender, instance, **kwargs):
+    """Runs after ``refresh_enrollment_progress``, so a finished course is already marked completed."""
+    if instance.completed and instance.date_completed:
+        SketchService.record_lesson_completions([(instance.enrollment_id, instance.date_completed)])
+
+
+@receiver(post_delete, sender=QuizAttempt)
+def quiz_attempt_deleted(sender, instance, origin=None, **kwargs):
+    """Recompute the pair's summary when attempts themselves are deleted.
+
+    When a student, quiz or lesson is deleted the summary cascades with it,
+    so there is nothing to recompute.
+    """
+    if isinstance(origin, QuizAttempt) or getattr(origin, 'model', None) is QuizAttempt:
+        AttemptHistoryService.rebuild_summaries(students=[instance.student_id], quizzes=[instance.quiz_id])
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def refresh_course_progress(sender, instance, **kwargs):
+    """Adding or removing a lesson moves every enrollment's progress bucket."""
+    if kwargs.get('created', True):
+        EnrollmentService.refresh_progress(Enrollment.objects.filter(course_id=instance.course_id))
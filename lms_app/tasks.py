@@ -0,0 +1,51 @@
+"""Background report tasks for the LMS application.
+
+Tasks are plain functions registered by name. They receive the job's
+``params`` as keyword arguments and must return JSON-serializable data,
+which is stored on the ``ReportJob`` row by the worker.
+"""
+
+from .models import Course
+from .parallel import compute_course_analytics, summarize_course_analytics
+from .utils import ReportingUtils
+
+TASK_REGISTRY = {}
+
+
+def register_task(name):
+    """Register a function as a background task under ``name``."""
+    def decorator(func):
+        TASK_REGISTRY[name] = func
+        return func
+    return decorator
+
+
+def get_task(name):
+    """Return the task registered under ``name``."""
+    try:
+        return TASK_REGISTRY[name]
+    except KeyError:
+        raise LookupError(f"No background task registered as '{name}'.")
+
+
+@register_task('course_analytics')
+def course_analytics(course_id):
+    """Compute analytics for a single course."""
+    course = Course.objects.get(pk=course_id)
+    analytics = ReportingUtils.get_course_analytics(course)
+    analytics['course_id'] = course.pk
+    analytics['course_title'] = course.title
+    return analytics
+
+
+@register_task('platform_analytics')
+def platform_analytics(workers=None):
+    """Compute platform-wide totals across every course.
+
+    Uses the process pool configured by ``LMS_ANALYTICS_WORKERS`` unless
+    ``workers`` is given.
+    """
+    course_ids = list(Course.objects.order_by('pk').values_list('pk', flat=True))
+    summary = summarize_course_analytics(compute_course_analytics(course_ids, workers=workers))
+    summary['course_title'] = 'All courses'
+    return summary
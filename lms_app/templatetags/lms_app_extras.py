@@ -1,7 +1,106 @@
+import unicodedata
+
 from django import template
+from django.template.defaultfilters import stringfilter
+from django.urls import reverse
+from django.utils.html import conditional_escape
+from django.utils.text import Truncator
+from django.utils.translation import pgettext
 
 register = template.Library()
 
+# Reversed in place of the real pk, then split out of the resulting path.
+PK_URL_SENTINEL = 9081726354
+
+
 @register.filter(name='get_item')
 def get_item(dictionary, key):
     return dictionary.get(key)
+
+
+@register.filter(is_safe=True)
+@stringfilter
+def excerpt(value, arg):
+    """Same output as ``truncatechars``, without a per-character loop for ASCII text.
+
+    ``truncatechars`` walks the text in Python to skip combining characters,
+    which dominates rendering of long lesson and course lists. ASCII text has
+    no combining characters and is unchanged by normalization, so it can be
+    cut with a plain slice.
+    """
+    try:
+        length = int(arg)
+    except ValueError:
+        return value
+    truncator = Truncator(value)
+    if length < 1 or not value.isascii():
+        return truncator.chars(length)
+    if len(value) <= length:
+        return value
+    truncate = pgettext('String to return when truncating text', '%(truncated_text)s…')
+    suffix = truncator.add_truncation_text('', truncate)
+    suffix_len = sum(1 for char in suffix if not unicodedata.combining(char))
+    return truncator.add_truncation_text(value[:max(length - suffix_len, 0)], truncate)
+
+
+class PkUrlNode(template.Node):
+    def __init__(self, view_name, pk, kwarg, asvar):
+        self.view_name = view_name
+        self.pk = pk
+        self.kwarg = kwarg
+        self.asvar = asvar
+
+    def _url_parts(self, context, view_name):
+        # Cached on the outermost render context so the prefix survives
+        # across {% include %} boundaries but never outlives one render,
+        # keeping script prefix and urlconf changes between requests intact.
+        cache = context.render_context.dicts[0].setdefault(self, {})
+        if view_name not in cache:
+            path = reverse(view_name, kwargs={self.kwarg: PK_URL_SENTINEL})
+            parts = path.split(str(PK_URL_SENTINEL))
+            cache[view_name] = parts if len(parts) == 2 else None
+        return cache[view_name]
+
+    def render(self, context):
+        view_name = self.view_name.resolve(context)
+        pk = self.pk.resolve(context)
+        parts = self._url_parts(context, view_name)
+        if parts is not None and isinstance(pk, int) and pk >= 0:
+            url = f'{parts[0]}{pk}{parts[1]}'
+        else:
+            url = reverse(view_name, kwargs={self.kwarg: pk})
+        if self.asvar:
+            context[self.asvar] = url
+            return ''
+        return conditional_escape(url) if context.autoescape else url
+
+
+@register.tag
+def pk_url(parser, token):
+    """Reverse a URL that takes a single integer keyword, once per render.
+
+    Usage::
+
+        {% pk_url 'lesson_detail' lesson.pk %}
+        {% pk_url 'enroll_course' course.pk kwarg='course_pk' %}
+        {% pk_url 'take_quiz' quiz.pk as quiz_url %}
+
+    Equivalent to ``{% url view_name pk=value %}``, but inside loops the
+    URL is reversed once per render and the pk is substituted for every
+    later item, which removes most of the per-row cost of long lists.
+    """
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' takes a view name and a pk.")
+    asvar = None
+    if len(bits) >= 5 and bits[-2] == 'as':
+        asvar = bits[-1]
+        bits = bits[:-2]
+    kwarg = 'pk'
+    if len(bits) == 4:
+        if not bits[3].startswith('kwarg='):
+            raise template.TemplateSyntaxError(f"Unexpected argument to '{bits[0]}': {bits[3]}")
+        kwarg = bits[3][len('kwarg='):].strip('\'"')
+    elif len(bits) != 3:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' received too many arguments.")
+    return PkUrlNode(parser.compile_filter(bits[1]), parser.compile_filter(bits[2]), kwarg, asvar)
@@ -1,3 +1,724 @@
-from django.test import TestCase
+import json
+import random
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import versioning
+from .api import API_DEFAULT_LIMIT
+from .cache import (
+    TAG_PREFIX, cache_is_shared, cached_lookup, deferred_invalidation, get_cache, get_tag_versions, invalidate_tags,
+    make_key,
+)
+from .constants import INSTRUCTOR_ROLE, JOB_SUCCEEDED, STUDENT_ROLE
+from .models import (
+    Answer, Course, Enrollment, ExamSession, Lesson, LessonProgress, Question, Quiz, QuizAttempt, ReportJob,
+    StatsSketch, User,
+)
+from .services import (
+    LESSON_ORDER_GAP, SKETCH_QUANTILES, AnswerDraftService, ExamService, LessonService, QuizService,
+    ReportJobService, SketchService,
+)
+from .sketches import (
+    CHECKED_QUANTILES, HLL_ERROR_BOUND, KLL_RANK_ERROR_BOUND, HyperLogLog, KLLSketch, rank_error,
+)
+from .throttling import claim_submission
+from .versioning import tag_for
+
+
+def make_instructor(username='teacher'):
+    return User.objects.create_user(username, password='pw', role=INSTRUCTOR_ROLE)
+
+
+def make_course(lessons=2, questions=2, title='Course', instructor=None):
+    """A course with ``lessons`` lessons, each with a quiz of ``questions`` questions.
+
+    Taught by ``instructor``, or by a new one.
+    """
+    instructor = instructor or make_instructor(f'{title.lower()}-teacher')
+    course = Course.objects.create(title=title, description='About it.', instructor=instructor)
+    for number in range(1, lessons + 1):
+        lesson = Lesson.objects.create(
+            course=course, title=f'Lesson {number}', content=f'Body {number}', order=number * LESSON_ORDER_GAP,
+        )
+        quiz = Quiz.objects.create(lesson=lesson, title=f'Quiz {number}')
+        for question_number in range(1, questions + 1):
+            question = Question.objects.create(quiz=quiz, text=f'Question {question_number}')
+            Answer.objects.create(question=question, text='Right', is_correct=True)
+            Answer.objects.create(question=question, text='Wrong', is_correct=False)
+    return course
+
+
+def make_student(username='student', courses=()):
+    student = User.objects.create_user(username, password='pw', role=STUDENT_ROLE)
+    for course in courses:
+        Enrollment.objects.create(student=student, course=course)
+    return student
+
+
+class IsolatedCacheTestCase(TestCase):
+    """A TestCase run against caches of its own, emptied before each test.
+
+    'default' stays file-based, so code that asks whether the cache is
+    shared behaves as deployed, but lives in a temporary directory per test
+    class rather than in the project's ``.cache``.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cache_dir = tempfile.mkdtemp(prefix='lms-test-cache-')
+        cls.addClassCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        cache_settings = override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': cache_dir},
+            'local': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': cache_dir},
+        })
+        cache_settings.enable()
+        cls.addClassCleanup(cache_settings.disable)
+        super().setUpClass()
+
+    def setUp(self):
+        super().setUp()
+        for cache in caches.all():
+            cache.clear()
+
+
+class QuizQuestionCountTests(IsolatedCacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.quiz = make_course(lessons=1, questions=3).lessons.get().quiz
+
+    def test_signals_keep_count(self):
+        self.quiz.refresh_from_db()
+        self.assertEqual(self.quiz.question_count, 3)
+        self.quiz.questions.first().delete()
+        self.quiz.refresh_from_db()
+        self.assertEqual(self.quiz.question_count, 2)
+
+    def test_full_save_of_stale_instance_keeps_count(self):
+        stale = Quiz.objects.get(pk=self.quiz.pk)
+        Question.objects.create(quiz=self.quiz, text='Added later')
+        stale.time_limit_minutes = 1
+        stale.save()
+
+        self.quiz.refresh_from_db()
+        self.assertEqual(self.quiz.question_count, 4)
+        self.assertEqual(self.quiz.time_limit_minutes, 1)
+        call_command('sync_question_counts', '--check', stdout=StringIO())
+
+    def test_count_is_written_when_named(self):
+        self.quiz.question_count = 0
+        self.quiz.save(update_fields=['question_count'])
+        self.quiz.refresh_from_db()
+        self.assertEqual(self.quiz.question_count, 0)
+
+
+class ApiQueryCountTests(IsolatedCacheTestCase):
+    """Every API endpoint answers in a fixed number of queries, with more rows than fit on a page."""
+
+    rows = API_DEFAULT_LIMIT + 5
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = make_instructor()
+        cls.courses = [
+            make_course(lessons=1, title=f'Course {number}', instructor=cls.instructor) for number in range(cls.rows)
+        ]
+        cls.student = make_student(courses=cls.courses)
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        for course in cls.courses:
+            lesson = course.lessons.get()
+            LessonService.mark_lesson_completed(cls.student, lesson)
+            QuizService.record_quiz_attempt(cls.student, lesson.quiz, 1)
+        cls.lesson = cls.courses[0].lessons.get()
+
+    def assertQueries(self, count, user, method, url, data=None):
+        self.client.force_login(user)
+        # The first request loads the session into the cache.
+        self.client.get(reverse('api_course_list'))
+        with self.assertNumQueries(count):
+            if method == 'get':
+                response = self.client.get(url, data)
+            else:
+                response = getattr(self.client, method)(url, json.dumps(data), content_type='application/json')
+        self.assertLess(response.status_code, 300, response.content)
+        return response
+
+    def add_lessons(self, course, count):
+        """Append ``count`` lessons to ``course``; returns its lesson ids in order."""
+        for number in range(count):
+            Lesson.objects.create(
+                course=course, title=f'Extra {number}', content='More', order=LessonService.next_lesson_order(course.pk),
+            )
+        return list(course.lessons.order_by('order').values_list('pk', flat=True))
+
+    def test_course_list(self):
+        response = self.assertQueries(3, self.instructor, 'get', reverse('api_course_list'), {'include': 'instructor,lessons'})
+        self.assertEqual(len(response.json()['results']), API_DEFAULT_LIMIT)
+        self.assertIsNotNone(response.json()['next'])
+
+    def test_course_detail(self):
+        course = self.courses[0]
+        self.assertQueries(3, self.instructor, 'get', reverse('api_course_detail', args=[course.pk]), {'include': 'lessons'})
+
+    def test_course_create(self):
+        self.assertQueries(
+            2, self.instructor, 'post', reverse('api_course_list'), {'title': 'New', 'description': 'About it.'},
+        )
+
+    def test_course_update(self):
+        self.assertQueries(3, self.instructor, 'patch', reverse('api_course_detail', args=[self.courses[0].pk]), {'title': 'Renamed'})
+
+    def test_course_delete(self):
+        # Rows deleted in a cascade still run their own signal handlers, so the
+        # delete counts hold for this fixture's one lesson, two questions and four answers.
+        self.assertQueries(44, self.instructor, 'delete', reverse('api_course_detail', args=[self.courses[0].pk]))
+        self.assertFalse(Lesson.objects.filter(pk=self.lesson.pk).exists())
+
+    def test_lesson_list(self):
+        response = self.assertQueries(
+            2, self.instructor, 'get', reverse('api_lesson_list'), {'include': 'course,quiz', 'fields': 'title,content'},
+        )
+        self.assertEqual(len(response.json()['results']), API_DEFAULT_LIMIT)
+
+    def test_lesson_detail(self):
+        self.assertQueries(2, self.instructor, 'get', reverse('api_lesson_detail', args=[self.lesson.pk]), {'include': 'quiz'})
+
+    def test_lesson_create(self):
+        self.assertQueries(
+            8, self.instructor, 'post', reverse('api_lesson_list'),
+            {'course': self.courses[0].pk, 'title': 'New', 'content': 'Body'},
+        )
+
+    def test_lesson_update(self):
+        self.assertQueries(
+            6, self.instructor, 'patch', reverse('api_lesson_detail', args=[self.lesson.pk]), {'title': 'Renamed'},
+        )
+
+    def test_lesson_delete(self):
+        self.assertQueries(39, self.instructor, 'delete', reverse('api_lesson_detail', args=[self.lesson.pk]))
+
+    def test_lesson_order(self):
+        self.assertQueries(3, self.instructor, 'get', reverse('api_lesson_order', args=[self.courses[0].pk]))
+
+    def test_lesson_order_move(self):
+        course = self.courses[0]
+        order = self.add_lessons(course, 10)
+        response = self.assertQueries(
+            11, self.instructor, 'post', reverse('api_lesson_order', args=[course.pk]), {'lesson': order[-1], 'position': 1},
+        )
+        self.assertEqual(response.json()['lessons'], [order[-1], *order[:-1]])
+
+    def test_lesson_order_reorder(self):
+        course = self.courses[0]
+        order = self.add_lessons(course, 10)
+        response = self.assertQueries(
+            10, self.instructor, 'post', reverse('api_lesson_order', args=[course.pk]), {'lessons': order[::-1]},
+        )
+        self.assertEqual(response.json()['lessons'], order[::-1])
+
+    def test_quiz_list(self):
+        response = self.assertQueries(
+            4, self.instructor, 'get', reverse('api_quiz_list'), {'include': 'lesson,questions', 'limit': self.rows},
+        )
+        self.assertEqual(len(response.json()['results']), self.rows)
+
+    def test_quiz_detail(self):
+        self.assertQueries(
+            4, self.instructor, 'get', reverse('api_quiz_detail', args=[self.lesson.quiz.pk]), {'include': 'questions'},
+        )
+
+    def test_quiz_create(self):
+        lesson_id = self.add_lessons(self.courses[0], 1)[-1]
+        self.assertQueries(7, self.instructor, 'post', reverse('api_quiz_list'), {'lesson': lesson_id, 'title': 'New'})
+
+    def test_quiz_update(self):
+        self.assertQueries(
+            4, self.instructor, 'patch', reverse('api_quiz_detail', args=[self.lesson.quiz.pk]), {'time_limit_minutes': 30},
+        )
+
+    def test_quiz_delete(self):
+        self.assertQueries(28, self.instructor, 'delete', reverse('api_quiz_detail', args=[self.lesson.quiz.pk]))
+
+    def test_enrollment_list(self):
+        response = self.assertQueries(
+            3, self.student, 'get', reverse('api_enrollment_list'), {'include': 'course,student,lesson_progress'},
+        )
+        self.assertEqual(len(response.json()['results']), API_DEFAULT_LIMIT)
+
+    def test_enrollment_detail(self):
+        enrollment = Enrollment.objects.filter(student=self.student).first()
+        self.assertQueries(2, self.student, 'get', reverse('api_enrollment_detail', args=[enrollment.pk]), {'include': 'course'})
+
+    def test_enrollment_create(self):
+        course = make_course(lessons=1, title='Another')
+        self.assertQueries(6, self.student, 'post', reverse('api_enrollment_list'), {'course': course.pk})
+
+    def test_enrollment_ids_batch(self):
+        ids = ','.join(str(pk) for pk in Enrollment.objects.values_list('pk', flat=True))
+        response = self.assertQueries(2, self.student, 'get', reverse('api_enrollment_list'), {'ids': ids})
+        self.assertEqual(len(response.json()['results']), self.rows)
+
+    def test_enrollment_bulk(self):
+        students = [make_student(f'new-{number}') for number in range(self.rows)]
+        roster = [{'username': student.username, 'course': self.courses[0].pk} for student in students]
+        response = self.assertQueries(
+            8, self.admin, 'post', reverse('api_enrollment_bulk'), {'enrollments': roster},
+        )
+        self.assertEqual(response.json()['created'], self.rows)
+
+    def test_progress_list(self):
+        response = self.assertQueries(2, self.student, 'get', reverse('api_progress_list'), {'include': 'lesson'})
+        self.assertEqual(len(response.json()['results']), API_DEFAULT_LIMIT)
+
+    def test_progress_detail(self):
+        progress = LessonProgress.objects.filter(enrollment__student=self.student).first()
+        self.assertQueries(2, self.student, 'get', reverse('api_progress_detail', args=[progress.pk]))
+
+    def test_progress_create(self):
+        lesson_id = self.add_lessons(self.courses[0], 1)[-1]
+        self.assertQueries(16, self.student, 'post', reverse('api_progress_list'), {'lesson': lesson_id})
+
+    def test_progress_batch_get(self):
+        ids = ','.join(str(course.lessons.get().pk) for course in self.courses)
+        response = self.assertQueries(2, self.student, 'get', reverse('api_progress_batch'), {'lesson_ids': ids})
+        self.assertEqual(len(response.json()['results']), self.rows)
+
+    def test_progress_batch_post(self):
+        # The same number of queries for any batch size, across as many courses.
+        courses = iter(self.courses)
+        for size in (2, 20):
+            with self.subTest(size=size):
+                lesson_ids = [self.add_lessons(next(courses), 1)[-1] for _ in range(size)]
+                response = self.assertQueries(
+                    13, self.student, 'post', reverse('api_progress_batch'),
+                    {'completions': [{'lesson': lesson_id} for lesson_id in lesson_ids]},
+                )
+                self.assertEqual([result['status'] for result in response.json()['results']], ['completed'] * size)
+
+    def test_attempt_list(self):
+        response = self.assertQueries(2, self.student, 'get', reverse('api_attempt_list'), {'include': 'quiz,student'})
+        self.assertEqual(len(response.json()['results']), API_DEFAULT_LIMIT)
+
+    def test_attempt_create(self):
+        quiz = self.lesson.quiz
+        answers = {str(question.pk): question.answers.get(is_correct=True).pk for question in quiz.questions.all()}
+        QuizService.get_quiz_snapshot(quiz.pk)
+        response = self.assertQueries(
+            12, self.student, 'post', reverse('api_attempt_list'), {'quiz': quiz.pk, 'answers': answers},
+        )
+        self.assertEqual(response.json()['score'], 2)
+
+    def test_attempt_detail(self):
+        attempt = QuizAttempt.objects.filter(student=self.student).first()
+        self.assertQueries(2, self.student, 'get', reverse('api_attempt_detail', args=[attempt.pk]), {'include': 'quiz'})
+
+
+class ApiQuizSubmissionTests(IsolatedCacheTestCase):
+    def setUp(self):
+        super().setUp()
+        course = make_course(lessons=1, questions=2)
+        self.quiz = course.lessons.get().quiz
+        self.student = make_student(courses=[course])
+        self.client.force_login(self.student)
+        self.answers = {
+            str(question.pk): question.answers.get(is_correct=True).pk for question in self.quiz.questions.all()
+        }
+
+    def submit(self, key=None, answers=None):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+        return self.client.post(
+            reverse('api_attempt_list'),
+            json.dumps({'quiz': self.quiz.pk, 'answers': self.answers if answers is None else answers}),
+            content_type='application/json', **headers,
+        )
+
+    def test_submissions_are_rate_limited(self):
+        statuses = [self.submit().status_code for _ in range(6)]
+        self.assertEqual(statuses, [201] * 3 + [429] * 3)
+        self.assertEqual(QuizAttempt.objects.count(), 3)
+        self.assertGreater(int(self.submit()['Retry-After']), 0)
+
+    def test_idempotency_key_returns_the_recorded_attempt(self):
+        first = self.submit('retry-me')
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(first.json()['score'], 2)
+        for _ in range(5):
+            again = self.submit('retry-me', answers={})
+            self.assertEqual(again.status_code, 201)
+            self.assertEqual(again.json()['id'], first.json()['id'])
+        self.assertEqual(QuizAttempt.objects.count(), 1)
+        # Replays do not use up the rate limit.
+        self.assertEqual(self.submit('another').status_code, 201)
+
+    def test_idempotency_key_is_seen_by_other_workers(self):
+        first = self.submit('retry-me')
+        # Another worker process has its own local cache but the same shared one.
+        caches['local'].clear()
+        again = self.submit('retry-me', answers={})
+        self.assertEqual(again.json()['id'], first.json()['id'])
+        self.assertEqual(QuizAttempt.objects.count(), 1)
+
+    def test_pending_key_conflicts(self):
+        claim_submission(f'quiz:{self.student.pk}:{self.quiz.pk}', 'in-flight')
+        self.assertEqual(self.submit('in-flight').status_code, 409)
+        self.assertFalse(QuizAttempt.objects.exists())
+
+
+class ApiExamSubmissionTests(IsolatedCacheTestCase):
+    def setUp(self):
+        super().setUp()
+        course = make_course(lessons=1, questions=2)
+        self.quiz = course.lessons.get().quiz
+        self.quiz.time_limit_minutes = 10
+        self.quiz.save()
+        self.student = make_student(courses=[course])
+        self.client.force_login(self.student)
+        self.questions = list(self.quiz.questions.all())
+        self.answers = {str(question.pk): question.answers.get(is_correct=True).pk for question in self.questions}
+
+    def submit(self, key=None):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+        return self.client.post(
+            reverse('api_attempt_list'), json.dumps({'quiz': self.quiz.pk, 'answers': self.answers}),
+            content_type='application/json', **headers,
+        )
+
+    def test_exam_without_session_is_rejected(self):
+        response = self.submit('exam')
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(QuizAttempt.objects.exists())
+        # The rejected post released its key, so the retry is graded.
+        ExamService.start_session(self.student, self.quiz)
+        self.assertEqual(self.submit('exam').status_code, 201)
+
+    def test_exam_is_graded_through_its_session(self):
+        session = ExamService.start_session(self.student, self.quiz)
+        response = self.submit()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['score'], 2)
+        session.refresh_from_db()
+        self.assertEqual(session.attempt_id, response.json()['id'])
+        # The session is closed, so the exam cannot be submitted again.
+        self.assertEqual(self.submit().status_code, 409)
+        self.assertEqual(QuizAttempt.objects.count(), 1)
+
+    def test_late_exam_is_graded_on_saved_answers(self):
+        session = ExamService.start_session(self.student, self.quiz)
+        snapshot = QuizService.get_quiz_snapshot(self.quiz.pk)
+        question = self.questions[0]
+        AnswerDraftService.save_answer(
+            self.student, self.quiz.pk, question.pk, question.answers.get(is_correct=True).pk, snapshot,
+        )
+        ExamSession.objects.filter(pk=session.pk).update(expires_at=timezone.now() - timedelta(hours=1))
+
+        response = self.submit()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['score'], 1)
+        self.assertFalse(ExamSession.objects.filter(submitted_at__isnull=True).exists())
+
+
+class AnswerDraftTests(IsolatedCacheTestCase):
+    def setUp(self):
+        super().setUp()
+        course = make_course(lessons=1, questions=2)
+        self.quiz = course.lessons.get().quiz
+        self.student = make_student(courses=[course])
+        self.snapshot = QuizService.get_quiz_snapshot(self.quiz.pk)
+        self.choices = {
+            question.pk: question.answers.get(is_correct=True).pk for question in self.quiz.questions.all()
+        }
+
+    def save_all(self):
+        for question_id, answer_id in self.choices.items():
+            self.assertTrue(AnswerDraftService.save_answer(
+                self.student, self.quiz.pk, question_id, answer_id, self.snapshot,
+            ))
+        return ExamSession.objects.get(student=self.student, quiz=self.quiz)
+
+    def test_default_cache_is_shared(self):
+        self.assertTrue(cache_is_shared())
+
+    def test_shared_cache_buffers_answers(self):
+        session = self.save_all()
+        # Only the first save wrote the draft; the second waits in the cache.
+        self.assertEqual(len(session.answers), 1)
+        self.assertEqual(AnswerDraftService.get_answers(session), self.choices)
+
+    @override_settings(LMS_CACHE_ALIAS='local')
+    def test_process_local_cache_writes_through(self):
+        self.assertFalse(cache_is_shared())
+        session = self.save_all()
+        self.assertEqual(session.answers, self.choices)
+        self.assertEqual(AnswerDraftService.get_buffered(self.student.pk, self.quiz.pk, self.snapshot), {})
+        # Once the draft is open, each save is one UPDATE.
+        question_id, answer_id = next(iter(self.choices.items()))
+        with self.assertNumQueries(1):
+            AnswerDraftService.save_answer(self.student, self.quiz.pk, question_id, answer_id, self.snapshot)
+        session.student, session.quiz = self.student, self.quiz
+        self.assertEqual(ExamService.submit(session).score, 2)
+
+
+def cached_tree(course_id):
+    """The course's content tree, cached under the course's version tag."""
+    def build():
+        return [
+            (lesson.title, [
+                (question.text, [answer.text for answer in question.answers.order_by('pk')])
+                for question in lesson.quiz.questions.order_by('pk')
+            ])
+            for lesson in Lesson.objects.filter(course_id=course_id).order_by('order')
+        ]
+
+    return cached_lookup('test-tree', [tag_for(Course, course_id)], build)
+
+
+class ContentVersionTests(IsolatedCacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.course = make_course(lessons=2, questions=1)
+        self.lessons = list(self.course.lessons.order_by('order'))
+        self.quiz = self.lessons[0].quiz
+        self.question = self.quiz.questions.get()
+        self.answer = self.question.answers.get(is_correct=True)
+        self.tree = cached_tree(self.course.pk)
+
+    def test_answer_save_refreshes_course_and_quiz(self):
+        QuizService.get_quiz_snapshot(self.quiz.pk)
+        self.answer.text = 'Edited'
+        self.answer.save()
+        self.assertEqual(cached_tree(self.course.pk)[0][1][0][1][0], 'Edited')
+        self.assertIn((self.answer.pk, 'Edited'), QuizService.get_quiz_snapshot(self.quiz.pk)['questions'][0]['answers'])
+
+    def test_answer_delete(self):
+        self.answer.delete()
+        self.assertEqual(cached_tree(self.course.pk)[0][1][0][1], ['Wrong'])
+
+    def test_question_save_and_delete(self):
+        Question.objects.create(quiz=self.quiz, text='Added')
+        self.assertEqual([text for text, _ in cached_tree(self.course.pk)[0][1]], ['Question 1', 'Added'])
+        self.question.delete()
+        self.assertEqual([text for text, _ in cached_tree(self.course.pk)[0][1]], ['Added'])
+
+    def test_lesson_save_and_delete(self):
+        self.lessons[1].title = 'Renamed'
+        self.lessons[1].save()
+        self.assertEqual([title for title, _ in cached_tree(self.course.pk)], ['Lesson 1', 'Renamed'])
+        self.lessons[0].delete()
+        self.assertEqual([title for title, _ in cached_tree(self.course.pk)], ['Renamed'])
+
+    def test_unrelated_course_stays_cached(self):
+        other = make_course(lessons=1, title='Other', instructor=self.course.instructor)
+        cached_tree(other.pk)
+        self.answer.delete()
+        with self.assertNumQueries(0):
+            cached_tree(other.pk)
+
+    def test_bulk_update_needs_bump_queryset(self):
+        answers = Answer.objects.filter(question__quiz__lesson__course=self.course)
+        answers.update(text='Bulk')
+        # update() sends no signals, so the tree is stale until bumped.
+        self.assertEqual(cached_tree(self.course.pk), self.tree)
+        versioning.bump_queryset(answers)
+        self.assertEqual(cached_tree(self.course.pk)[0][1][0][1], ['Bulk', 'Bulk'])
+
+    def test_bump_nodes(self):
+        Lesson.objects.filter(pk=self.lessons[0].pk).update(title='Bulk')
+        versioning.bump_nodes(Lesson, [self.lessons[0].pk])
+        self.assertEqual(cached_tree(self.course.pk)[0][0], 'Bulk')
+
+    def test_move_lesson(self):
+        LessonService.move_lesson(self.lessons[1], 1)
+        self.assertEqual([title for title, _ in cached_tree(self.course.pk)], ['Lesson 2', 'Lesson 1'])
+
+    def test_reorder_lessons(self):
+        LessonService.reorder_lessons(self.course, [self.lessons[1].pk, self.lessons[0].pk])
+        self.assertEqual([title for title, _ in cached_tree(self.course.pk)], ['Lesson 2', 'Lesson 1'])
+
+    def test_evicted_course_tag_does_not_revive_tree_or_snapshot(self):
+        tag_keys = [TAG_PREFIX + tag_for(Course, self.course.pk), TAG_PREFIX + tag_for(Quiz, self.quiz.pk)]
+        get_cache().delete_many(tag_keys)
+        cached_tree(self.course.pk)
+        QuizService.get_quiz_snapshot(self.quiz.pk)
+        self.answer.text = 'Edited'
+        self.answer.save()
+        # Evicted again, while the tree and snapshot from before the edit are still cached.
+        get_cache().delete_many(tag_keys)
+        self.assertEqual(cached_tree(self.course.pk)[0][1][0][1][0], 'Edited')
+        self.assertIn((self.answer.pk, 'Edited'), QuizService.get_quiz_snapshot(self.quiz.pk)['questions'][0]['answers'])
+
+    def test_deferred_invalidation_bumps_each_tag_once(self):
+        tag = tag_for(Course, self.course.pk)
+        (version,) = get_tag_versions([tag])
+        with self.captureOnCommitCallbacks() as callbacks:
+            with deferred_invalidation():
+                for answer in Answer.objects.filter(question__quiz__lesson__course=self.course):
+                    answer.text = 'Deferred'
+                    answer.save()
+                self.assertEqual(get_tag_versions([tag]), (version,))
+        self.assertEqual(get_tag_versions([tag]), (version + 1,))
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(cached_tree(self.course.pk)[0][1][0][1], ['Deferred', 'Deferred'])
+
+    def test_commit_bumps_again(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.answer.text = 'Committed'
+                self.answer.save()
+                # A request that read before the commit caches the old tree
+                # under the version bumped by the save.
+                get_cache().set(make_key('test-tree', [tag_for(Course, self.course.pk)]), self.tree)
+                self.assertEqual(cached_tree(self.course.pk), self.tree)
+        self.assertEqual(cached_tree(self.course.pk)[0][1][0][1][0], 'Committed')
+
+
+class SketchTests(TestCase):
+    def test_hyperloglog_count_is_within_bounds(self):
+        for size in (0, 10, 1000, 50000):
+            sketch = HyperLogLog()
+            for value in range(size):
+                sketch.add(value)
+                sketch.add(value)
+            self.assertLessEqual(abs(sketch.count() - size), HLL_ERROR_BOUND * size)
+
+    def test_hyperloglog_merge_matches_one_sketch(self):
+        whole, parts = HyperLogLog(), [HyperLogLog() for _ in range(4)]
+        for value in range(20000):
+            whole.add(value)
+            parts[value % 4].add(value)
+            parts[(value + 1) % 4].add(value)
+        merged = HyperLogLog()
+        for part in parts:
+            merged.merge(part)
+        self.assertEqual(merged.registers, whole.registers)
+        from_bytes = HyperLogLog()
+        for part in parts:
+            from_bytes.merge_bytes(part.to_bytes())
+        self.assertEqual(from_bytes.registers, whole.registers)
+
+    def test_hyperloglog_round_trip(self):
+        for size in (0, 50, 20000):
+            sketch = HyperLogLog()
+            for value in range(size):
+                sketch.add(f'student-{value}')
+            data = sketch.to_bytes()
+            # Sparse while few registers are set.
+            self.assertEqual(len(data) < len(sketch.registers), size < 100)
+            restored = HyperLogLog.from_bytes(data)
+            self.assertEqual(restored.registers, sketch.registers)
+            self.assertEqual(restored.count(), sketch.count())
+
+    def test_hyperloglog_rejects_other_precisions(self):
+        with self.assertRaises(ValueError):
+            HyperLogLog().merge(HyperLogLog(10))
+        with self.assertRaises(ValueError):
+            HyperLogLog().merge_bytes(HyperLogLog(10).to_bytes())
+
+    def test_kll_quantiles_are_within_bounds(self):
+        rng = random.Random(7)
+        for draw in (lambda: rng.uniform(0, 100), lambda: rng.expovariate(1 / 48), lambda: rng.randint(0, 10) * 10):
+            values = [draw() for _ in range(30000)]
+            sketch = KLLSketch()
+            for value in values:
+                sketch.add(value)
+            values.sort()
+            for q in CHECKED_QUANTILES:
+                self.assertLessEqual(rank_error(values, sketch.quantile(q), q), KLL_RANK_ERROR_BOUND)
+
+    def test_kll_merge_matches_bounds(self):
+        rng = random.Random(11)
+        values = [rng.gauss(50, 15) for _ in range(30000)]
+        merged = KLLSketch()
+        for shard in range(6):
+            part = KLLSketch()
+            for value in values[shard::6]:
+                part.add(value)
+            merged.merge_bytes(part.to_bytes())
+        self.assertEqual(merged.n, len(values))
+        values.sort()
+        for q in CHECKED_QUANTILES:
+            self.assertLessEqual(rank_error(values, merged.quantile(q), q), KLL_RANK_ERROR_BOUND)
+
+    def test_kll_small_sketch_is_exact(self):
+        sketch = KLLSketch()
+        self.assertIsNone(sketch.quantile(0.5))
+        for value in range(1, 101):
+            sketch.add(value)
+        self.assertEqual(sketch.quantiles([0.25, 0.5, 0.9]), [25.0, 50.0, 90.0])
+
+    def test_kll_round_trip(self):
+        rng = random.Random(3)
+        sketch = KLLSketch()
+        for _ in range(5000):
+            sketch.add(rng.random())
+        restored = KLLSketch.from_bytes(sketch.to_bytes())
+        self.assertEqual((restored.k, restored.n, restored.compactors), (sketch.k, sketch.n, sketch.compactors))
+        self.assertEqual(restored.to_bytes(), sketch.to_bytes())
+
+
+class SketchServiceTests(IsolatedCacheTestCase):
+    def setUp(self):
+        super().setUp()
+        course = make_course(lessons=2, questions=2)
+        self.lessons = list(course.lessons.order_by('order'))
+        self.students = [make_student(f'student-{number}', courses=[course]) for number in range(3)]
+        self.today = timezone.localdate()
+
+    def sketch_rows(self):
+        rows = StatsSketch.objects.order_by('metric', 'quiz').values_list('metric', 'quiz', 'day', 'data')
+        return [(metric, quiz, day, bytes(data)) for metric, quiz, day, data in rows]
+
+    def test_activity_is_folded_into_one_row_per_course_and_day(self):
+        for student in self.students:
+            QuizService.record_quiz_attempt(student, self.lessons[0].quiz, 1, 2)
+            LessonService.mark_lesson_completed(student, self.lessons[0])
+        self.assertEqual(
+            sorted(StatsSketch.objects.values_list('metric', 'quiz_id')),
+            [('active_students', None), ('quiz_scores', self.lessons[0].quiz.pk)],
+        )
+        self.assertEqual(SketchService.active_students(self.today, self.today), 3)
+        (scores,) = SketchService.quiz_score_percentiles(self.today, self.today).values()
+        self.assertEqual(scores, {'attempts': 3, 'percentiles': [50.0] * len(SKETCH_QUANTILES)})
+
+    def test_batch_completion_folds_each_day(self):
+        yesterday = timezone.now() - timedelta(days=1)
+        LessonService.mark_lessons_completed(self.students[0], [(self.lessons[0].pk, yesterday), (self.lessons[1].pk, None)])
+        self.assertEqual(
+            sorted(StatsSketch.objects.filter(metric='active_students').values_list('day', flat=True)),
+            [timezone.localdate(yesterday), self.today],
+        )
+        stats = SketchService.completion_hours_percentiles(self.today, self.today)
+        self.assertEqual(stats['completions'], 1)
+
+    def test_rebuild_matches_folds(self):
+        for student in self.students:
+            QuizService.record_quiz_attempt(student, self.lessons[1].quiz, 2, 2)
+            LessonService.mark_lessons_completed(student, [(lesson.pk, None) for lesson in self.lessons])
+        folded = self.sketch_rows()
+        self.assertEqual(SketchService.completion_hours_percentiles(self.today, self.today)['completions'], 3)
+        SketchService.rebuild()
+        self.assertEqual(self.sketch_rows(), folded)
+
+
+class CacheTagTests(IsolatedCacheTestCase):
+    def test_evicted_tag_does_not_revive_old_values(self):
+        cached_lookup('value', ['thing:1'], lambda: 'first')
+        invalidate_tags('thing:1')
+        self.assertEqual(cached_lookup('value', ['thing:1'], lambda: 'second'), 'second')
+        # The tag key is evicted while values cached under its old versions remain.
+        get_cache().delete(TAG_PREFIX + 'thing:1')
+        self.assertEqual(cached_lookup('value', ['thing:1'], lambda: 'third'), 'third')
+
+    def test_failed_bump_does_not_revive_old_values(self):
+        invalidate_tags('thing:1')
+        cached_lookup('value', ['thing:1'], lambda: 'first')
+        get_cache().delete(TAG_PREFIX + 'thing:1')
+        invalidate_tags('thing:1')
+        self.assertEqual(cached_lookup('value', ['thing:1'], lambda: 'second'), 'second')
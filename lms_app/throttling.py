@@ -0,0 +1,98 @@
+"""Rate limiting and duplicate-submission protection for quiz submissions.
+
+Rate-limit buckets live in a process-local cache (``LMS_THROTTLE_CACHE_ALIAS``)
+guarded by an in-process lock, so every check is a dictionary lookup rather
+than a database or network round trip. Limits therefore apply per worker
+process; a pre-forking server with N workers admits at most N times the
+configured burst, which still caps the write load an exam spike can cause.
+
+Submission tokens live in the shared cache (``get_cache()``) instead: a
+retry may reach another worker, which must still see the first claim.
+"""
+
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .cache import get_cache
+
+BUCKET_PREFIX = 'lms:bucket:'
+SUBMISSION_PREFIX = 'lms:submission:'
+# Stored while a submission is being graded; replaced by the attempt pk.
+SUBMISSION_PENDING = 'pending'
+
+_lock = threading.Lock()
+
+
+def get_throttle_cache():
+    return caches[getattr(settings, 'LMS_THROTTLE_CACHE_ALIAS', 'default')]
+
+
+class TokenBucket:
+    """Token bucket holding up to ``capacity`` tokens, refilled one per ``refill_seconds``.
+
+    Each key has its own bucket, created full. ``consume()`` takes a token
+    and returns 0, or returns the seconds until one is available.
+    """
+
+    def __init__(self, name, capacity, refill_seconds):
+        self.name = name
+        self.capacity = capacity
+        self.refill_seconds = refill_seconds
+
+    def consume(self, key):
+        cache = get_throttle_cache()
+        cache_key = f'{BUCKET_PREFIX}{self.name}:{key}'
+        now = time.monotonic()
+        with _lock:
+            tokens, updated = cache.get(cache_key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated) / self.refill_seconds)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0
+            else:
+                wait = (1 - tokens) * self.refill_seconds
+            # A bucket left alone for this long is full again, so it may expire.
+            cache.set(cache_key, (tokens, now), timeout=int(self.capacity * self.refill_seconds) + 1)
+        return wait
+
+
+def quiz_submission_bucket():
+    """Bucket limiting how often one student may submit one quiz."""
+    return TokenBucket(
+        'quiz-submit',
+        capacity=getattr(settings, 'LMS_QUIZ_SUBMIT_BURST', 3),
+        refill_seconds=getattr(settings, 'LMS_QUIZ_SUBMIT_REFILL_SECONDS', 20),
+    )
+
+
+def new_submission_token():
+    return uuid.uuid4().hex
+
+
+def _submission_key(scope, token):
+    return f'{SUBMISSION_PREFIX}{scope}:{token}'
+
+
+def get_submission(scope, token):
+    """Return the result recorded for ``token``: an attempt pk, ``SUBMISSION_PENDING`` or None."""
+    return get_cache().get(_submission_key(scope, token))
+
+
+def claim_submission(scope, token):
+    """Claim ``token`` for processing; returns False if it was already claimed."""
+    timeout = getattr(settings, 'LMS_SUBMISSION_TOKEN_TIMEOUT', 3600)
+    return get_cache().add(_submission_key(scope, token), SUBMISSION_PENDING, timeout=timeout)
+
+
+def complete_submission(scope, token, result):
+    timeout = getattr(settings, 'LMS_SUBMISSION_TOKEN_TIMEOUT', 3600)
+    get_cache().set(_submission_key(scope, token), result, timeout=timeout)
+
+
+def release_submission(scope, token):
+    """Forget a claim whose submission was rejected so the form can be resent."""
+    get_cache().delete(_submission_key(scope, token))
@@ -1,5 +1,5 @@
 from django.urls import path, include
-from . import views
+from . import api, views
 
 urlpatterns = [
     # Authentication URLs
@@ -40,8 +40,31 @@ urlpatterns = [
     # Enrollment and Progress URLs
     path('courses/<int:course_pk>/enroll/', views.EnrollCourseView.as_view(), name='enroll_course'),
     path('enrollments/', views.EnrollmentListView.as_view(), name='enrollment_list'),
+    path('courses/<int:course_pk>/roster/', views.CourseRosterView.as_view(), name='course_roster'),
     path('lessons/<int:pk>/mark_completed/', views.MarkLessonCompletedView.as_view(), name='mark_lesson_completed'),
     path('quiz/<int:pk>/take/', views.TakeQuizView.as_view(), name='take_quiz'),
+    path('quiz/<int:pk>/answer/', views.QuizAnswerView.as_view(), name='quiz_save_answer'),
     path('quiz/attempt/<int:pk>/results/', views.QuizAttemptDetailView.as_view(), name='quiz_attempt_results'),
     path('dashboard/', views.ReportingDashboardView.as_view(), name='reporting_dashboard'),
+    path('dashboard/courses/<int:course_pk>/analytics/', views.CourseAnalyticsJobCreateView.as_view(), name='course_analytics_job_create'),
+    path('dashboard/analytics/', views.PlatformAnalyticsJobCreateView.as_view(), name='platform_analytics_job_create'),
+    path('dashboard/platform/', views.PlatformStatsView.as_view(), name='platform_stats'),
+    path('dashboard/jobs/<int:pk>/', views.ReportJobStatusView.as_view(), name='report_job_status'),
+
+    # JSON API
+    path('api/courses/', api.ResourceListView.as_view(resource_class=api.CourseResource), name='api_course_list'),
+    path('api/courses/<int:pk>/', api.ResourceDetailView.as_view(resource_class=api.CourseResource), name='api_course_detail'),
+    path('api/courses/<int:pk>/lessons/order/', api.LessonOrderView.as_view(), name='api_lesson_order'),
+    path('api/lessons/', api.ResourceListView.as_view(resource_class=api.LessonResource), name='api_lesson_list'),
+    path('api/lessons/<int:pk>/', api.ResourceDetailView.as_view(resource_class=api.LessonResource), name='api_lesson_detail'),
+    path('api/quizzes/', api.ResourceListView.as_view(resource_class=api.QuizResource), name='api_quiz_list'),
+    path('api/quizzes/<int:pk>/', api.ResourceDetailView.as_view(resource_class=api.QuizResource), name='api_quiz_detail'),
+    path('api/enrollments/', api.ResourceListView.as_view(resource_class=api.EnrollmentResource), name='api_enrollment_list'),
+    path('api/enrollments/bulk/', api.EnrollmentBulkView.as_view(), name='api_enrollment_bulk'),
+    path('api/enrollments/<int:pk>/', api.ResourceDetailView.as_view(resource_class=api.EnrollmentResource), name='api_enrollment_detail'),
+    path('api/progress/', api.ResourceListView.as_view(resource_class=api.LessonProgressResource), name='api_progress_list'),
+    path('api/progress/batch/', api.LessonProgressBatchView.as_view(), name='api_progress_batch'),
+    path('api/progress/<int:pk>/', api.ResourceDetailView.as_view(resource_class=api.LessonProgressResource), name='api_progress_detail'),
+    path('api/attempts/', api.ResourceListView.as_view(resource_class=api.QuizAttemptResource), name='api_attempt_list'),
+    path('api/attempts/<int:pk>/', api.ResourceDetailView.as_view(resource_class=api.QuizAttemptResource), name='api_attempt_detail'),
 ]
@@ -1,5 +1,80 @@
-from django.db.models import Count, Avg
-from .models import Course, Enrollment, LessonProgress, QuizAttempt
+from django.db.models import Count, Avg, F, OuterRef, Subquery, Sum, Window
+from django.db.models.functions import Coalesce, RowNumber
+from .models import Course, Enrollment, Lesson, QuizAttempt
+
+# Width of the completion-rate histogram: ten buckets of ten percentage points.
+COMPLETION_BUCKETS = 10
+
+
+class CompletionStats:
+    """Running completion-rate statistics for one course.
+
+    Fed ``(completed_lessons, students)`` pairs. Completed-lesson counts lie
+    between 0 and ``total_lessons``, so one counter per possible count gives
+    an exact mean, median and histogram: memory grows with the course's
+    lessons, never with its enrollments.
+    """
+
+    def __init__(self, total_lessons):
+        self.total_lessons = total_lessons
+        self.counts = [0] * (total_lessons + 1)
+        self.students = 0
+        self.completed_lessons = 0
+
+    def add(self, completed_lessons, students=1):
+        completed_lessons = min(max(completed_lessons, 0), self.total_lessons)
+        self.counts[completed_lessons] += students
+        self.students += students
+        self.completed_lessons += completed_lessons * students
+
+    def rate(self, completed_lessons):
+        return (completed_lessons / self.total_lessons * 100) if self.total_lessons > 0 else 0
+
+    @property
+    def mean(self):
+        return self.rate(self.completed_lessons / self.students) if self.students else 0
+
+    @property
+    def median(self):
+        if not self.students:
+            return 0
+        lower = self._nth((self.students - 1) // 2)
+        upper = self._nth(self.students // 2)
+        return (self.rate(lower) + self.rate(upper)) / 2
+
+    def _nth(self, index):
+        """Completed-lesson count of the ``index``-th student in ascending order."""
+        seen = 0
+        for completed_lessons, students in enumerate(self.counts):
+            seen += students
+            if seen > index:
+                return completed_lessons
+
+    def distribution(self):
+        """Students per completion-rate bucket, ``[{'from': 0, 'to': 10, 'students': n}, ...]``.
+
+        Buckets include their lower bound; the last one also holds 100%.
+        """
+        width = 100 // COMPLETION_BUCKETS
+        buckets = [
+            {'from': index * width, 'to': (index + 1) * width, 'students': 0}
+            for index in range(COMPLETION_BUCKETS)
+        ]
+        for completed_lessons, students in enumerate(self.counts):
+            if students:
+                # Integer arithmetic, so rates on a boundary never fall into the bucket below.
+                index = completed_lessons * COMPLETION_BUCKETS // self.total_lessons if self.total_lessons else 0
+                buckets[min(index, COMPLETION_BUCKETS - 1)]['students'] += students
+        return buckets
+
+
+def merge_distributions(distributions):
+    """Add up histograms returned by ``CompletionStats.distribution()``."""
+    merged = CompletionStats(0).distribution()
+    for distribution in distributions:
+        for total, bucket in zip(merged, distribution):
+            total['students'] += bucket['students']
+    return merged
 
 
 class ReportingUtils:
@@ -7,60 +82,132 @@ class ReportingUtils:
     
     @staticmethod
     def get_course_analytics(course):
-        """Get comprehensive analytics for a course."""
-        total_students = course.enrollments.count()
+        """Get comprehensive analytics for a course.
+
+        Completion figures come from one query grouping the course's
+        enrollments by their stored ``completed_lessons``, whose rows are
+        streamed into ``CompletionStats``: three queries and constant memory
+        however many students are enrolled.
+        """
         total_lessons = course.lessons.count()
-        
-        # Calculate completion rates
-        completed_lessons_data = LessonProgress.objects.filter(
-            lesson__course=course, completed=True
-        ).values('enrollment').annotate(completed_count=Count('lesson'))
-        
-        completion_rates = []
-        for enrollment in course.enrollments.all():
-            completed = completed_lessons_data.filter(enrollment=enrollment.pk).first()
-            completed_count = completed['completed_count'] if completed else 0
-            completion_rate = (completed_count / total_lessons * 100) if total_lessons > 0 else 0
-            completion_rates.append(completion_rate)
-        
-        avg_completion_rate = sum(completion_rates) / len(completion_rates) if completion_rates else 0
-        
+        stats = CompletionStats(total_lessons)
+        for completed_lessons, students in (
+            course.enrollments.order_by().values('completed_lessons').annotate(n=Count('pk'))
+            .values_list('completed_lessons', 'n').iterator()
+        ):
+            stats.add(completed_lessons, students)
+
         # Quiz analytics
-        quiz_attempts = QuizAttempt.objects.filter(quiz__lesson__course=course)
-        avg_quiz_score = quiz_attempts.aggregate(avg_score=Avg('score'))['avg_score'] or 0
-        
+        quiz_stats = QuizAttempt.objects.filter(quiz__lesson__course=course).aggregate(
+            avg_score=Avg('score'), attempts=Count('pk')
+        )
+
         return {
-            'total_students': total_students,
+            'total_students': stats.students,
             'total_lessons': total_lessons,
-            'avg_completion_rate': avg_completion_rate,
-            'avg_quiz_score': avg_quiz_score,
-            'total_quiz_attempts': quiz_attempts.count()
+            'avg_completion_rate': stats.mean,
+            'median_completion_rate': stats.median,
+            'completion_distribution': stats.distribution(),
+            'avg_quiz_score': quiz_stats['avg_score'] or 0,
+            'total_quiz_attempts': quiz_stats['attempts'],
         }
     
     @staticmethod
-    def get_student_dashboard_data(student):
-        """Get dashboard data for a student."""
-        enrollments = Enrollment.objects.filter(student=student).select_related('course')
-        
+    def get_courses_analytics(course_ids):
+        """Get per-course analytics for many courses with grouped queries.
+
+        Returns a dict keyed by course id holding the same figures as
+        ``get_course_analytics`` plus the raw sums needed to merge results
+        across batches (``total_completed_lessons`` and ``total_quiz_score``).
+        """
+        course_ids = list(course_ids)
+
+        lessons = dict(
+            Lesson.objects.filter(course__in=course_ids).order_by()
+            .values('course').annotate(n=Count('pk')).values_list('course', 'n')
+        )
+        completion = {course_id: CompletionStats(lessons.get(course_id, 0)) for course_id in course_ids}
+        for course_id, completed_lessons, students in (
+            Enrollment.objects.filter(course__in=course_ids).order_by()
+            .values('course', 'completed_lessons').annotate(n=Count('pk'))
+            .values_list('course', 'completed_lessons', 'n').iterator()
+        ):
+            completion[course_id].add(completed_lessons, students)
+        quiz_stats = {
+            row['quiz__lesson__course']: row
+            for row in QuizAttempt.objects.filter(quiz__lesson__course__in=course_ids)
+            .order_by().values('quiz__lesson__course')
+            .annotate(attempts=Count('pk'), score_sum=Sum('score'))
+        }
+
+        analytics = {}
+        for course_id in course_ids:
+            stats = completion[course_id]
+            attempts = quiz_stats.get(course_id, {}).get('attempts', 0)
+            score_sum = quiz_stats.get(course_id, {}).get('score_sum') or 0
+
+            analytics[course_id] = {
+                'total_students': stats.students,
+                'total_lessons': stats.total_lessons,
+                'avg_completion_rate': stats.mean,
+                'median_completion_rate': stats.median,
+                'completion_distribution': stats.distribution(),
+                'avg_quiz_score': (score_sum / attempts) if attempts > 0 else 0,
+                'total_quiz_attempts': attempts,
+                'total_completed_lessons': stats.completed_lessons,
+                'total_quiz_score': score_sum,
+            }
+        return analytics
+
+    @staticmethod
+    def get_student_dashboard_data(student, recent_attempts_limit=3):
+        """Get dashboard data for a student.
+
+        Runs a fixed number of queries regardless of how many courses the
+        student is enrolled in: one for enrollments annotated with lesson
+        counts (completed lessons are stored on the enrollment) and one
+        windowed query for the most recent quiz attempts per course.
+        """
+        lesson_counts = Lesson.objects.filter(
+            course=OuterRef('course')
+        ).order_by().values('course').annotate(total=Count('pk')).values('total')
+
+        enrollments = list(
+            Enrollment.objects.filter(student=student)
+            .select_related('course')
+            .annotate(total_lessons=Coalesce(Subquery(lesson_counts), 0))
+            .order_by('-date_enrolled')
+        )
+
+        recent_attempts = {}
+        if enrollments:
+            ranked_attempts = QuizAttempt.objects.filter(
+                student=student,
+                quiz__lesson__course__in=[enrollment.course_id for enrollment in enrollments],
+            ).select_related('quiz').annotate(
+                course_id=F('quiz__lesson__course_id'),
+                row_number=Window(
+                    expression=RowNumber(),
+                    partition_by=[F('quiz__lesson__course_id')],
+                    order_by=F('date_attempted').desc(),
+                ),
+            ).filter(row_number__lte=recent_attempts_limit).order_by('course_id', 'row_number')
+
+            for attempt in ranked_attempts:
+                recent_attempts.setdefault(attempt.course_id, []).append(attempt)
+
         dashboard_data = []
         for enrollment in enrollments:
-            course = enrollment.course
-            total_lessons = course.lessons.count()
-            completed_lessons = LessonProgress.objects.filter(
-                enrollment=enrollment, completed=True
-            ).count()
-            
-            recent_quiz_attempts = QuizAttempt.objects.filter(
-                student=student, quiz__lesson__course=course
-            ).order_by('-date_attempted')[:3]
-            
+            total_lessons = enrollment.total_lessons
+            completed_lessons = enrollment.completed_lessons
+
             dashboard_data.append({
-                'course': course,
+                'course': enrollment.course,
                 'enrollment': enrollment,
                 'total_lessons': total_lessons,
                 'completed_lessons': completed_lessons,
                 'completion_percentage': (completed_lessons / total_lessons * 100) if total_lessons > 0 else 0,
-                'recent_quiz_attempts': recent_quiz_attempts
+                'recent_quiz_attempts': recent_attempts.get(enrollment.course_id, [])
             })
-        
-        return dashboard_data
\ No newline at end of file
+
+        return dashboard_data
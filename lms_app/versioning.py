@@ -0,0 +1,109 @@
+"""Version counters for the course content tree.
+
+Course → Lesson → Quiz → Question → Answer. Every node's version is a
+cache tag (``'lesson:12'``, see ``cache.py``), and a change to a node bumps
+its own version and the versions of all its ancestors up to the course. A
+value cached with ``cached_lookup()`` under a node's tag is therefore never
+read again once anything in that node's subtree changes, however deep.
+
+Model signals bump versions when single objects are saved or deleted.
+``QuerySet.update()``, ``bulk_create()`` and ``bulk_update()`` send no
+signals, so code using them calls ``bump_queryset()`` or ``bump_nodes()``
+afterwards; wrapping many changes in ``cache.deferred_invalidation()``
+bumps each shared ancestor once instead of once per node.
+"""
+
+from .cache import invalidate_tags
+from .models import Answer, Course, Lesson, Question, Quiz
+
+# Tag prefix of each node type and the foreign key to its parent.
+CONTENT_TREE = {
+    Course: ('course', None),
+    Lesson: ('lesson', 'course'),
+    Quiz: ('quiz', 'lesson'),
+    Question: ('question', 'quiz'),
+    Answer: ('answer', 'question'),
+}
+
+
+def tag_for(model, pk):
+    """The version tag of one node."""
+    return f'{CONTENT_TREE[model][0]}:{pk}'
+
+
+def get_parent_model(model):
+    parent_field = CONTENT_TREE[model][1]
+    return model._meta.get_field(parent_field).related_model if parent_field else None
+
+
+def ancestor_paths(model):
+    """``(ancestor model, lookup of its id)`` pairs from ``model``'s parent up to the course."""
+    paths = []
+    lookup = ''
+    while CONTENT_TREE[model][1] is not None:
+        field = CONTENT_TREE[model][1]
+        lookup = f'{lookup}__{field}' if lookup else field
+        model = get_parent_model(model)
+        paths.append((model, f'{lookup}_id'))
+    return paths
+
+
+def queryset_tags(queryset):
+    """Tags of every node in ``queryset`` and of their ancestors, read with one query."""
+    model = queryset.model
+    paths = ancestor_paths(model)
+    tags = set()
+    for row in queryset.order_by().values_list('pk', *(lookup for _, lookup in paths)).iterator():
+        tags.add(tag_for(model, row[0]))
+        tags.update(tag_for(ancestor, pk) for (ancestor, _), pk in zip(paths, row[1:]) if pk is not None)
+    return tags
+
+
+def get_ancestors(instance):
+    """Return ``{model: pk}`` for each ancestor of ``instance``.
+
+    The parent comes from the instance itself; the rest of the path is
+    read with one query, so lessons and courses need none.
+    """
+    model = type(instance)
+    parent_model = get_parent_model(model)
+    if parent_model is None:
+        return {}
+    parent_id = getattr(instance, model._meta.get_field(CONTENT_TREE[model][1]).attname)
+    ancestors = {parent_model: parent_id}
+    paths = ancestor_paths(parent_model)
+    if paths and parent_id is not None:
+        # No row when the parent is being deleted in the same cascade; its own
+        # signal then bumps the ancestors above it.
+        row = parent_model.objects.filter(pk=parent_id).values_list(*(lookup for _, lookup in paths)).first()
+        if row is not None:
+            ancestors.update((ancestor, pk) for (ancestor, _), pk in zip(paths, row) if pk is not None)
+    return ancestors
+
+
+def bump(instance, ancestors=None):
+    """Bump the version of ``instance`` and of every ancestor.
+
+    ``ancestors`` is the result of ``get_ancestors()`` when the caller
+    already has it.
+    """
+    if ancestors is None:
+        ancestors = get_ancestors(instance)
+    invalidate_tags(
+        tag_for(type(instance), instance.pk),
+        *(tag_for(model, pk) for model, pk in ancestors.items() if pk is not None),
+    )
+
+
+def bump_queryset(queryset):
+    """Bump the nodes in ``queryset`` and their ancestors after a bulk write.
+
+    Call it after ``update()`` or ``bulk_create()``, but before a bulk
+    delete, while the rows can still be read.
+    """
+    invalidate_tags(*queryset_tags(queryset))
+
+
+def bump_nodes(model, pks):
+    """Bump the ``model`` nodes with the given pks and their ancestors."""
+    bump_queryset(model.objects.filter(pk__in=list(pks)))
@@ -1,15 +1,43 @@
+from datetime import timedelta
+from itertools import chain
+from math import ceil
+
 from django.urls import reverse_lazy, reverse
 from django.views.generic import (
     CreateView, ListView, DetailView, UpdateView, DeleteView, View
 )
-from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.shortcuts import get_object_or_404, render, redirect
+from django.core.paginator import InvalidPage
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
 from django.contrib import messages
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.utils import timezone
 
-from .models import Course, Lesson, User, Quiz, Question, Answer, Enrollment, LessonProgress, QuizAttempt
-from .forms import UserRegisterForm, QuizForm, QuestionForm, AnswerForm, TakeQuizForm
-from .mixins import InstructorOrSuperuserRequiredMixin, StudentRequiredMixin, CourseOwnerMixin
-from .services import EnrollmentService, LessonService, QuizService
+from .models import (
+    Course, Lesson, User, Quiz, Question, Answer, Enrollment, LessonProgress, QuizAttempt, QuizAttemptSummary, ReportJob,
+)
+from .forms import (
+    UserRegisterForm, LessonForm, QuizForm, QuestionForm, AnswerForm, TakeQuizForm, RosterFilterForm,
+)
+from .mixins import (
+    InstructorOrSuperuserRequiredMixin, StudentRequiredMixin, CourseOwnerMixin, ConditionalGetMixin, SegmentCacheMixin
+)
+from .cache import cached_lookup, deferred_invalidation
+from .paginators import KeysetPaginator
+from .rendering import LESSON_RENDERER_VERSION
+from .services import (
+    SKETCH_QUANTILES, AnswerDraftService, AttemptHistoryService, EnrollmentService, ExamService, LessonService,
+    QuizService, ReportJobService, SketchService,
+)
+from .throttling import (
+    SUBMISSION_PENDING, claim_submission, complete_submission, get_submission, quiz_submission_bucket,
+    release_submission,
+)
+from .utils import ReportingUtils
 
 
 # User Authentication Views
@@ -24,15 +52,46 @@ class RegisterView(CreateView):
         return response
 
 def profile_view(request):
-    return render(request, 'lms_app/profile.html')
+    context = {}
+    if request.user.is_authenticated:
+        if request.user.role == 'student':
+            context['dashboard_data'] = ReportingUtils.get_student_dashboard_data(request.user)
+        elif request.user.role == 'instructor':
+            context['courses_taught'] = request.user.courses_taught.annotate(lesson_count=Count('lessons'))
+    return render(request, 'lms_app/profile.html', context)
 
 
 # Course Views
-class CourseListView(LoginRequiredMixin, ListView):
+def _viewer_segment(user):
+    if user.is_superuser:
+        return 'admin'
+    if user.role == 'instructor':
+        return 'instructor'
+    return 'student'
+
+
+class CourseListView(LoginRequiredMixin, SegmentCacheMixin, ListView):
     model = Course
     template_name = 'lms_app/course_list.html'
+    body_template_name = 'lms_app/components/course_list_body.html'
     context_object_name = 'courses'
 
+    def get_queryset(self):
+        return Course.objects.select_related('instructor')
+
+    def get_cache_tags(self):
+        return ['courses']
+
+    def get_user_segment(self):
+        segment = _viewer_segment(self.request.user)
+        if segment == 'instructor':
+            # Edit buttons depend on which of the listed courses they own.
+            return f'instructor:{self.request.user.pk}'
+        return segment
+
+    def get_page_title(self, context):
+        return 'Course List'
+
 
 class CourseCreateView(InstructorOrSuperuserRequiredMixin, CreateView):
     model = Course
@@ -45,29 +104,90 @@ class CourseCreateView(InstructorOrSuperuserRequiredMixin, CreateView):
         return super().form_valid(form)
 
 
-class CourseDetailView(LoginRequiredMixin, DetailView):
+def _latest(*timestamps):
+    return max((ts for ts in timestamps if ts is not None), default=None)
+
+
+class CourseDetailView(LoginRequiredMixin, ConditionalGetMixin, SegmentCacheMixin, DetailView):
     model = Course
     template_name = 'lms_app/course_detail.html'
+    body_template_name = 'lms_app/components/course_detail_body.html'
     context_object_name = 'course'
 
+    def get_instructor_id(self):
+        pk = self.kwargs['pk']
+        return cached_lookup(
+            f'course-instructor:{pk}', [f'course:{pk}'],
+            lambda: Course.objects.filter(pk=pk).values_list('instructor_id', flat=True).first(),
+        )
+
+    def is_enrolled(self):
+        user = self.request.user
+        enrolled_course_ids = cached_lookup(
+            f'enrolled-courses:{user.pk}', [f'enrollments:{user.pk}'],
+            lambda: set(Enrollment.objects.filter(student=user).values_list('course_id', flat=True)),
+        )
+        return self.kwargs['pk'] in enrolled_course_ids
+
+    def get_cache_tags(self):
+        pk = self.kwargs['pk']
+        tags = [f'course:{pk}', f'instructor:{self.get_instructor_id()}']
+        if self.request.user.role == 'student' and self.is_enrolled():
+            tags.append(f'progress:{self.request.user.pk}:{pk}')
+        return tags
+
+    def get_user_segment(self):
+        user = self.request.user
+        segment = _viewer_segment(user)
+        if segment == 'instructor' and self.get_instructor_id() == user.pk:
+            return 'owner'
+        if segment == 'student' and self.is_enrolled():
+            # Lesson completion badges are specific to each enrolled student.
+            return f'enrolled:{user.pk}'
+        return segment
+
+    def get_page_title(self, context):
+        return context['course'].title
+
+    def get_content_version(self):
+        course = Course.objects.filter(pk=self.kwargs['pk']).values(
+            'updated_at', 'instructor_id', 'instructor__username'
+        ).first()
+        if course is None:
+            return None
+
+        lessons = Lesson.objects.filter(course_id=self.kwargs['pk']).aggregate(
+            updated_at=Max('updated_at'), count=Count('pk'), quizzes=Count('quiz')
+        )
+        progress_modified, progress = EnrollmentService.get_progress_version(self.request.user, self.kwargs['pk'])
+        last_modified = _latest(course['updated_at'], lessons['updated_at'], progress_modified)
+        return last_modified, (*course.values(), *lessons.values(), *progress)
+
+    def get_queryset(self):
+        return Course.objects.select_related('instructor')
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        course = self.get_object()
+        course = self.object
         user = self.request.user
 
         context['is_enrolled'] = False
         context['enrollment'] = None
         context['lesson_progress'] = {}
+        # Evaluated once here; the template loops over it without further queries.
+        context['lessons'] = list(course.lessons.select_related('quiz'))
 
         if user.is_authenticated and user.role == 'student':
             enrollment = Enrollment.objects.filter(student=user, course=course).first()
             if enrollment:
                 context['is_enrolled'] = True
                 context['enrollment'] = enrollment
-                # Get progress for each lesson
-                for lesson in course.lessons.all():
-                    lesson_progress = LessonProgress.objects.filter(enrollment=enrollment, lesson=lesson).first()
-                    context['lesson_progress'][lesson.pk] = lesson_progress.completed if lesson_progress else False
+                completed = dict(
+                    LessonProgress.objects.filter(enrollment=enrollment).values_list('lesson_id', 'completed')
+                )
+                context['lesson_progress'] = {
+                    lesson.pk: completed.get(lesson.pk, False) for lesson in context['lessons']
+                }
 
         return context
 
@@ -86,11 +206,16 @@ class CourseDeleteView(InstructorOrSuperuserRequiredMixin, CourseOwnerMixin, Del
     template_name = 'lms_app/course_confirm_delete.html'
     success_url = reverse_lazy('course_list')
 
+    def form_valid(self, form):
+        # Every lesson, quiz, question and answer deleted with the course bumps the course version.
+        with deferred_invalidation():
+            return super().form_valid(form)
+
 
 # Lesson Views
 class LessonCreateView(InstructorOrSuperuserRequiredMixin, CreateView):
     model = Lesson
-    fields = ['title', 'content', 'order']
+    form_class = LessonForm
     template_name = 'lms_app/lesson_form.html'
 
     def dispatch(self, request, *args, **kwargs):
@@ -99,7 +224,12 @@ class LessonCreateView(InstructorOrSuperuserRequiredMixin, CreateView):
 
     def form_valid(self, form):
         form.instance.course = self.course
-        return super().form_valid(form)
+        with transaction.atomic():
+            form.instance.order = LessonService.next_lesson_order(self.course.pk)
+            response = super().form_valid(form)
+            if form.cleaned_data['position']:
+                LessonService.move_lesson(self.object, form.cleaned_data['position'])
+        return response
 
     def get_success_url(self):
         return reverse_lazy('course_detail', kwargs={'pk': self.course.pk})
@@ -111,20 +241,44 @@ class LessonCreateView(InstructorOrSuperuserRequiredMixin, CreateView):
         return self.course.instructor == self.request.user or self.request.user.is_superuser
 
 
-class LessonDetailView(LoginRequiredMixin, DetailView):
+# Rendered in place of the lesson body, which is then streamed between the
+# two halves of the page.
+LESSON_CONTENT_MARKER = '<!-- lms:lesson-content -->'
+
+
+class LessonDetailView(LoginRequiredMixin, ConditionalGetMixin, DetailView):
     model = Lesson
     template_name = 'lms_app/lesson_detail.html'
     context_object_name = 'lesson'
 
+    def get_queryset(self):
+        # Only the cached HTML is needed unless it has to be re-rendered.
+        return super().get_queryset().select_related('course', 'body').defer('body__data')
+
+    def get_content_version(self):
+        lesson = Lesson.objects.filter(pk=self.kwargs['pk']).values(
+            'updated_at', 'course_id', 'course__updated_at', 'course__instructor_id', 'quiz__pk', 'quiz__updated_at'
+        ).first()
+        if lesson is None:
+            return None
+
+        progress_modified, progress = EnrollmentService.get_progress_version(self.request.user, lesson['course_id'])
+        last_modified = _latest(
+            lesson['updated_at'], lesson['course__updated_at'], lesson['quiz__updated_at'], progress_modified
+        )
+        return last_modified, (*lesson.values(), *progress, LESSON_RENDERER_VERSION)
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        lesson = self.get_object()
+        lesson = self.object
         user = self.request.user
 
+        context['position'] = LessonService.get_lesson_position(lesson)
         context['can_mark_completed'] = False
         context['is_completed'] = False
         context['quiz_attempted'] = False
         context['latest_quiz_score'] = None
+        context['best_quiz_score'] = None
 
         if user.is_authenticated and user.role == 'student':
             enrollment = Enrollment.objects.filter(student=user, course=lesson.course).first()
@@ -139,19 +293,42 @@ class LessonDetailView(LoginRequiredMixin, DetailView):
 
                 # Check quiz attempt for this lesson if a quiz exists
                 if hasattr(lesson, 'quiz'):
-                    quiz_attempt = QuizAttempt.objects.filter(student=user, quiz=lesson.quiz).order_by('-date_attempted').first()
-                    if quiz_attempt:
+                    summary = AttemptHistoryService.get_summary(user, lesson.quiz)
+                    if summary:
                         context['quiz_attempted'] = True
-                        context['latest_quiz_score'] = quiz_attempt.score
+                        context['latest_quiz_score'] = summary.latest_score
+                        context['best_quiz_score'] = summary.best_score
 
         return context
 
+    def render_to_response(self, context, **response_kwargs):
+        """Stream the lesson body into the page instead of rendering it inline.
+
+        The body's cached sanitized HTML (rendered now if missing or stale) is
+        decompressed in chunks as the response is sent, so large lessons are
+        never held in memory as one string.
+        """
+        context['lesson_content'] = mark_safe(LESSON_CONTENT_MARKER)
+        page = render_to_string(self.get_template_names(), context, request=self.request)
+        head, tail = page.split(LESSON_CONTENT_MARKER, 1)
+        return StreamingHttpResponse(chain([head], self.object.body.iter_html(), [tail]), **response_kwargs)
+
 
 class LessonUpdateView(InstructorOrSuperuserRequiredMixin, UpdateView):
     model = Lesson
-    fields = ['title', 'content', 'order']
+    form_class = LessonForm
     template_name = 'lms_app/lesson_form.html'
 
+    def get_initial(self):
+        return {**super().get_initial(), 'position': LessonService.get_lesson_position(self.object)}
+
+    def form_valid(self, form):
+        with transaction.atomic():
+            response = super().form_valid(form)
+            if form.cleaned_data['position'] and 'position' in form.changed_data:
+                LessonService.move_lesson(self.object, form.cleaned_data['position'])
+        return response
+
     def get_success_url(self):
         return reverse_lazy('lesson_detail', kwargs={'pk': self.object.pk})
 
@@ -211,11 +388,24 @@ class QuizCreateView(InstructorOrSuperuserRequiredMixin, CreateView):
         return self.lesson.course.instructor == self.request.user or self.request.user.is_superuser
 
 
-class QuizDetailView(LoginRequiredMixin, DetailView):
+class QuizDetailView(LoginRequiredMixin, ConditionalGetMixin, DetailView):
     model = Quiz
     template_name = 'lms_app/quiz_detail.html'
     context_object_name = 'quiz'
 
+    def get_content_version(self):
+        quiz = Quiz.objects.filter(pk=self.kwargs['pk']).values(
+            'updated_at', 'lesson__updated_at', 'lesson__course_id', 'lesson__course__instructor_id'
+        ).first()
+        if quiz is None:
+            return None
+
+        progress_modified, progress = EnrollmentService.get_progress_version(
+            self.request.user, quiz['lesson__course_id']
+        )
+        last_modified = _latest(quiz['updated_at'], quiz['lesson__updated_at'], progress_modified)
+        return last_modified, (*quiz.values(), *progress)
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         user = self.request.user
@@ -224,15 +414,19 @@ class QuizDetailView(LoginRequiredMixin, DetailView):
         context['is_student_enrolled'] = False
         context['has_attempted_quiz'] = False
         context['latest_attempt_score'] = None
+        context['best_attempt_score'] = None
+        context['attempt_count'] = 0
 
         if user.is_authenticated and user.role == 'student':
             enrollment = Enrollment.objects.filter(student=user, course=quiz.lesson.course).first()
             if enrollment:
                 context['is_student_enrolled'] = True
-                latest_attempt = QuizAttempt.objects.filter(student=user, quiz=quiz).order_by('-date_attempted').first()
-                if latest_attempt:
+                summary = AttemptHistoryService.get_summary(user, quiz)
+                if summary:
                     context['has_attempted_quiz'] = True
-                    context['latest_attempt_score'] = latest_attempt.score
+                    context['latest_attempt_score'] = summary.latest_score
+                    context['best_attempt_score'] = summary.best_score
+                    context['attempt_count'] = summary.attempt_count
         return context
 
 
@@ -410,17 +604,75 @@ class EnrollCourseView(StudentRequiredMixin, View):
 class EnrollmentListView(LoginRequiredMixin, ListView):
     model = Enrollment
     template_name = 'lms_app/enrollment_list.html'
-    context_object_name = 'enrollments'
+    context_object_name = 'dashboard_data'
 
     def get_queryset(self):
         if self.request.user.role == 'student':
-            return Enrollment.objects.filter(student=self.request.user).select_related('course')
+            return ReportingUtils.get_student_dashboard_data(self.request.user)
         # Instructors/Admins could see all enrollments, or only for their courses
         # For now, let's limit to student's own enrollments
         messages.error(self.request, "Only students can view their enrollments.")
         return Enrollment.objects.none() # Return empty queryset for non-students
 
 
+class CourseRosterView(InstructorOrSuperuserRequiredMixin, ListView):
+    """Students enrolled in an owned course, newest first.
+
+    Filters read the precomputed progress fields on ``Enrollment`` and pages
+    are addressed by keyset cursor, so deep pages of large rosters cost the
+    same as the first.
+    """
+
+    template_name = 'lms_app/course_roster.html'
+    context_object_name = 'enrollments'
+    paginate_by = 50
+
+    def test_func(self):
+        if not super().test_func():
+            return False
+        self.course = get_object_or_404(Course, pk=self.kwargs['course_pk'])
+        return self.course.instructor_id == self.request.user.pk or self.request.user.is_superuser
+
+    def get_queryset(self):
+        queryset = Enrollment.objects.filter(course=self.course).select_related('student')
+        self.filter_form = RosterFilterForm(self.request.GET)
+        if not self.filter_form.is_valid():
+            return queryset
+        filters = self.filter_form.cleaned_data
+        now = timezone.now()
+        if filters['progress'] is not None:
+            queryset = queryset.filter(progress_bucket=filters['progress'])
+        if filters['active_within']:
+            queryset = queryset.filter(last_activity_at__gte=now - timedelta(days=filters['active_within']))
+        if filters['inactive_for']:
+            cutoff = now - timedelta(days=filters['inactive_for'])
+            queryset = queryset.filter(Q(last_activity_at__lt=cutoff) | Q(last_activity_at__isnull=True))
+        return queryset
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(queryset, page_size, 'date_enrolled')
+        try:
+            page = paginator.page(self.request.GET.get('cursor'))
+        except InvalidPage as error:
+            raise Http404(str(error))
+        return paginator, page, page.object_list, page.has_next() or 'cursor' in self.request.GET
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['course'] = self.course
+        context['filter_form'] = self.filter_form
+        context['total_lessons'] = self.course.lessons.count()
+        page = context['page_obj']
+        if page.has_next():
+            params = self.request.GET.copy()
+            params['cursor'] = page.next_cursor
+            context['next_query'] = params.urlencode()
+        first = self.request.GET.copy()
+        first.pop('cursor', None)
+        context['first_query'] = first.urlencode()
+        return context
+
+
 class MarkLessonCompletedView(StudentRequiredMixin, View):
     def post(self, request, pk):
         lesson = get_object_or_404(Lesson, pk=pk)
@@ -435,10 +687,19 @@ class MarkLessonCompletedView(StudentRequiredMixin, View):
 
 
 class TakeQuizView(LoginRequiredMixin, View):
+    """Take a quiz. Timed quizzes run as an exam with a server-side session.
+
+    The form is built from the cached quiz snapshot. Answers are autosaved
+    to the student's ``ExamSession`` as they are chosen, and an exam's
+    clock lives there too, so reloading the page, logging in again or
+    submitting late never loses the student's work or extends the time.
+    A submission is graded on the saved answers with the posted ones
+    merged over them, so it does not need to repeat the whole form.
+    """
     template_name = 'lms_app/take_quiz.html'
 
     def dispatch(self, request, *args, **kwargs):
-        self.quiz = get_object_or_404(Quiz, pk=kwargs['pk'])
+        self.quiz = get_object_or_404(Quiz.objects.select_related('lesson__course'), pk=kwargs['pk'])
         self.lesson = self.quiz.lesson
         self.course = self.lesson.course
 
@@ -454,31 +715,135 @@ class TakeQuizView(LoginRequiredMixin, View):
         return super().dispatch(request, *args, **kwargs)
 
     def get(self, request, pk):
-        form = TakeQuizForm(quiz=self.quiz)
+        if self.quiz.is_timed:
+            session = ExamService.start_session(request.user, self.quiz)
+            if not ExamService.accepts_answers(session):
+                quiz_attempt = ExamService.submit(session)
+                messages.info(request, "Time is up. Your saved answers have been graded.")
+                return redirect(reverse_lazy('quiz_attempt_results', kwargs={'pk': quiz_attempt.pk}))
+        else:
+            session = ExamService.get_open_session(request.user, self.quiz)
+        form = self.get_form(session)
+        return self.render_form(form, session=session)
+
+    def get_form(self, session, data=None):
+        saved_answers = AnswerDraftService.get_answers(session) if session is not None else None
+        return TakeQuizForm(data, quiz=self.quiz, saved_answers=saved_answers)
+
+    def render_form(self, form, status=200, session=None):
         context = {
             'quiz': self.quiz,
             'lesson': self.lesson,
             'course': self.course,
             'form': form,
+            # Only timed sessions show the countdown.
+            'exam_session': session if self.quiz.is_timed else None,
         }
-        return render(request, self.template_name, context)
+        if self.quiz.is_timed and session is not None:
+            context['seconds_left'] = session.seconds_left()
+        return render(self.request, self.template_name, context, status=status)
 
     def post(self, request, pk):
-        form = TakeQuizForm(request.POST, quiz=self.quiz)
-        if form.is_valid():
-            score, total_questions = QuizService.calculate_quiz_score(self.quiz, form.cleaned_data)
-            quiz_attempt = QuizService.record_quiz_attempt(request.user, self.quiz, score)
-            
-            messages.success(request, f"Quiz completed! Your score: {score}/{total_questions}.")
-            return redirect(reverse_lazy('quiz_attempt_results', kwargs={'pk': quiz_attempt.pk}))
+        """Grade a submission once per form token, within the per-quiz rate limit.
+
+        A token seen before returns the attempt it produced without grading
+        again; a new token is claimed before grading so concurrent copies of
+        the same submission cannot both be recorded.
+        """
+        token = request.POST.get('submission_token', '')
+        scope = f'quiz:{request.user.pk}:{self.quiz.pk}'
+        if token:
+            duplicate = self.resolve_duplicate(scope, token)
+            if duplicate is not None:
+                return duplicate
+
+        wait = quiz_submission_bucket().consume(f'{request.user.pk}:{self.quiz.pk}')
+        if wait:
+            messages.error(request, f"You are submitting this quiz too often. Try again in {ceil(wait)} seconds.")
+            session = ExamService.get_open_session(request.user, self.quiz)
+            return self.render_form(self.get_form(session, request.POST), status=429, session=session)
+
+        if token and not claim_submission(scope, token):
+            return self.resolve_duplicate(scope, token)
+
+        try:
+            response, quiz_attempt = self.grade()
+        except Exception:
+            release_submission(scope, token)
+            raise
+        if token:
+            if quiz_attempt is None:
+                release_submission(scope, token)
+            else:
+                complete_submission(scope, token, quiz_attempt.pk)
+        return response
+
+    def grade(self):
+        """Grade the posted form; returns ``(response, attempt)``, the attempt None if nothing was recorded."""
+        session = ExamService.get_open_session(self.request.user, self.quiz)
+        if self.quiz.is_timed:
+            if session is None:
+                messages.error(self.request, "This exam has not been started or was already submitted.")
+                return redirect(reverse_lazy('take_quiz', kwargs={'pk': self.quiz.pk})), None
+            if not ExamService.accepts_answers(session):
+                # Graded on the answers saved before the deadline, whatever was posted.
+                quiz_attempt = ExamService.submit(session)
+                messages.info(self.request, "Time was up. Your saved answers have been graded.")
+                return redirect(reverse_lazy('quiz_attempt_results', kwargs={'pk': quiz_attempt.pk})), quiz_attempt
+
+        form = self.get_form(session, self.request.POST)
+        if not form.is_valid():
+            return self.render_form(form, session=session), None
+
+        if session is not None:
+            quiz_attempt = ExamService.submit(session, form.answers())
+            score, total_questions = quiz_attempt.score, quiz_attempt.total_questions
         else:
-            context = {
-                'quiz': self.quiz,
-                'lesson': self.lesson,
-                'course': self.course,
-                'form': form,
-            }
-            return render(request, self.template_name, context)
+            score, total_questions = QuizService.calculate_quiz_score(self.quiz, form.cleaned_data)
+            quiz_attempt = QuizService.record_quiz_attempt(self.request.user, self.quiz, score, total_questions)
+
+        messages.success(self.request, f"Quiz completed! Your score: {score}/{total_questions}.")
+        return redirect(reverse_lazy('quiz_attempt_results', kwargs={'pk': quiz_attempt.pk})), quiz_attempt
+
+    def resolve_duplicate(self, scope, token):
+        """Answer a resubmitted token from the recorded result, or return None if it is new."""
+        result = get_submission(scope, token)
+        if result is None:
+            return None
+        if result == SUBMISSION_PENDING:
+            messages.info(self.request, "Your submission is still being graded.")
+            return redirect(reverse_lazy('quiz_detail', kwargs={'pk': self.quiz.pk}))
+        messages.info(self.request, "This quiz submission was already recorded.")
+        return redirect(reverse_lazy('quiz_attempt_results', kwargs={'pk': result}))
+
+
+class QuizAnswerView(LoginRequiredMixin, View):
+    """Autosave one answer of a quiz in progress.
+
+    Takes a compact ``question=<id>&answer=<id>`` post instead of the whole
+    quiz form. The pair is checked against the cached quiz snapshot and
+    buffered in the cache, which is written to the student's session at
+    most once per ``LMS_DRAFT_FLUSH_SECONDS``, so most saves run no queries
+    beyond the login session. Answers 204, 400 for an unknown pair and 409
+    when the student has no session that accepts answers.
+    """
+
+    def post(self, request, pk):
+        snapshot = QuizService.get_quiz_snapshot(pk)
+        if snapshot is None:
+            raise Http404("No such quiz.")
+        try:
+            question_id = int(request.POST['question'])
+            answer_id = int(request.POST['answer'])
+        except (KeyError, ValueError):
+            return JsonResponse({'error': "Send 'question' and 'answer' ids."}, status=400)
+        if answer_id not in snapshot['answer_ids'].get(question_id, ()):
+            return JsonResponse({'error': "That answer does not belong to a question of this quiz."}, status=400)
+        if request.user.role != 'student' or not AnswerDraftService.save_answer(
+            request.user, pk, question_id, answer_id, snapshot,
+        ):
+            return JsonResponse({'error': "This quiz is not open for your answers."}, status=409)
+        return HttpResponse(status=204)
 
 
 class QuizAttemptDetailView(LoginRequiredMixin, DetailView):
@@ -517,30 +882,40 @@ class ReportingDashboardView(InstructorOrSuperuserRequiredMixin, ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         all_courses = context['courses'] # This is the filtered queryset from get_queryset
+        course_ids = all_courses.values('pk')
+
+        lesson_counts = dict(
+            Lesson.objects.filter(course__in=course_ids).order_by()
+            .values('course').annotate(n=Count('pk')).values_list('course', 'n')
+        )
+        # Assuming 1 point per question
+        possible_scores = dict(
+            Quiz.objects.filter(lesson__course__in=course_ids).order_by()
+            .values('lesson__course').annotate(total=Sum('question_count')).values_list('lesson__course', 'total')
+        )
+        # Only each student's best attempt at a quiz counts, so retakes don't inflate the score.
+        best_scores = {
+            (row['student'], row['quiz__lesson__course']): row['total']
+            for row in QuizAttemptSummary.objects.filter(quiz__lesson__course__in=course_ids).order_by()
+            .values('student', 'quiz__lesson__course').annotate(total=Sum('best_score'))
+        }
+        enrollments = {}
+        for enrollment in Enrollment.objects.filter(course__in=course_ids).select_related('student'):
+            enrollments.setdefault(enrollment.course_id, []).append(enrollment)
 
         course_data = []
         for course in all_courses:
-            total_students_enrolled = course.enrollments.filter(course=course).count()
-            lessons_in_course = course.lessons.count()
+            lessons_in_course = lesson_counts.get(course.pk, 0)
+            total_possible_quiz_score = possible_scores.get(course.pk) or 0
 
             students_progress = []
-            for enrollment in course.enrollments.all():
-                student = enrollment.student
-                completed_lessons = LessonProgress.objects.filter(enrollment=enrollment, completed=True).count()
-
-                # Calculate quiz attempts and average score
-                quiz_attempts = QuizAttempt.objects.filter(student=student, quiz__lesson__course=course)
-                total_quiz_score = sum([attempt.score for attempt in quiz_attempts])
-
-                total_possible_quiz_score = 0
-                for lesson in course.lessons.all():
-                    if hasattr(lesson, 'quiz'):
-                        total_possible_quiz_score += lesson.quiz.questions.count() # Assuming 1 point per question
-
+            for enrollment in enrollments.get(course.pk, []):
+                completed_lessons = enrollment.completed_lessons
+                total_quiz_score = best_scores.get((enrollment.student_id, course.pk)) or 0
                 average_quiz_score = (total_quiz_score / total_possible_quiz_score) * 100 if total_possible_quiz_score > 0 else 0
 
                 students_progress.append({
-                    'student': student,
+                    'student': enrollment.student,
                     'completed_lessons': completed_lessons,
                     'total_lessons': lessons_in_course,
                     'lesson_completion_percentage': (completed_lessons / lessons_in_course * 100) if lessons_in_course > 0 else 0,
@@ -549,8 +924,105 @@ class ReportingDashboardView(InstructorOrSuperuserRequiredMixin, ListView):
 
             course_data.append({
                 'course': course,
-                'total_students_enrolled': total_students_enrolled,
+                'total_students_enrolled': len(students_progress),
                 'students_progress': students_progress,
             })
         context['course_data'] = course_data
+        context['report_jobs'] = ReportJob.objects.filter(requested_by=self.request.user)[:10]
         return context
+
+
+class CourseAnalyticsJobCreateView(InstructorOrSuperuserRequiredMixin, View):
+    """Queue a course analytics report for the background worker."""
+
+    def post(self, request, course_pk):
+        job = ReportJobService.enqueue(
+            'course_analytics', {'course_id': self.course.pk}, requested_by=request.user
+        )
+        if request.headers.get('Accept') == 'application/json':
+            return JsonResponse({
+                'job_id': job.pk,
+                'status': job.status,
+                'status_url': reverse('report_job_status', kwargs={'pk': job.pk}),
+            }, status=202)
+
+        messages.info(request, f"Analytics for '{self.course.title}' have been queued.")
+        return redirect(reverse_lazy('reporting_dashboard'))
+
+    def test_func(self):
+        if not super().test_func():
+            return False
+        self.course = get_object_or_404(Course, pk=self.kwargs['course_pk'])
+        return self.course.instructor == self.request.user or self.request.user.is_superuser
+
+
+class PlatformAnalyticsJobCreateView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """Queue platform-wide analytics across all courses (superusers only)."""
+
+    def post(self, request):
+        ReportJobService.enqueue('platform_analytics', requested_by=request.user)
+        messages.info(request, "Platform-wide analytics have been queued.")
+        return redirect(reverse_lazy('reporting_dashboard'))
+
+    def test_func(self):
+        return self.request.user.is_superuser
+
+
+class PlatformStatsView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """Platform-wide activity, score and completion statistics (superusers only).
+
+    Estimated from the stored sketches, so the page reads a few rows per
+    course and day instead of every attempt and completion in the window.
+    """
+    default_days = 30
+    max_days = 365
+    quiz_limit = 20
+
+    def get(self, request):
+        try:
+            days = min(max(int(request.GET.get('days', self.default_days)), 1), self.max_days)
+        except ValueError:
+            days = self.default_days
+        end = timezone.localdate()
+        start = end - timedelta(days=days - 1)
+
+        quiz_scores = SketchService.quiz_score_percentiles(start, end)
+        busiest = sorted(quiz_scores, key=lambda quiz_id: quiz_scores[quiz_id]['attempts'], reverse=True)[:self.quiz_limit]
+        titles = dict(Quiz.objects.filter(pk__in=busiest).values_list('pk', 'title'))
+        quantiles = [f'p{round(q * 100)}' for q in SKETCH_QUANTILES]
+        completion_hours = SketchService.completion_hours_percentiles(start, end)
+        return render(request, 'lms_app/platform_stats.html', {
+            'days': days,
+            'start': start,
+            'end': end,
+            'quantiles': quantiles,
+            'active_students': SketchService.active_students(start, end),
+            'daily_active_students': SketchService.daily_active_students(start, end),
+            'quiz_scores': [
+                {'quiz_id': quiz_id, 'title': titles.get(quiz_id, ''), **quiz_scores[quiz_id]} for quiz_id in busiest
+            ],
+            'completions': completion_hours['completions'],
+            'completion_hours': list(zip(quantiles, completion_hours['percentiles'])),
+        })
+
+    def test_func(self):
+        return self.request.user.is_superuser
+
+
+class ReportJobStatusView(LoginRequiredMixin, View):
+    """Return the status, and result once finished, of a report job as JSON."""
+
+    def get(self, request, pk):
+        job = get_object_or_404(ReportJob, pk=pk)
+        if job.requested_by != request.user and not request.user.is_superuser:
+            return JsonResponse({'error': 'You do not have permission to view this job.'}, status=403)
+
+        return JsonResponse({
+            'job_id': job.pk,
+            'task_name': job.task_name,
+            'status': job.status,
+            'result': job.result,
+            'error': job.error,
+            'created_at': job.created_at,
+            'finished_at': job.finished_at,
+        })
@@ -40,9 +40,24 @@ INSTALLED_APPS = [
     'lms_app',
 ]
 
-# Message storage to enable Django messages framework
+# Message storage to enable Django messages framework. Cookie storage keeps
+# flash messages out of the session, so adding one never writes a session row.
 MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
 
+# Session backend. 'cached_db' serves reads from the cache and only writes
+# the database when session data actually changes; 'signed_cookies' keeps
+# sessions entirely client-side (no server-side logout revocation);
+# 'db' is Django's default table-backed store.
+LMS_SESSION_MODE = 'cached_db'
+LMS_SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'lms_app.sessions',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = LMS_SESSION_ENGINES[LMS_SESSION_MODE]
+SESSION_CACHE_ALIAS = 'default'
+SESSION_SAVE_EVERY_REQUEST = False
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -59,8 +74,17 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Compiled templates are kept for the life of the process, so
+            # {% include %} inside list loops never re-reads or re-parses
+            # the component. The development autoreloader clears this cache
+            # when a template file changes.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -81,6 +105,11 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # The report worker writes from several threads; wait for locks
+            # instead of failing immediately with "database is locked".
+            'timeout': 20,
+        },
     }
 }
 
@@ -130,3 +159,54 @@ AUTH_USER_MODEL = 'lms_app.User'
 
 LOGIN_REDIRECT_URL = 'course_list'
 LOGOUT_REDIRECT_URL = 'login' # Or 'course_list' if you prefer to redirect to the public course list
+
+# Number of worker processes used for platform-wide course analytics.
+# 0 computes everything in the calling process.
+LMS_ANALYTICS_WORKERS = 0
+
+CACHES = {
+    # Shared by every worker process: holds cache tag versions, cached pages
+    # and quiz snapshots, cached_db sessions, autosaved quiz answers and quiz
+    # submission tokens, which whichever worker serves the next request must
+    # see. The file-based cache does for development on one machine; in
+    # production use Redis or Memcached, e.g.
+    # 'django.core.cache.backends.redis.RedisCache' with
+    # 'LOCATION': 'redis://127.0.0.1:6379'.
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    # Always process-local: holds rate-limit buckets, which are checked on
+    # every submit and must stay cheap.
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'lms-local',
+    },
+}
+
+# Warm imports, URL resolvers, templates and translations when
+# lms_project.wsgi is imported. Enable together with a pre-forking server
+# option (gunicorn --preload) so new workers start with warm caches.
+LMS_PRELOAD = False
+
+LMS_CACHE_ALIAS = 'default'
+LMS_PAGE_CACHE_TIMEOUT = 300
+
+# Quiz submissions: each student may submit a quiz LMS_QUIZ_SUBMIT_BURST
+# times in a row, then once per LMS_QUIZ_SUBMIT_REFILL_SECONDS. Resubmitted
+# forms (double clicks, retries) return the original attempt for
+# LMS_SUBMISSION_TOKEN_TIMEOUT seconds without being graded again, whichever
+# worker they reach. The rate limits are kept per worker process in
+# LMS_THROTTLE_CACHE_ALIAS.
+LMS_THROTTLE_CACHE_ALIAS = 'local'
+LMS_QUIZ_SUBMIT_BURST = 3
+LMS_QUIZ_SUBMIT_REFILL_SECONDS = 20
+LMS_SUBMISSION_TOKEN_TIMEOUT = 3600
+
+# Autosaved quiz answers are buffered in LMS_CACHE_ALIAS and written to the
+# student's draft at most once per LMS_DRAFT_FLUSH_SECONDS, and on submit.
+# With a process-local LMS_CACHE_ALIAS every answer is written straight through.
+# Buffers of drafts left alone for LMS_DRAFT_BUFFER_TIMEOUT seconds expire.
+LMS_DRAFT_FLUSH_SECONDS = 10
+LMS_DRAFT_BUFFER_TIMEOUT = 86400